@@ -0,0 +1,6 @@
+"""
+Code shared by the dashboard, the Raspberry Pi scripts and the voice pipeline.
+
+Scripts outside the dashboard package add the repository root to sys.path
+before importing from here.
+"""
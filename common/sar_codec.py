@@ -0,0 +1,184 @@
+"""
+Compact binary payloads for the position and sound MQTT topics.
+
+A binary message is a fixed header followed by `count` fixed-size records:
+
+    header    <BBBBId   magic 0xA5, version, kind, count, sequence, send time (s)
+    position  <Hff      beacon number (beacon-N), x, y
+    sound     <ff       angle (degrees), human confidence
+
+MQTT 3.1.1 has no content-type property, so the first byte is the marker: a
+JSON payload always starts with "{" (or whitespace), never 0xA5. Consumers
+call decode_payload(), which accepts both encodings and returns the same
+Python objects json.loads() would give for the JSON schema, so publishers
+can be switched over one at a time.
+
+Run this module directly for a size/parse-time comparison with JSON:
+
+    python -m common.sar_codec
+"""
+
+import argparse
+import json
+import struct
+import time
+from collections import namedtuple
+
+MAGIC = 0xA5
+VERSION = 1
+
+KIND_POSITION = 1
+KIND_SOUND = 2
+
+HEADER = struct.Struct("<BBBBId")
+POSITION_RECORD = struct.Struct("<Hff")
+SOUND_RECORD = struct.Struct("<ff")
+RECORDS = {KIND_POSITION: POSITION_RECORD, KIND_SOUND: SOUND_RECORD}
+MAX_RECORDS = 255
+
+BEACON_PREFIX = "beacon-"
+
+MessageHeader = namedtuple("MessageHeader", "version kind count sequence timestamp")
+
+
+def is_binary(payload):
+    return len(payload) > 0 and payload[0] == MAGIC
+
+
+def beacon_number(beacon_id):
+    """'beacon-3' -> 3; raises ValueError for IDs the binary format cannot carry."""
+    if not beacon_id.startswith(BEACON_PREFIX):
+        raise ValueError(f"Unsupported beacon id {beacon_id!r}")
+    return int(beacon_id[len(BEACON_PREFIX) :])
+
+
+def _pack(kind, records, sequence, timestamp):
+    if len(records) > MAX_RECORDS:
+        raise ValueError(f"At most {MAX_RECORDS} records per message")
+    record = RECORDS[kind]
+    buf = bytearray(HEADER.size + record.size * len(records))
+    HEADER.pack_into(
+        buf,
+        0,
+        MAGIC,
+        VERSION,
+        kind,
+        len(records),
+        sequence & 0xFFFFFFFF,
+        time.time() if timestamp is None else timestamp,
+    )
+    offset = HEADER.size
+    for values in records:
+        record.pack_into(buf, offset, *values)
+        offset += record.size
+    return bytes(buf)
+
+
+def encode_positions(positions, sequence=0, timestamp=None):
+    """Encode {"beacon-N": (x, y) or {"x": .., "y": ..}} as one message."""
+    records = []
+    for beacon_id, coords in positions.items():
+        if isinstance(coords, dict):
+            coords = (coords["x"], coords["y"])
+        records.append((beacon_number(beacon_id), coords[0], coords[1]))
+    return _pack(KIND_POSITION, records, sequence, timestamp)
+
+
+def encode_sound(events, sequence=0, timestamp=None):
+    """Encode a list of (angle_degrees, human_confidence) as one message."""
+    return _pack(KIND_SOUND, list(events), sequence, timestamp)
+
+
+def unpack_message(payload):
+    """Split a binary message into (MessageHeader, list of record tuples)."""
+    if len(payload) < HEADER.size:
+        raise ValueError("Binary payload shorter than its header")
+    magic, version, kind, count, sequence, timestamp = HEADER.unpack_from(payload)
+    if magic != MAGIC:
+        raise ValueError("Not a binary SAR payload")
+    if version != VERSION:
+        raise ValueError(f"Unsupported binary payload version {version}")
+    record = RECORDS.get(kind)
+    if record is None:
+        raise ValueError(f"Unknown binary payload kind {kind}")
+    end = HEADER.size + record.size * count
+    if len(payload) < end:
+        raise ValueError("Truncated binary payload")
+    records = list(record.iter_unpack(memoryview(payload)[HEADER.size : end]))
+    return MessageHeader(version, kind, count, sequence, timestamp), records
+
+
+def decode_payload(payload):
+    """Decode a JSON or binary payload into the JSON schema's Python objects.
+
+    Position messages become {"beacon-N": {"x": .., "y": ..}}. Sound
+    messages become {"position": .., "human_confidence": ..} for the last
+    event, plus "events" with all of them when a message carries several.
+    Every record also gets the header's send time and sequence number as
+    "timestamp" and "seq". Raises ValueError for malformed payloads.
+    """
+    if not is_binary(payload):
+        return json.loads(bytes(payload).decode())
+    header, records = unpack_message(payload)
+    t, seq = header.timestamp, header.sequence
+    if header.kind == KIND_POSITION:
+        return {
+            f"{BEACON_PREFIX}{number}": {"x": x, "y": y, "timestamp": t, "seq": seq}
+            for number, x, y in records
+        }
+    events = [
+        {"position": a, "human_confidence": c, "timestamp": t, "seq": seq}
+        for a, c in records
+    ]
+    if not events:
+        return {}
+    data = dict(events[-1])
+    if len(events) > 1:
+        data["events"] = events
+    return data
+
+
+# --- Benchmark ---
+def _time_per_call(func, arg, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(arg)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare JSON and binary SAR payload size and parse time"
+    )
+    parser.add_argument("--repeat", type=int, default=20000, help="Iterations per case")
+    args = parser.parse_args()
+
+    cases = []
+    for beacons in (1, 3, 10):
+        positions = {
+            f"beacon-{i + 1}": {"x": 12.34 * (i + 1), "y": -56.78 + i} for i in range(beacons)
+        }
+        cases.append(
+            (f"position x{beacons}", json.dumps(positions).encode(), encode_positions(positions))
+        )
+    sound = {"position": 123.4567, "human_confidence": 0.8731}
+    cases.append(
+        (
+            "sound x1",
+            json.dumps(sound).encode(),
+            encode_sound([(sound["position"], sound["human_confidence"])]),
+        )
+    )
+
+    print(f"{'message':<14}{'json B':>8}{'bin B':>8}{'json us':>10}{'bin us':>10}")
+    for name, as_json, as_binary in cases:
+        json_us = _time_per_call(decode_payload, as_json, args.repeat)
+        binary_us = _time_per_call(decode_payload, as_binary, args.repeat)
+        print(
+            f"{name:<14}{len(as_json):>8}{len(as_binary):>8}"
+            f"{json_us:>10.2f}{binary_us:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
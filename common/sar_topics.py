@@ -0,0 +1,63 @@
+"""
+MQTT topic layout shared by every component.
+
+Each robot publishes and listens under its own namespace:
+
+    sar-robot/<robot_id>/sound
+    sar-robot/<robot_id>/position
+    sar-robot/<robot_id>/movement
+    sar-robot/<robot_id>/control
+    sar-robot/<robot_id>/pan_angle
+    sar-robot/<robot_id>/ack          (command acknowledgements from the ROS bridge)
+
+so one broker can serve a fleet and the dashboard subscribes once per
+message type with a `sar-robot/+/<name>` wildcard. The old un-namespaced
+topics (`sar-robot/<name>`) are still understood and belong to
+DEFAULT_ROBOT_ID.
+"""
+
+import os
+
+TOPIC_ROOT = "sar-robot"
+DEFAULT_ROBOT_ID = "robot-1"
+ROBOT_ID_ENV = "SAR_ROBOT_ID"
+
+SOUND = "sound"
+POSITION = "position"
+MOVEMENT = "movement"
+CONTROL = "control"
+PAN_ANGLE = "pan_angle"
+ACK = "ack"
+
+
+def robot_id_from_env():
+    """Robot ID for publishers, taken from $SAR_ROBOT_ID."""
+    return os.environ.get(ROBOT_ID_ENV, DEFAULT_ROBOT_ID)
+
+
+def robot_topic(robot_id, name):
+    if "/" in robot_id or "+" in robot_id or "#" in robot_id:
+        raise ValueError(f"Invalid robot id {robot_id!r}")
+    return f"{TOPIC_ROOT}/{robot_id}/{name}"
+
+
+def fleet_topic(name):
+    """Wildcard filter matching `name` for every robot."""
+    return f"{TOPIC_ROOT}/+/{name}"
+
+
+def legacy_topic(name):
+    """Pre-namespacing topic, implicitly DEFAULT_ROBOT_ID."""
+    return f"{TOPIC_ROOT}/{name}"
+
+
+def parse_topic(topic):
+    """Split a topic into (robot_id, name); None if it is not a SAR topic."""
+    parts = topic.split("/")
+    if parts[0] != TOPIC_ROOT:
+        return None
+    if len(parts) == 3:
+        return parts[1], parts[2]
+    if len(parts) == 2:
+        return DEFAULT_ROBOT_ID, parts[1]
+    return None
@@ -4,7 +4,7 @@ Multimodal SAR Robot Dashboard
 
 from .gui_control import RobotControlGUI
 from .radar_widget import RadarWidget
-from .mqtt_client import MQTTClient
+from .mqtt_client import MQTTClient, MQTTHub
 from .map_widget import MapWidget
 
-__all__ = ["RobotControlGUI", "RadarWidget", "MQTTClient", "MapWidget"]
+__all__ = ["RobotControlGUI", "RadarWidget", "MQTTClient", "MQTTHub", "MapWidget"]
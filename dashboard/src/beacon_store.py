@@ -0,0 +1,134 @@
+"""
+Array-backed beacon positions for the map.
+
+Positions live in one preallocated (capacity, 2) NumPy array indexed
+through an ID -> row dictionary; rows are never reused, so a beacon's row
+(and its colour, row % palette size) is stable until clear(). The largest
+absolute coordinate is maintained incrementally and only rescanned when
+the beacon that defined it moves inwards. A uniform grid in data units
+maps cells to rows for hover/pick lookups and for painting only the
+beacons inside a dirty rectangle.
+"""
+
+import math
+
+import numpy as np
+
+INITIAL_CAPACITY = 256
+GRID_CELL_SIZE = 10.0  # data units per grid cell
+
+
+class BeaconStore:
+    def __init__(self, capacity=INITIAL_CAPACITY, cell_size=GRID_CELL_SIZE):
+        self.cell_size = cell_size
+        self._capacity = capacity
+        self.clear()
+
+    def clear(self):
+        self.ids = []
+        self.index = {}  # beacon ID -> row
+        self.xy = np.zeros((self._capacity, 2))
+        self._cells = []  # row -> grid cell
+        self._grid = {}  # (cell x, cell y) -> set of rows
+        self._max_abs = 0.0
+        self._max_abs_stale = False
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, beacon_id):
+        return beacon_id in self.index
+
+    def positions(self):
+        """View of the (n, 2) positions, row order = insertion order."""
+        return self.xy[: len(self.ids)]
+
+    def position(self, beacon_id):
+        row = self.index.get(beacon_id)
+        return None if row is None else tuple(self.xy[row].tolist())
+
+    # --- Updates ---
+    def update(self, beacon_id, x, y):
+        """Set a beacon's position; returns its previous (x, y) or None if new.
+
+        Raises ValueError, leaving the store unchanged, for NaN or infinite
+        coordinates.
+        """
+        if not (math.isfinite(x) and math.isfinite(y)):
+            raise ValueError(f"Non-finite position for {beacon_id}: ({x}, {y})")
+        row = self.index.get(beacon_id)
+        if row is None:
+            row = self._add(beacon_id)
+            old = None
+        else:
+            old = tuple(self.xy[row].tolist())
+            if max(abs(old[0]), abs(old[1])) >= self._max_abs:
+                self._max_abs_stale = True  # The extreme beacon may move inwards
+        self.xy[row] = (x, y)
+        extent = max(abs(x), abs(y))
+        if extent >= self._max_abs:
+            self._max_abs = extent
+            self._max_abs_stale = False
+
+        cell = (math.floor(x / self.cell_size), math.floor(y / self.cell_size))
+        if old is None:
+            self._cells.append(cell)
+            self._grid.setdefault(cell, set()).add(row)
+        elif cell != self._cells[row]:
+            rows = self._grid[self._cells[row]]
+            rows.discard(row)
+            if not rows:
+                del self._grid[self._cells[row]]
+            self._grid.setdefault(cell, set()).add(row)
+            self._cells[row] = cell
+        return old
+
+    def _add(self, beacon_id):
+        row = len(self.ids)
+        if row == len(self.xy):
+            # Grow by doubling; views returned earlier become stale
+            self.xy = np.concatenate([self.xy, np.zeros_like(self.xy)])
+        self.ids.append(beacon_id)
+        self.index[beacon_id] = row
+        return row
+
+    # --- Queries ---
+    def max_abs(self):
+        """Largest |x| or |y| over all beacons (0.0 when empty)."""
+        if self._max_abs_stale:
+            positions = self.positions()
+            self._max_abs = float(np.abs(positions).max()) if len(positions) else 0.0
+            self._max_abs_stale = False
+        return self._max_abs
+
+    def rows_in_rect(self, x0, y0, x1, y1):
+        """Rows of beacons inside [x0, x1] x [y0, y1], sorted."""
+        cx0, cx1 = math.floor(x0 / self.cell_size), math.floor(x1 / self.cell_size)
+        cy0, cy1 = math.floor(y0 / self.cell_size), math.floor(y1 / self.cell_size)
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) >= len(self._grid):
+            # Rectangle spans most of the grid: filter all rows at once
+            candidates = np.arange(len(self.ids))
+        else:
+            rows = []
+            for cx in range(cx0, cx1 + 1):
+                for cy in range(cy0, cy1 + 1):
+                    cell_rows = self._grid.get((cx, cy))
+                    if cell_rows:
+                        rows.extend(cell_rows)
+            candidates = np.array(sorted(rows), dtype=np.intp)
+        if len(candidates) == 0:
+            return candidates
+        xy = self.xy[candidates]
+        inside = (xy[:, 0] >= x0) & (xy[:, 0] <= x1) & (xy[:, 1] >= y0) & (xy[:, 1] <= y1)
+        return candidates[inside]
+
+    def nearest(self, x, y, radius):
+        """ID of the beacon closest to (x, y) within radius, or None."""
+        rows = self.rows_in_rect(x - radius, y - radius, x + radius, y + radius)
+        if len(rows) == 0:
+            return None
+        distances = np.hypot(self.xy[rows, 0] - x, self.xy[rows, 1] - y)
+        best = int(distances.argmin())
+        if distances[best] > radius:
+            return None
+        return self.ids[rows[best]]
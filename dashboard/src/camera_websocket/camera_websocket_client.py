@@ -1,30 +1,48 @@
 import asyncio
+import time
 import cv2
 import numpy as np
 import websockets
 
+from frame_protocol import FrameStats, unpack_frame
+
+STATS_INTERVAL = 1.0  # seconds between statistics printouts
+
+
 class WSVideoClient:
     def __init__(self, uri, name="Stream"):
         self.uri = uri
         self.name = name
         self.running = True
+        self.stats = FrameStats()
 
     async def _run_stream(self):
         async with websockets.connect(self.uri, max_size=None) as websocket:
             print(f"[{self.name}] Connected to {self.uri}")
+            last_report = time.monotonic()
             while self.running:
                 try:
                     data = await websocket.recv()
-                    np_arr = np.frombuffer(data, np.uint8)
+                    header, jpeg = unpack_frame(data)
+                    self.stats.update(header, time.time())
+
+                    np_arr = np.frombuffer(jpeg, np.uint8)
                     img = cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
                     if img is not None:
                         cv2.imshow(self.name, img)
                         if cv2.waitKey(1) == 27:  # ESC key
                             self.running = False
                             break
+
+                    now = time.monotonic()
+                    if now - last_report >= STATS_INTERVAL:
+                        print(f"[{self.name}] {self.stats.summary()}")
+                        last_report = now
                 except websockets.ConnectionClosed:
                     print(f"[{self.name}] Connection closed.")
                     break
+                except ValueError as e:
+                    print(f"[{self.name}] Bad frame: {e}")
 
         cv2.destroyWindow(self.name)
 
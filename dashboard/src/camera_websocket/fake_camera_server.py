@@ -0,0 +1,160 @@
+"""
+Stand-in for the Raspberry Pi camera server, for testing without hardware.
+
+Streams synthetic JPEG frames on ws://0.0.0.0:9002 using the framed protocol
+(or raw JPEG with --raw) and honours {"type": "quality", ...} requests from
+the dashboard, so the adaptive quality loop can be exercised locally:
+
+    python fake_camera_server.py --bandwidth-kbps 2000
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import cv2
+import numpy as np
+import websockets
+
+from frame_protocol import pack_frame
+from quality import QUALITY_LEVELS
+
+
+class FakeCamera:
+    def __init__(self, framed=True, bandwidth_kbps=0.0):
+        self.framed = framed
+        self.bandwidth_kbps = bandwidth_kbps
+        level = QUALITY_LEVELS[-1]
+        self.width = level["width"]
+        self.height = level["height"]
+        self.jpeg_quality = level["jpeg_quality"]
+        self.fps = level["fps"]
+        self.sequence = 0
+
+    def apply_quality(self, msg):
+        """Apply a quality request, clamping values to sane limits."""
+        self.width = int(min(max(msg.get("width", self.width), 160), 1920))
+        self.height = int(min(max(msg.get("height", self.height), 120), 1080))
+        self.jpeg_quality = int(
+            min(max(msg.get("jpeg_quality", self.jpeg_quality), 10), 95)
+        )
+        self.fps = float(min(max(msg.get("fps", self.fps), 1), 60))
+        print(
+            f"[camera] quality -> {self.width}x{self.height} q={self.jpeg_quality} "
+            f"fps={self.fps:g} ({msg.get('reason', '-')})"
+        )
+
+    def render(self):
+        """Draw a synthetic frame with a moving marker and the frame number."""
+        t = time.time()
+        img = np.empty((self.height, self.width, 3), np.uint8)
+        img[:, :, 0] = np.linspace(0, 255, self.width, dtype=np.uint8)[None, :]
+        img[:, :, 1] = np.linspace(0, 255, self.height, dtype=np.uint8)[:, None]
+        img[:, :, 2] = int(t * 40) % 256
+        cx = int((np.sin(t) * 0.4 + 0.5) * self.width)
+        cy = int((np.cos(t * 0.7) * 0.4 + 0.5) * self.height)
+        cv2.circle(img, (cx, cy), max(self.height // 12, 4), (255, 255, 255), -1)
+        cv2.putText(
+            img,
+            f"#{self.sequence} {self.width}x{self.height} q{self.jpeg_quality}",
+            (10, 30),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.6,
+            (0, 0, 0),
+            2,
+        )
+        return img
+
+    def next_message(self):
+        img = self.render()
+        capture_us = int(time.time() * 1e6)
+        encode_start = time.perf_counter()
+        ok, jpeg = cv2.imencode(
+            ".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality]
+        )
+        encode_us = int((time.perf_counter() - encode_start) * 1e6)
+        if not ok:
+            return None
+        self.sequence += 1
+        if not self.framed:
+            return jpeg.tobytes()
+        return pack_frame(
+            jpeg, self.sequence - 1, capture_us, encode_us, self.width, self.height
+        )
+
+
+async def _receive_commands(ws, camera):
+    async for message in ws:
+        try:
+            msg = json.loads(message)
+        except (TypeError, ValueError):
+            continue
+        if not isinstance(msg, dict):
+            continue  # Valid JSON but not a command object, e.g. [] or 3
+        if msg.get("type") == "quality":
+            try:
+                camera.apply_quality(msg)
+            except (TypeError, ValueError, OverflowError) as e:
+                print(f"[camera] ignoring bad quality request {msg}: {e}")
+        elif msg.get("type") == "command":
+            print(f"[camera] command: {msg.get('value')}")
+
+
+async def _stream(ws, camera):
+    next_frame = time.monotonic()
+    while True:
+        data = camera.next_message()
+        if data is not None:
+            await ws.send(data)
+            if camera.bandwidth_kbps > 0:
+                # Emulate a slow link by holding the sender for the frame airtime
+                await asyncio.sleep(len(data) * 8 / (camera.bandwidth_kbps * 1000))
+        next_frame += 1.0 / camera.fps
+        delay = next_frame - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        else:
+            next_frame = time.monotonic()
+
+
+async def serve(host, port, camera):
+    async def handler(ws, path=None):
+        print("[camera] client connected")
+        receiver = asyncio.ensure_future(_receive_commands(ws, camera))
+        try:
+            await _stream(ws, camera)
+        except websockets.ConnectionClosed:
+            print("[camera] client disconnected")
+        finally:
+            receiver.cancel()
+
+    async with websockets.serve(handler, host, port, max_size=None):
+        print(f"[camera] serving on ws://{host}:{port}")
+        await asyncio.Future()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake SAR robot camera server")
+    parser.add_argument("--host", default="0.0.0.0", help="Bind address")
+    parser.add_argument("--port", type=int, default=9002, help="WebSocket port")
+    parser.add_argument(
+        "--raw", action="store_true", help="Send bare JPEG without frame header"
+    )
+    parser.add_argument(
+        "--bandwidth-kbps",
+        type=float,
+        default=0.0,
+        help="Emulated link bandwidth in kbit/s (0 = unlimited)",
+    )
+    args = parser.parse_args()
+
+    camera = FakeCamera(framed=not args.raw, bandwidth_kbps=args.bandwidth_kbps)
+    try:
+        asyncio.run(serve(args.host, args.port, camera))
+    except KeyboardInterrupt:
+        print("\nStopping camera server...")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Framed video protocol for the camera WebSocket (port 9002).
+
+A framed message is a fixed little-endian header followed by the JPEG bytes.
+Raw messages (bare JPEG, starting with 0xFFD8) are still accepted, so older
+camera servers keep working; they just don't produce latency statistics.
+
+Header layout (28 bytes):
+    magic        4s   b"SARV"
+    version      B    protocol version (1)
+    flags        B    reserved, 0
+    header_size  H    offset of the JPEG payload, allows future extensions
+    sequence     I    frame counter, wraps at 2**32
+    capture_us   Q    capture wall-clock time, microseconds since the epoch
+    encode_us    I    time spent in JPEG encoding, microseconds
+    width        H    frame width in pixels
+    height       H    frame height in pixels
+
+Glass-to-glass latency compares the capture timestamp with the receiver's
+wall clock, so it is only meaningful when both hosts are NTP-synchronised.
+Jitter only depends on differences and is valid regardless of clock offset.
+"""
+
+import struct
+import time
+
+FRAME_MAGIC = b"SARV"
+FRAME_VERSION = 1
+FRAME_HEADER = struct.Struct("<4sBBHIQIHH")
+
+_SEQ_MOD = 1 << 32
+_SEQ_HALF = 1 << 31
+
+
+class FrameHeader:
+    __slots__ = ("sequence", "capture_us", "encode_us", "width", "height")
+
+    def __init__(self, sequence, capture_us, encode_us, width, height):
+        self.sequence = sequence
+        self.capture_us = capture_us
+        self.encode_us = encode_us
+        self.width = width
+        self.height = height
+
+    def __repr__(self):
+        return (
+            f"FrameHeader(sequence={self.sequence}, capture_us={self.capture_us}, "
+            f"encode_us={self.encode_us}, width={self.width}, height={self.height})"
+        )
+
+
+def pack_frame(jpeg_bytes, sequence, capture_us, encode_us, width, height):
+    """Prepend a frame header to JPEG bytes."""
+    header = FRAME_HEADER.pack(
+        FRAME_MAGIC,
+        FRAME_VERSION,
+        0,
+        FRAME_HEADER.size,
+        sequence % _SEQ_MOD,
+        capture_us,
+        encode_us,
+        width,
+        height,
+    )
+    return header + bytes(jpeg_bytes)
+
+
+def unpack_frame(data):
+    """Split a WebSocket message into (header, jpeg_view).
+
+    Returns (None, data) for raw JPEG messages. The payload is returned as a
+    memoryview so no copy of the JPEG is made.
+    """
+    view = memoryview(data)
+    if len(view) < FRAME_HEADER.size or view[:4] != FRAME_MAGIC:
+        return None, view
+    (
+        _magic,
+        version,
+        _flags,
+        header_size,
+        sequence,
+        capture_us,
+        encode_us,
+        width,
+        height,
+    ) = FRAME_HEADER.unpack_from(view)
+    if version != FRAME_VERSION or header_size < FRAME_HEADER.size:
+        raise ValueError(f"Unsupported frame header (version {version})")
+    header = FrameHeader(sequence, capture_us, encode_us, width, height)
+    return header, view[header_size:]
+
+
+class FrameStats:
+    """Latency, jitter and loss statistics for a received video stream."""
+
+    # Smoothing factor for the average latency (1/16, as for RFC 3550 jitter)
+    _GAIN = 1.0 / 16.0
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.frames = 0
+        self.raw_frames = 0
+        self.missing = 0
+        self.reordered = 0
+        self.duplicates = 0
+        self.latency_ms = 0.0
+        self.avg_latency_ms = 0.0
+        self.jitter_ms = 0.0
+        self.encode_ms = 0.0
+        self.width = 0
+        self.height = 0
+        self._last_seq = None
+        self._last_transit = None
+
+    def update(self, header, recv_time=None):
+        """Account for one received message; header is None for raw JPEG."""
+        if header is None:
+            self.raw_frames += 1
+            return
+        if recv_time is None:
+            recv_time = time.time()
+
+        self.frames += 1
+        self.width = header.width
+        self.height = header.height
+        self.encode_ms = header.encode_us / 1000.0
+
+        # Sequence gaps (modulo 2**32); a late frame fills a previous gap
+        if self._last_seq is not None:
+            delta = (header.sequence - self._last_seq) % _SEQ_MOD
+            if delta == 0:
+                self.duplicates += 1
+                return
+            if delta < _SEQ_HALF:
+                self.missing += delta - 1
+                self._last_seq = header.sequence
+            else:
+                self.reordered += 1
+                if self.missing > 0:
+                    self.missing -= 1
+        else:
+            self._last_seq = header.sequence
+
+        # Glass-to-glass latency and RFC 3550 style interarrival jitter
+        transit = recv_time - header.capture_us / 1e6
+        self.latency_ms = transit * 1000.0
+        if self.frames == 1:
+            self.avg_latency_ms = self.latency_ms
+        else:
+            self.avg_latency_ms += (self.latency_ms - self.avg_latency_ms) * self._GAIN
+        if self._last_transit is not None:
+            d = abs(transit - self._last_transit) * 1000.0
+            self.jitter_ms += (d - self.jitter_ms) * self._GAIN
+        self._last_transit = transit
+
+    @property
+    def framed(self):
+        return self.frames > 0
+
+    def snapshot(self):
+        """Return the current statistics as a plain dict."""
+        return {
+            "framed": self.framed,
+            "frames": self.frames,
+            "raw_frames": self.raw_frames,
+            "missing": self.missing,
+            "reordered": self.reordered,
+            "duplicates": self.duplicates,
+            "latency_ms": self.latency_ms,
+            "avg_latency_ms": self.avg_latency_ms,
+            "jitter_ms": self.jitter_ms,
+            "encode_ms": self.encode_ms,
+            "width": self.width,
+            "height": self.height,
+        }
+
+    def summary(self):
+        """Short human readable summary."""
+        if not self.framed:
+            return f"raw JPEG, {self.raw_frames} frames (no timing header)"
+        return (
+            f"{self.width}x{self.height} | latency {self.avg_latency_ms:.0f} ms | "
+            f"jitter {self.jitter_ms:.1f} ms | encode {self.encode_ms:.1f} ms | "
+            f"missing {self.missing}"
+        )
@@ -0,0 +1,121 @@
+"""
+Client-driven video quality negotiation.
+
+The dashboard measures what it can actually sustain (receive bandwidth,
+decode time, display rate) and asks the camera server to move up or down a
+fixed ladder of levels. Requests are sent as JSON over the existing command
+channel of the video WebSocket:
+
+    {"type": "quality", "width": 640, "height": 480,
+     "jpeg_quality": 70, "fps": 30, "reason": "decode"}
+
+Servers that don't understand the message simply ignore it.
+"""
+
+# Ordered from cheapest to most expensive
+QUALITY_LEVELS = [
+    {"width": 320, "height": 240, "jpeg_quality": 40, "fps": 10},
+    {"width": 480, "height": 360, "jpeg_quality": 50, "fps": 15},
+    {"width": 640, "height": 480, "jpeg_quality": 60, "fps": 20},
+    {"width": 640, "height": 480, "jpeg_quality": 70, "fps": 30},
+]
+
+# Fraction of one core that decoding may use before we step down
+DECODE_BUDGET = 0.5
+# Headroom required before stepping up (decode cost at the next level)
+DECODE_HEADROOM = 0.3
+# Display rate below this fraction of the receive rate means the GUI lags
+DISPLAY_RATIO_MIN = 0.85
+# Receive rate below this fraction of the requested fps means the link lags
+RECEIVE_RATIO_MIN = 0.75
+
+
+class QualityController:
+    """Hysteresis-based quality ladder controller.
+
+    Call evaluate() once per measurement interval. It returns a quality
+    request dict when the level should change, otherwise None. Stepping
+    down needs `down_after` consecutive bad intervals, stepping up needs
+    `up_after` good ones; the wait before the next probe upwards doubles
+    every time a probe has to be reverted.
+    """
+
+    def __init__(self, levels=None, start_level=None, down_after=2, up_after=5,
+                 max_up_after=60):
+        self.levels = levels or QUALITY_LEVELS
+        if start_level is None:
+            start_level = len(self.levels) - 1
+        self.level = max(0, min(start_level, len(self.levels) - 1))
+        self.down_after = down_after
+        self.base_up_after = up_after
+        self.up_after = up_after
+        self.max_up_after = max_up_after
+        self._bad = 0
+        self._good = 0
+        self._probing = False
+        self.last_reason = None
+
+    @property
+    def current(self):
+        return self.levels[self.level]
+
+    def request(self, reason="initial"):
+        """Build the quality request message for the current level."""
+        msg = {"type": "quality"}
+        msg.update(self.current)
+        msg["reason"] = reason
+        return msg
+
+    def _diagnose(self, metrics):
+        """Return the reason the current level is unsustainable, or None."""
+        fps = self.current["fps"]
+        recv_fps = metrics.get("recv_fps", 0.0)
+        if recv_fps < 1.0:
+            return None  # Nothing to judge (paused or just connected)
+
+        if metrics.get("decode_ms", 0.0) / 1000.0 * recv_fps > DECODE_BUDGET:
+            return "decode"
+        if metrics.get("display_fps", recv_fps) < DISPLAY_RATIO_MIN * recv_fps:
+            return "display"
+        if metrics.get("missing", 0) > 0 or recv_fps < RECEIVE_RATIO_MIN * fps:
+            return "network"
+        return None
+
+    def evaluate(self, metrics):
+        """Feed one interval of measurements; maybe return a quality request."""
+        reason = self._diagnose(metrics)
+        self.last_reason = reason
+
+        if reason is not None:
+            self._good = 0
+            self._bad += 1
+            if self._bad >= self.down_after and self.level > 0:
+                if self._probing:
+                    # The last step up didn't hold; wait longer next time
+                    self.up_after = min(self.up_after * 2, self.max_up_after)
+                self._probing = False
+                self._bad = 0
+                self.level -= 1
+                return self.request(reason)
+            return None
+
+        self._bad = 0
+        self._good += 1
+        if self._probing and self._good >= self.down_after:
+            # Survived the probe, reset the back-off
+            self._probing = False
+            self.up_after = self.base_up_after
+
+        if self._good >= self.up_after and self.level < len(self.levels) - 1:
+            nxt = self.levels[self.level + 1]
+            decode_s = metrics.get("decode_ms", 0.0) / 1000.0
+            # Decode cost scales roughly with pixel count and frame rate
+            scale = (nxt["width"] * nxt["height"]) / float(
+                self.current["width"] * self.current["height"]
+            )
+            if decode_s * scale * nxt["fps"] <= DECODE_HEADROOM:
+                self._good = 0
+                self._probing = True
+                self.level += 1
+                return self.request("headroom")
+        return None
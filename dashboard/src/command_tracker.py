@@ -0,0 +1,110 @@
+"""
+Round trips of movement commands, from the dashboard to the ROS bridge and back.
+
+Every command gets an ID and a send timestamp. Once the bridge
+(mqtt_to_micro_ros.py) has published a command to ROS, it echoes both
+on sar-robot/<robot_id>/ack:
+
+    {"id": "3f2a9c1e-17", "command": "forward", "timestamp": 1760000000.103,
+     "received": 1760000000.112, "published": 1760000000.121}
+
+(unknown commands come back with "error" instead of "published").
+CommandTracker matches the acks to its own commands and records two
+stages in PERF:
+
+    command.rtt     send -> ack, on the dashboard's clock
+    command.bridge  received -> published, on the bridge's clock
+
+so they show up in the HUD (F3) and in the performance export
+(Ctrl+Shift+E), next to the command.sent/acked/lost counters. Commands
+without an ack after ACK_TIMEOUT count as lost.
+"""
+
+import itertools
+import threading
+import time
+import uuid
+
+from .perf_monitor import PERF
+
+ACK_TIMEOUT = 2.0  # s before an unacknowledged command counts as lost
+
+
+class CommandTracker:
+    def __init__(self, monitor=PERF, timeout=ACK_TIMEOUT):
+        self.monitor = monitor
+        self.timeout = timeout
+        # IDs are unique per dashboard session, so several dashboards can
+        # share the ack topic and each only matches its own commands
+        self.session = uuid.uuid4().hex[:8]
+        self._numbers = itertools.count(1)
+        self._pending = {}  # id -> perf_counter time sent
+        self._lock = threading.Lock()
+        self.sent = 0
+        self.acked = 0
+        self.rejected = 0
+        self.lost = 0
+
+    def stamp(self, command):
+        """Message for a new command, registered as waiting for its ack."""
+        command_id = f"{self.session}-{next(self._numbers)}"
+        with self._lock:
+            self._pending[command_id] = time.perf_counter()
+        self.sent += 1
+        self.monitor.mark("command.sent")
+        return {"command": command, "id": command_id, "timestamp": time.time()}
+
+    def discard(self, message):
+        """Forget a stamped command that could not be published."""
+        with self._lock:
+            if self._pending.pop(message["id"], None) is None:
+                return
+        self.sent -= 1
+        self.monitor.mark("command.sent", -1)
+
+    def on_ack(self, topic, data):
+        """Subscription callback for ack messages (network thread)."""
+        now = time.perf_counter()
+        if not isinstance(data, dict):
+            return
+        with self._lock:
+            sent_at = self._pending.pop(data.get("id"), None)
+        if sent_at is None:
+            return  # Another dashboard's command, or one already counted as lost
+        self.acked += 1
+        self.monitor.mark("command.acked")
+        self.monitor.record("command.rtt", now - sent_at)
+        if "error" in data:
+            self.rejected += 1
+            return
+        try:
+            in_bridge = float(data["published"]) - float(data["received"])
+        except (KeyError, TypeError, ValueError):
+            return
+        self.monitor.record("command.bridge", in_bridge)
+
+    def expire(self):
+        """Count commands waiting longer than the timeout as lost."""
+        deadline = time.perf_counter() - self.timeout
+        with self._lock:
+            expired = [i for i, sent_at in self._pending.items() if sent_at < deadline]
+            for command_id in expired:
+                del self._pending[command_id]
+        if expired:
+            self.lost += len(expired)
+            self.monitor.mark("command.lost", len(expired))
+
+    def summary(self):
+        """Lifetime round-trip percentiles (ms) and counters."""
+        self.expire()
+        rtt = self.monitor.histogram("command.rtt").summary(recent=False)
+        return {
+            "sent": self.sent,
+            "acked": self.acked,
+            "rejected": self.rejected,
+            "lost": self.lost,
+            "pending": len(self._pending),
+            "p50_ms": rtt["p50_ms"],
+            "p99_ms": rtt["p99_ms"],
+            "max_ms": rtt["max_ms"],
+        }
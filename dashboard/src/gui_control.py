@@ -1,9 +1,14 @@
 import sys
+import os
+import argparse
 import asyncio
+import queue
 import websockets
 import cv2
 import numpy as np
 import json
+import logging
+import math
 import time
 from PySide6.QtWidgets import (
     QApplication,
@@ -15,13 +20,44 @@ from PySide6.QtWidgets import (
     QLabel,
     QFrame,
     QGridLayout,
+    QComboBox,
+    QSlider,
+    QListView,
+    QCheckBox,
 )
-from PySide6.QtGui import QPixmap, QImage
-from PySide6.QtCore import Qt, QThread, Signal, Slot
+from PySide6.QtGui import QPixmap, QImage, QShortcut, QKeySequence
+from PySide6.QtCore import Qt, QThread, QTimer, Signal, Slot
 
 from .radar_widget import RadarWidget
-from .mqtt_client import MQTTClient
+from common.beacon_filter import BeaconFilter
+from common.sar_topics import (
+    ACK,
+    DEFAULT_ROBOT_ID,
+    MOVEMENT,
+    POSITION,
+    SOUND,
+    fleet_topic,
+    legacy_topic,
+    parse_topic,
+    robot_topic,
+)
+from .mqtt_client import MQTTHub
+from .command_tracker import CommandTracker
+from .robot_store import RobotStore
 from .map_widget import MapWidget
+from .camera_websocket.frame_protocol import FrameStats, unpack_frame
+from .camera_websocket.quality import QualityController
+from .mission_recorder import (
+    MissionRecorder,
+    STREAM_AUDIO,
+    STREAM_MQTT,
+    STREAM_VIDEO,
+    unpack_mqtt,
+)
+from .mission_replay import MissionReader, ReplayThread
+from .perf_monitor import PERF
+from .perf_hud import PerfHUD
+from .log_model import LogFileWriter, LogLevelFilter, LogModel
 
 # --- Configuration ---
 # Use the URI from your WSVideoClient script
@@ -29,16 +65,31 @@ WEBSOCKET_VIDEO_URI = "ws://vlg2.local:9002"
 WEBSOCKET_AUDIO_URI = "ws://vlg2.local:8765"
 MQTT_BROKER_HOST = "vlg2.local"  # Update this to your Raspberry Pi's IP
 MQTT_BROKER_PORT = 1883
-MQTT_SOUND_TOPIC = "sar-robot/sound"
-MQTT_MOVEMENT_TOPIC = "sar-robot/movement"
-MQTT_POSITION_TOPIC = "sar-robot/position"
+# Topics are per robot, sar-robot/<robot_id>/<name> (see common/sar_topics.py)
+LEGACY_TOPICS = True  # Also accept un-namespaced sar-robot/<name> topics
+POSITION_SMOOTHING = True  # Kalman-filter beacon positions (common/beacon_filter.py)
 RADAR_RESET_TIMEOUT = 5000  # 5 seconds in milliseconds
+RADAR_SECTIONS = 36  # Angular resolution of the sound radar (up to 360)
+VIDEO_STATS_INTERVAL = 1.0  # seconds between video statistics updates
+VIDEO_ADAPTIVE_QUALITY = True  # Ask the camera to adapt to our decode/link load
+COMMAND_STATS_INTERVAL_MS = 1000  # Refresh of the command round-trip label
+MISSION_RECORDINGS_DIR = "missions"  # Parent directory for mission recordings
+LOG_DIR = "logs"  # Full log history, one file per session
+LOG_LEVELS = [
+    ("All", logging.DEBUG),
+    ("Info", logging.INFO),
+    ("Warnings", logging.WARNING),
+    ("Errors", logging.ERROR),
+]
+EVENT_LOOP_PROBE_MS = 50  # Interval of the Qt event loop lag probe
+REPLAY_SPEEDS = [("0.25x", 0.25), ("0.5x", 0.5), ("1x", 1.0), ("2x", 2.0),
+                 ("4x", 4.0), ("10x", 10.0), ("Max", 0.0)]
 
 class AudioWebSocketClientThread(QThread):
     connection_status = Signal(str)
     log_message = Signal(str)
 
-    def __init__(self, uri, sample_rate=16000, channels=1):
+    def __init__(self, uri, sample_rate=16000, channels=1, replay=False):
         super().__init__()
         self.uri = uri
         self.running = True
@@ -46,9 +97,17 @@ class AudioWebSocketClientThread(QThread):
         self.sample_rate = sample_rate
         self.channels = channels
         self.audio_stream = None
+        self.recorder = None  # Optional MissionRecorder, set by the GUI
+        # In replay mode chunks arrive through this queue instead of the socket
+        self.replay_queue = queue.Queue() if replay else None
+        self._device_rate = sample_rate
+        self._resampy = None
 
     def run(self):
-        asyncio.run(self._run_ws())
+        if self.replay_queue is not None:
+            self._run_replay()
+        else:
+            asyncio.run(self._run_ws())
 
     async def _run_ws(self):
         try:
@@ -58,53 +117,16 @@ class AudioWebSocketClientThread(QThread):
                 self.connection_status.emit("Audio Connected")
                 self.log_message.emit("Audio WebSocket connection established.")
 
-                # Initialize sounddevice for audio output
-                try:
-                    import sounddevice as sd
-
-                    device_info = sd.query_devices(kind='output')
-                    self.log_message.emit(f"Using audio device: {device_info['name']}")
-                    device_rate = int(device_info['default_samplerate'])
-                    self.log_message.emit(f"Default sample rate: {device_rate}")
-
-                    # Create output stream
-                    self.audio_stream = sd.OutputStream(
-                        samplerate=device_rate,
-                        channels=self.channels,
-                        dtype='float32'
-                    )
-                    self.audio_stream.start()
-
-                    import resampy
-                    need_resample = device_rate != self.sample_rate
-
-                except ImportError:
-                    self.log_message.emit("Sounddevice or resampy not installed. Run: pip install sounddevice resampy")
-                    return
-                except Exception as e:
-                    self.log_message.emit(f"Error initializing audio: {e}")
+                if not self._open_output():
                     return
 
                 while self.running:
                     try:
                         data = await ws.recv()
-                        # Process audio data
-                        audio_data = np.frombuffer(data, dtype=np.float32)
-
-                        if need_resample:
-                            audio_data = resampy.resample(
-                                audio_data,
-                                self.sample_rate,
-                                device_rate
-                            )
-
-                        # Play audio
-                        try:
-                            # Write directly to stream for lower latency
-                            self.audio_stream.write(audio_data)
-                        except Exception as e:
-                            self.log_message.emit(f"Error playing audio: {e}")
-
+                        recorder = self.recorder
+                        if recorder is not None:
+                            recorder.record(STREAM_AUDIO, data)
+                        self.process_audio(data)
                     except websockets.ConnectionClosed:
                         self.connection_status.emit("Audio Disconnected")
                         self.log_message.emit("Audio WebSocket connection closed.")
@@ -117,6 +139,79 @@ class AudioWebSocketClientThread(QThread):
         finally:
             self._cleanup_audio()
 
+    def _run_replay(self):
+        self.connection_status.emit("Audio Replay")
+        if not self._open_output():
+            return
+        try:
+            while self.running:
+                try:
+                    data = self.replay_queue.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                try:
+                    self.process_audio(data)
+                except Exception as e:
+                    self.log_message.emit(f"Error processing audio data: {e}")
+        finally:
+            self._cleanup_audio()
+
+    def _open_output(self):
+        """Open the audio output device; returns False if it is unavailable."""
+        try:
+            import sounddevice as sd
+
+            device_info = sd.query_devices(kind='output')
+            self.log_message.emit(f"Using audio device: {device_info['name']}")
+            self._device_rate = int(device_info['default_samplerate'])
+            self.log_message.emit(f"Default sample rate: {self._device_rate}")
+
+            # Create output stream
+            self.audio_stream = sd.OutputStream(
+                samplerate=self._device_rate,
+                channels=self.channels,
+                dtype='float32'
+            )
+            self.audio_stream.start()
+
+            import resampy
+            self._resampy = resampy
+
+        except ImportError:
+            self.log_message.emit("Sounddevice or resampy not installed. Run: pip install sounddevice resampy")
+            return False
+        except Exception as e:
+            self.log_message.emit(f"Error initializing audio: {e}")
+            return False
+        return True
+
+    def process_audio(self, data):
+        """Decode one PCM chunk, resample it if needed and play it."""
+        audio_data = np.frombuffer(data, dtype=np.float32)
+        PERF.mark("audio.chunks")
+
+        if self._device_rate != self.sample_rate:
+            started = time.perf_counter()
+            audio_data = self._resampy.resample(
+                audio_data,
+                self.sample_rate,
+                self._device_rate
+            )
+            PERF.record("audio.resample", time.perf_counter() - started)
+
+        # Play audio
+        try:
+            # Write directly to stream for lower latency
+            started = time.perf_counter()
+            self.audio_stream.write(audio_data)
+            PERF.record("audio.write", time.perf_counter() - started)
+        except Exception as e:
+            self.log_message.emit(f"Error playing audio: {e}")
+
+    def replay_audio(self, payload, t_ns):
+        """Replay sink: queue a recorded chunk for playback on this thread."""
+        self.replay_queue.put(bytes(payload))
+
     def _cleanup_audio(self):
         """Clean up audio resources"""
         if self.audio_stream:
@@ -134,63 +229,170 @@ class AudioWebSocketClientThread(QThread):
 # --- WebSocket Communication Thread ---
 class WebSocketClientThread(QThread):
     connection_status = Signal(str)
-    image_received = Signal(QPixmap)
+    image_received = Signal(QPixmap, float)  # pixmap, perf_counter at emit
     map_data_received = Signal(object)
     log_message = Signal(str)
+    stream_stats = Signal(dict)
 
-    def __init__(self, uri):
+    def __init__(self, uri, adaptive_quality=VIDEO_ADAPTIVE_QUALITY):
         super().__init__()
         self.uri = uri
         self.running = True
         self.websocket = None
+        self.loop = None
+        self.stats = FrameStats()
+        self.quality = QualityController() if adaptive_quality else None
+        self.recorder = None  # Optional MissionRecorder, set by the GUI
+        self.replay_start_time = 0.0  # Wall clock start of a replayed mission
+        self._frames_emitted = 0
+        self._frames_displayed = 0
+        self._reset_interval()
 
     def run(self):
         asyncio.run(self._run_ws())
 
     async def _run_ws(self):
+        self.loop = asyncio.get_running_loop()
         try:
             self.connection_status.emit("Connecting...")
             async with websockets.connect(self.uri, max_size=None) as ws:
                 self.websocket = ws
                 self.connection_status.emit("Connected")
                 self.log_message.emit("WebSocket connection established.")
+                self.stats.reset()
+                self._reset_interval()
+                if self.quality is not None:
+                    await self._send_json(self.quality.request())
+
                 while self.running:
                     try:
                         data = await ws.recv()
-                        np_arr = np.frombuffer(data, np.uint8)
-                        img = cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
-                        if img is not None:
-                            height, width, channel = img.shape
-                            bytes_per_line = 3 * width
-                            q_img = QImage(
-                                img.data,
-                                width,
-                                height,
-                                bytes_per_line,
-                                QImage.Format.Format_BGR888,
-                            )
-                            pixmap = QPixmap.fromImage(q_img)
-                            self.image_received.emit(pixmap)
+                        recorder = self.recorder
+                        if recorder is not None:
+                            recorder.record(STREAM_VIDEO, data)
+                        self.process_frame(data)
+
+                        metrics = self._interval_metrics()
+                        if metrics is not None:
+                            await self._update_quality(metrics)
                     except websockets.ConnectionClosed:
                         self.connection_status.emit("Disconnected")
                         self.log_message.emit("WebSocket connection closed.")
                         break
+                    except ValueError as e:
+                        self.log_message.emit(f"Invalid video frame: {e}")
         except Exception as e:
             self.connection_status.emit("Connection Error")
             self.log_message.emit(f"WebSocket error: {e}")
+        finally:
+            self.websocket = None
+
+    def process_frame(self, data, recv_time=None):
+        """Decode one video message and hand the pixmap to the GUI."""
+        self._interval_bytes += len(data)
+        self._interval_frames += 1
+        # Frames may carry a timing header; raw JPEG is still accepted
+        header, jpeg = unpack_frame(data)
+        self.stats.update(header, time.time() if recv_time is None else recv_time)
+        if header is not None and self.stats.latency_ms >= 0:
+            PERF.record("video.transit", self.stats.latency_ms / 1000.0)
+
+        decode_start = time.perf_counter()
+        np_arr = np.frombuffer(jpeg, np.uint8)
+        img = cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
+        convert_start = time.perf_counter()
+        PERF.record("video.decode", convert_start - decode_start)
+        if img is not None:
+            height, width, channel = img.shape
+            bytes_per_line = 3 * width
+            q_img = QImage(
+                img.data,
+                width,
+                height,
+                bytes_per_line,
+                QImage.Format.Format_BGR888,
+            )
+            pixmap = QPixmap.fromImage(q_img)
+            now = time.perf_counter()
+            PERF.record("video.convert", now - convert_start)
+            self._interval_decode += now - decode_start
+            self._frames_emitted += 1
+            self.image_received.emit(pixmap, now)
+
+    def replay_frame(self, payload, t_ns):
+        """Replay sink: decode a recorded frame as if it had just arrived."""
+        self.process_frame(payload, self.replay_start_time + t_ns / 1e9)
+        metrics = self._interval_metrics()
+        if metrics is not None:
+            self._emit_stats(metrics)
+
+    def _reset_interval(self):
+        self._interval_start = time.monotonic()
+        self._interval_bytes = 0
+        self._interval_frames = 0
+        self._interval_decode = 0.0
+        self._displayed_start = self._frames_displayed
+        self._missing_start = self.stats.missing
+
+    def _interval_metrics(self):
+        """Return link metrics once per VIDEO_STATS_INTERVAL, otherwise None."""
+        elapsed = time.monotonic() - self._interval_start
+        if elapsed < VIDEO_STATS_INTERVAL:
+            return None
+        frames = self._interval_frames
+        metrics = {
+            "recv_fps": frames / elapsed,
+            "display_fps": (self._frames_displayed - self._displayed_start) / elapsed,
+            "bandwidth_kbps": self._interval_bytes * 8 / elapsed / 1000,
+            "decode_ms": self._interval_decode / frames * 1000 if frames else 0.0,
+            "missing": self.stats.missing - self._missing_start,
+        }
+        self._reset_interval()
+        return metrics
+
+    async def _update_quality(self, metrics):
+        """Let the controller adjust quality, then publish link statistics."""
+        if self.quality is not None:
+            request = self.quality.evaluate(metrics)
+            if request is not None:
+                self.log_message.emit(
+                    f"Requesting video {request['width']}x{request['height']} "
+                    f"q{request['jpeg_quality']} @ {request['fps']} fps "
+                    f"({request['reason']})"
+                )
+                await self._send_json(request)
+            metrics["quality_level"] = self.quality.level
+        self._emit_stats(metrics)
 
-    def send_command(self, command):
-        async def _send():
-            try:
-                if self.websocket and self.websocket.open:
-                    msg = {"type": "command", "value": command}
-                    await self.websocket.send(json.dumps(msg))
-                else:
-                    self.log_message.emit("WebSocket not connected.")
-            except Exception as e:
-                self.log_message.emit(f"Error sending command: {e}")
+    def _emit_stats(self, metrics):
+        stats = self.stats.snapshot()
+        stats.update(metrics)
+        self.stream_stats.emit(stats)
+
+    def frame_displayed(self):
+        """Called by the GUI each time a received frame is actually shown."""
+        self._frames_displayed += 1
+
+    def frames_in_flight(self):
+        """Decoded frames queued for the GUI but not displayed yet."""
+        return self._frames_emitted - self._frames_displayed
+
+    async def _send_json(self, msg):
+        try:
+            if self.websocket is not None:
+                await self.websocket.send(json.dumps(msg))
+            else:
+                self.log_message.emit("WebSocket not connected.")
+        except Exception as e:
+            self.log_message.emit(f"Error sending command: {e}")
 
-        asyncio.run(_send())
+    def send_command(self, command):
+        """Send a command over the video WebSocket (safe from any thread)."""
+        msg = {"type": "command", "value": command}
+        if self.loop is None or not self.loop.is_running():
+            self.log_message.emit("WebSocket not connected.")
+            return
+        asyncio.run_coroutine_threadsafe(self._send_json(msg), self.loop)
 
     def stop(self):
         self.running = False
@@ -198,8 +400,18 @@ class WebSocketClientThread(QThread):
 
 # --- Main GUI Window ---
 class RobotControlGUI(QMainWindow):
-    def __init__(self):
+    def __init__(self, record_dir=None, replay_dir=None, replay_speed=1.0,
+                 benchmark=False, mqtt_host=MQTT_BROKER_HOST,
+                 mqtt_port=MQTT_BROKER_PORT):
         super().__init__()
+        self.recorder = None
+        self.replay_thread = None
+        self.benchmark = benchmark
+        self.robots = RobotStore(self)
+        self.selected_robot = None  # First robot heard from is selected
+        # Keyed by (robot ID, beacon ID) so the whole fleet shares one filter
+        self.position_filter = BeaconFilter() if POSITION_SMOOTHING else None
+        live = replay_dir is None
         self.setWindowTitle("Multimodal SAR Robot Control")
         self.setGeometry(100, 100, 800, 600)  # x, y, width, height
 
@@ -211,8 +423,19 @@ class RobotControlGUI(QMainWindow):
         # --- Left Panel: Controls ---
         control_panel = QWidget()
         control_layout = QVBoxLayout(control_panel)
+        self.control_layout = control_layout
         control_panel.setFixedWidth(250)  # Increase width to accommodate buttons better
 
+        # Robot selector (fleet missions)
+        robot_row = QHBoxLayout()
+        robot_row.addWidget(QLabel("Robot:"))
+        self.robot_selector = QComboBox()
+        self.robot_selector.setSizeAdjustPolicy(QComboBox.SizeAdjustPolicy.AdjustToContents)
+        self.robot_selector.currentTextChanged.connect(self._on_robot_selected)
+        robot_row.addWidget(self.robot_selector, stretch=1)
+        control_layout.addLayout(robot_row)
+        self.robots.robot_added.connect(self._on_robot_added)
+
         # Movement Controls Container
         movement_container = QWidget()
         movement_layout = QVBoxLayout(movement_container)
@@ -280,9 +503,21 @@ class RobotControlGUI(QMainWindow):
         # Add the buttons container to the movement layout
         movement_layout.addWidget(buttons_container)
 
+        # Command -> ack round trips through the ROS bridge
+        self.command_stats_label = QLabel("Commands: none sent")
+        self.command_stats_label.setStyleSheet("color: #555; font-size: 10px;")
+        self.command_stats_label.setWordWrap(True)
+        movement_layout.addWidget(self.command_stats_label)
+
         # Add movement container to control layout
         control_layout.addWidget(movement_container)
 
+        # Mission recording toggle
+        self.btn_record = QPushButton("Record Mission")
+        self.btn_record.setCheckable(True)
+        self.btn_record.toggled.connect(self._on_record_toggled)
+        control_layout.addWidget(self.btn_record)
+
         # Add expanding spacer between movement controls and log
         control_layout.addStretch(1)
 
@@ -291,27 +526,46 @@ class RobotControlGUI(QMainWindow):
         log_layout = QVBoxLayout(log_container)
         log_layout.setContentsMargins(0, 0, 0, 0)
 
-        # Log title
+        # Log title and level filter
+        log_header = QHBoxLayout()
         log_title = QLabel("Log:")
         log_title.setAlignment(Qt.AlignmentFlag.AlignLeft)
-        log_layout.addWidget(log_title)
-
-        # Log display
-        self.log_label = QLabel("Log messages will appear here.")
-        self.log_label.setWordWrap(True)
-        self.log_label.setAlignment(Qt.AlignmentFlag.AlignTop)
-        self.log_label.setMinimumHeight(150)  # Set minimum height instead of fixed
-        self.log_label.setStyleSheet(
+        log_header.addWidget(log_title)
+        log_header.addStretch(1)
+        self.log_level_box = QComboBox()
+        for label, level in LOG_LEVELS:
+            self.log_level_box.addItem(label, level)
+        log_header.addWidget(self.log_level_box)
+        log_layout.addLayout(log_header)
+
+        # Log display: ring-buffer model, virtualised view
+        self.log_writer = LogFileWriter(
+            os.path.join(LOG_DIR, time.strftime("dashboard-%Y%m%d-%H%M%S.log"))
+        )
+        self.log_model = LogModel(self, writer=self.log_writer)
+        self.log_filter = LogLevelFilter(self, min_level=LOG_LEVELS[0][1])
+        self.log_filter.setSourceModel(self.log_model)
+        self.log_level_box.currentIndexChanged.connect(
+            lambda i: self.log_filter.set_min_level(self.log_level_box.itemData(i))
+        )
+        self.log_view = QListView()
+        self.log_view.setModel(self.log_filter)
+        self.log_view.setUniformItemSizes(True)
+        self.log_view.setWordWrap(False)
+        self.log_view.setMinimumHeight(150)
+        self.log_view.setStyleSheet(
             """
-            QLabel {
+            QListView {
                 background-color: #f0f0f0;
                 border: 1px solid #ccc;
-                padding: 8px;
+                padding: 4px;
                 border-radius: 4px;
+                font-size: 11px;
             }
             """
         )
-        log_layout.addWidget(self.log_label)
+        self.log_filter.rowsInserted.connect(self._follow_log)
+        log_layout.addWidget(self.log_view)
 
         # Add log container to control layout
         control_layout.addWidget(log_container)
@@ -337,13 +591,30 @@ class RobotControlGUI(QMainWindow):
         self.video_label.setMinimumSize(320, 240)
 
         # Radar Widget
-        self.radar_widget = RadarWidget(reset_timeout=RADAR_RESET_TIMEOUT)
+        self.radar_widget = RadarWidget(
+            reset_timeout=RADAR_RESET_TIMEOUT, num_sections=RADAR_SECTIONS
+        )
         self.radar_widget.section_reset.connect(self._on_radar_section_reset)
         self.radar_widget.setMinimumSize(320, 320)  # Match MapWidget's minimum
 
+        # Video link statistics (latency/jitter/loss from the frame header)
+        self.video_stats_label = QLabel("Video: waiting for frames")
+        self.video_stats_label.setStyleSheet("color: #555; font-size: 10px;")
+
         left_vis_layout.addWidget(QLabel("Camera Feed:"))
         left_vis_layout.addWidget(self.video_label, stretch=1)
-        left_vis_layout.addWidget(QLabel("Human Direction Radar:"))
+        left_vis_layout.addWidget(self.video_stats_label)
+        # Heatmap of detections over the last minutes under the live radar
+        self.sound_history_checkbox = QCheckBox("Show history")
+        self.sound_history_checkbox.setToolTip(
+            "Where voices were heard over the last minutes (rim = now, centre = oldest)"
+        )
+        self.sound_history_checkbox.toggled.connect(self._on_sound_history_toggled)
+        radar_header = QHBoxLayout()
+        radar_header.addWidget(QLabel("Human Direction Radar:"))
+        radar_header.addStretch()
+        radar_header.addWidget(self.sound_history_checkbox)
+        left_vis_layout.addLayout(radar_header)
         left_vis_layout.addWidget(self.radar_widget, stretch=1)
 
         # --- Right Visualization Column (Map) ---
@@ -355,7 +626,15 @@ class RobotControlGUI(QMainWindow):
         self.map_widget = MapWidget()
         # self.map_widget.setMinimumSize(320,320) # Already set in MapWidget constructor
 
-        right_vis_layout.addWidget(QLabel("Position Map:"))
+        # Beacon trajectories; length and fade default to map_widget.TRAIL_SECONDS
+        # and TRAIL_FADE (change with set_trail_length/set_trail_fade)
+        self.trails_checkbox = QCheckBox("Show trails")
+        self.trails_checkbox.toggled.connect(self._on_trails_toggled)
+        map_header = QHBoxLayout()
+        map_header.addWidget(QLabel("Position Map:"))
+        map_header.addStretch()
+        map_header.addWidget(self.trails_checkbox)
+        right_vis_layout.addLayout(map_header)
         right_vis_layout.addWidget(self.map_widget, stretch=1)
 
         # Add columns to the main visualization layout
@@ -382,63 +661,52 @@ class RobotControlGUI(QMainWindow):
         self.ws_client.image_received.connect(self.update_video_feed)
         self.ws_client.map_data_received.connect(self.update_map)  # Connect map signal
         self.ws_client.log_message.connect(self.append_log_message)
-        self.ws_client.start()  # Start the WebSocket thread
+        self.ws_client.stream_stats.connect(self.update_video_stats)
+        if live:
+            self.ws_client.start()  # Start the WebSocket thread
 
         # --- Audio WebSocket Client ---
-        self.audio_client = AudioWebSocketClientThread(WEBSOCKET_AUDIO_URI)
+        self.audio_client = AudioWebSocketClientThread(
+            WEBSOCKET_AUDIO_URI, replay=not live
+        )
         self.audio_client.connection_status.connect(
             lambda status: self.update_status_bar(f"Audio: {status}")
         )
         self.audio_client.log_message.connect(self.append_log_message)
         self.audio_client.start()  # Start the audio WebSocket thread
 
-        # --- MQTT Clients ---
-        # Sound direction MQTT client
-        self.sound_mqtt_client = MQTTClient(
-            broker_host=MQTT_BROKER_HOST,
-            broker_port=MQTT_BROKER_PORT,
-            topic=MQTT_SOUND_TOPIC,
-        )
-        self.sound_mqtt_client.connected.connect(
-            lambda: self.append_log_message("Sound MQTT Connected")
-        )
-        self.sound_mqtt_client.disconnected.connect(
-            lambda: self.append_log_message("Sound MQTT Disconnected")
-        )
-        self.sound_mqtt_client.error_occurred.connect(self.append_log_message)
-        self.sound_mqtt_client.message_received.connect(self._on_mqtt_message)
-        self.sound_mqtt_client.start()
-
-        # Movement MQTT client
-        self.movement_mqtt_client = MQTTClient(
-            broker_host=MQTT_BROKER_HOST,
-            broker_port=MQTT_BROKER_PORT,
-            topic=MQTT_MOVEMENT_TOPIC,
-        )
-        self.movement_mqtt_client.connected.connect(
-            lambda: self.append_log_message("Movement MQTT Connected")
-        )
-        self.movement_mqtt_client.disconnected.connect(
-            lambda: self.append_log_message("Movement MQTT Disconnected")
+        # --- MQTT ---
+        # One broker connection; each widget subscribes to the topics it needs
+        self.mqtt_hub = MQTTHub(broker_host=mqtt_host, broker_port=mqtt_port)
+        self.mqtt_hub.connected.connect(lambda: self.append_log_message("MQTT Connected"))
+        self.mqtt_hub.disconnected.connect(
+            lambda: self.append_log_message("MQTT Disconnected")
         )
-        self.movement_mqtt_client.error_occurred.connect(self.append_log_message)
-        self.movement_mqtt_client.start()
-
-        # Position MQTT client (New)
-        self.position_mqtt_client = MQTTClient(
-            broker_host=MQTT_BROKER_HOST,
-            broker_port=MQTT_BROKER_PORT,
-            topic=MQTT_POSITION_TOPIC,
-        )
-        self.position_mqtt_client.connected.connect(
-            lambda: self.append_log_message("Position MQTT Connected")
-        )
-        self.position_mqtt_client.disconnected.connect(
-            lambda: self.append_log_message("Position MQTT Disconnected")
+        self.mqtt_hub.error_occurred.connect(self.append_log_message)
+        # One wildcard subscription per message type covers the whole fleet.
+        # High-rate topics are delivered in batches at ~30 Hz, keeping only
+        # the latest value per robot and radar section / beacon
+        self.mqtt_subscriptions = []
+        for name, batch_items, handler in [
+            (SOUND, self._sound_batch_items, self._on_sound_batch),
+            (POSITION, self._position_batch_items, self._on_position_batch),
+        ]:
+            filters = [fleet_topic(name)] + ([legacy_topic(name)] if LEGACY_TOPICS else [])
+            for topic_filter in filters:
+                subscription = self.mqtt_hub.subscribe(topic_filter, batch_items=batch_items)
+                subscription.batch_received.connect(handler)
+                self.mqtt_subscriptions.append(subscription)
+        # Acks are matched on the network thread, so the round trip does not
+        # include time spent waiting for the GUI thread
+        self.command_tracker = CommandTracker()
+        self.mqtt_subscriptions.append(
+            self.mqtt_hub.subscribe(fleet_topic(ACK), callback=self.command_tracker.on_ack)
         )
-        self.position_mqtt_client.error_occurred.connect(self.append_log_message)
-        self.position_mqtt_client.message_received.connect(self._on_position_message)
-        self.position_mqtt_client.start()
+        self._command_stats_timer = QTimer(self)
+        self._command_stats_timer.timeout.connect(self.update_command_stats)
+        self._command_stats_timer.start(COMMAND_STATS_INTERVAL_MS)
+        if live:
+            self.mqtt_hub.start()
 
         # --- Connect Button Signals ---
         self.btn_forward.clicked.connect(lambda: self.send_robot_command("forward"))
@@ -454,23 +722,104 @@ class RobotControlGUI(QMainWindow):
         self.btn_right.setShortcut("D")
         self.btn_stop.setShortcut("S")  # Set 'S' for stop
 
+        # --- Performance HUD (F3) ---
+        self.perf_hud = PerfHUD(central_widget)
+        QShortcut(QKeySequence("F3"), self, activated=self.perf_hud.toggle)
+        QShortcut(QKeySequence("Ctrl+Shift+E"), self, activated=self.export_perf_stats)
+        PERF.add_gauge("video_frames", self.ws_client.frames_in_flight)
+        if self.audio_client.replay_queue is not None:
+            PERF.add_gauge("audio_chunks", self.audio_client.replay_queue.qsize)
+        PERF.add_gauge(
+            "recorder_mb",
+            lambda: round(self.recorder.backlog_bytes / 1e6, 1) if self.recorder else 0,
+        )
+
+        # Measures how late timers fire, i.e. how busy the Qt event loop is
+        self._loop_probe = QTimer(self)
+        self._loop_probe.timeout.connect(self._probe_event_loop)
+        self._loop_probe_last = time.perf_counter()
+        self._loop_probe.start(EVENT_LOOP_PROBE_MS)
+
         # Initial log message
         self.append_log_message("GUI Started. Initializing connections...")
 
+        if record_dir is not None:
+            self.start_recording(record_dir)
+        if replay_dir is not None:
+            self._start_replay(replay_dir, replay_speed)
+
     # --- Slot Methods (GUI Updates) ---
     @Slot(str)
     def update_status_bar(self, message):
         self.status_bar.showMessage(f"Status: {message}")
 
-    @Slot(QPixmap)
-    def update_video_feed(self, pixmap):
+    @Slot(QPixmap, float)
+    def update_video_feed(self, pixmap, emitted_at):
+        started = time.perf_counter()
+        PERF.record("video.qt_queue", started - emitted_at)
         # Scale pixmap to fit the label while maintaining aspect ratio
         scaled_pixmap = pixmap.scaled(
             self.video_label.size(),
             Qt.AspectRatioMode.KeepAspectRatio,
             Qt.TransformationMode.SmoothTransformation,
         )
+        scaled_at = time.perf_counter()
+        PERF.record("video.scale", scaled_at - started)
         self.video_label.setPixmap(scaled_pixmap)
+        PERF.record("video.set_pixmap", time.perf_counter() - scaled_at)
+        PERF.mark("video.display")
+        self.ws_client.frame_displayed()
+
+    @Slot()
+    def _probe_event_loop(self):
+        now = time.perf_counter()
+        lag = now - self._loop_probe_last - EVENT_LOOP_PROBE_MS / 1000.0
+        PERF.record("qt.loop_lag", max(lag, 0.0))
+        self._loop_probe_last = now
+
+    @Slot()
+    def export_perf_stats(self):
+        """Write the performance histograms to perf-<time>.json/.csv."""
+        base = time.strftime("perf-%Y%m%d-%H%M%S")
+        try:
+            PERF.export_json(base + ".json")
+            PERF.export_csv(base + ".csv")
+            self.append_log_message(f"Performance stats exported to {base}.json/.csv")
+        except OSError as e:
+            self.append_log_message(f"Cannot export performance stats: {e}")
+
+    @Slot()
+    def update_command_stats(self):
+        stats = self.command_tracker.summary()
+        if not stats["sent"]:
+            return
+        text = f"Commands: {stats['sent']} sent, {stats['acked']} acked"
+        if stats["lost"]:
+            text += f", {stats['lost']} lost"
+        if stats["rejected"]:
+            text += f", {stats['rejected']} rejected"
+        if stats["acked"]:
+            text += (
+                f" | round trip p50 {stats['p50_ms']:.0f} ms, "
+                f"p99 {stats['p99_ms']:.0f} ms, max {stats['max_ms']:.0f} ms"
+            )
+        self.command_stats_label.setText(text)
+
+    @Slot(dict)
+    def update_video_stats(self, stats):
+        rates = (
+            f"{stats['recv_fps']:.0f} fps, {stats['bandwidth_kbps']:.0f} kbps, "
+            f"decode {stats['decode_ms']:.1f} ms"
+        )
+        if not stats["framed"]:
+            self.video_stats_label.setText(f"Video: raw JPEG (no timing header) | {rates}")
+            return
+        self.video_stats_label.setText(
+            f"Video: {stats['width']}x{stats['height']} | "
+            f"latency {stats['avg_latency_ms']:.0f} ms | "
+            f"jitter {stats['jitter_ms']:.1f} ms | "
+            f"missing {stats['missing']} frames | {rates}"
+        )
 
     @Slot(object)
     def update_map(self, data):
@@ -483,35 +832,78 @@ class RobotControlGUI(QMainWindow):
         # Later: Use QGraphicsScene/QGraphicsView to draw points, lines, etc. based on 'data'
 
     @Slot(str)
-    def append_log_message(self, message):
-        current_text = self.log_label.text()
-        # Keep log reasonably short (e.g., last 10 lines)
-        lines = current_text.split("\n")
-        if "Log messages will appear here." in lines[0]:
-            lines = []  # Clear initial message
-        lines.append(message)
-        max_lines = 10
-        if len(lines) > max_lines:
-            lines = lines[-max_lines:]
-        self.log_label.setText("\n".join(lines))
-        print(f"LOG: {message}")  # Also print to console for debugging
-
-    @Slot(dict)
-    def _on_mqtt_message(self, data):
-        """Handle incoming MQTT messages."""
-        try:
-            position = data.get("position")
-            confidence = data.get("human_confidence")
+    def append_log_message(self, message, level=None):
+        """Queue a log line; level is guessed from the text when not given."""
+        started = time.perf_counter()
+        self.log_model.append(message, level)
+        PERF.record("gui.log", time.perf_counter() - started)
+
+    def _follow_log(self, parent, first, last):
+        # Keep scrolling with new messages unless the user scrolled up
+        scrollbar = self.log_view.verticalScrollBar()
+        if scrollbar.value() >= scrollbar.maximum():
+            QTimer.singleShot(0, self.log_view.scrollToBottom)
+
+    def _sound_batch_items(self, topic, data):
+        """Batch key for sound messages: (robot, radar section) (network thread)."""
+        robot_id = parse_topic(topic)[0]
+        items = []
+        # Binary payloads may carry several detections in "events"
+        for event in data.get("events", [data]) if isinstance(data, dict) else [data]:
+            try:
+                section = self.radar_widget.section_index(event["position"])
+            except (KeyError, TypeError, ValueError):
+                section = None  # Reported as invalid in the batch
+            items.append(((robot_id, section), event))
+        return items
+
+    @Slot(list)
+    def _on_sound_batch(self, items):
+        """Store the latest sound detection per robot and radar section."""
+        started = time.perf_counter()
+        latest = None
+        updated = 0
+        history = {}  # robot ID -> ([positions], [confidences])
+        for (robot_id, section), data in items:
+            try:
+                position = data.get("position")
+                confidence = data.get("human_confidence")
 
-            if position is not None and confidence is not None:
-                self.radar_widget.update_section(position, confidence)
-                self.append_log_message(
-                    f"Sound detected at {position}° with confidence {confidence:.2f}"
-                )
-            else:
-                self.append_log_message("Invalid data format received")
-        except Exception as e:
-            self.append_log_message(f"Error processing MQTT message: {str(e)}")
+                if position is not None and confidence is not None:
+                    try:
+                        position, confidence = float(position), float(confidence)
+                    except (TypeError, ValueError):
+                        position = confidence = math.nan
+                    # json.loads accepts NaN/Infinity, the binary codec carries NaN
+                    if not (math.isfinite(position) and math.isfinite(confidence)):
+                        if robot_id == self.selected_robot:
+                            self.append_log_message(
+                                f"Invalid sound values: position={data.get('position')}, "
+                                f"confidence={data.get('human_confidence')}"
+                            )
+                        continue
+                    self.robots.update_sound(robot_id, section, position, confidence)
+                    positions, confidences = history.setdefault(robot_id, ([], []))
+                    positions.append(position)
+                    confidences.append(confidence)
+                    if robot_id == self.selected_robot:
+                        self.radar_widget.update_section(position, confidence)
+                        latest = (position, confidence)
+                        updated += 1
+                elif robot_id == self.selected_robot:
+                    self.append_log_message("Invalid data format received")
+            except Exception as e:
+                self.append_log_message(f"Error processing MQTT message: {str(e)}")
+        # One vectorised history update per robot and batch
+        for robot_id, (positions, confidences) in history.items():
+            self.robots.add_sound_history(robot_id, positions, confidences)
+        if latest is not None:
+            more = f" (+{updated - 1} more sections)" if updated > 1 else ""
+            self.append_log_message(
+                f"Sound detected at {latest[0]}° with confidence {latest[1]:.2f}{more}",
+                logging.DEBUG,
+            )
+        PERF.record("mqtt.sound_slot", time.perf_counter() - started)
 
     @Slot(int)
     def _on_radar_section_reset(self, section_idx):
@@ -519,92 +911,366 @@ class RobotControlGUI(QMainWindow):
         # Calculate angle based on the radar widget's current configuration
         if self.radar_widget.num_sections > 0:
             angle = section_idx * self.radar_widget.section_angle
-            self.append_log_message(f"Radar section at ~{angle:.0f}° reset")
+            self.append_log_message(f"Radar section at ~{angle:.0f}° reset", logging.DEBUG)
         else:
             self.append_log_message(
                 f"Radar section {section_idx} reset (angle calculation error)"
             )
 
-    @Slot(dict)
-    def _on_position_message(self, data):
-        """Handle incoming MQTT position messages for beacons."""
-        try:
-            if not isinstance(data, dict):
+    @staticmethod
+    def _position_batch_items(topic, data):
+        """Split a position message into one (robot, beacon) entry per beacon."""
+        robot_id = parse_topic(topic)[0]
+        if isinstance(data, dict):
+            return [((robot_id, beacon_id), coords) for beacon_id, coords in data.items()]
+        return [((robot_id, None), data)]
+
+    @Slot(list)
+    def _on_position_batch(self, items):
+        """Store the latest position of every beacon in the batch."""
+        started = time.perf_counter()
+        keys = []
+        measured = []
+        for (robot_id, beacon_id), coords in items:
+            if beacon_id is None:
                 self.append_log_message(
-                    f"Invalid position data type: expected dict, got {type(data)}"
+                    f"Invalid position data type: expected dict, got {type(coords)}"
                 )
-                return
-
-            for beacon_id, coords in data.items():
-                if isinstance(coords, dict):
-                    x = coords.get("x")
-                    y = coords.get("y")
-
-                    if x is not None and y is not None:
-                        try:
-                            pos_x = float(x)
-                            pos_y = float(y)
-                            self.map_widget.update_beacon_position(
-                                beacon_id, pos_x, pos_y
-                            )
-                            self.append_log_message(
-                                f"Updated {beacon_id} position: ({pos_x:.2f}, {pos_y:.2f})"
-                            )
-                        except ValueError:
-                            self.append_log_message(
-                                f"Invalid coordinate values for {beacon_id}: x={x}, y={y}"
-                            )
+            elif isinstance(coords, dict):
+                x = coords.get("x")
+                y = coords.get("y")
+
+                if x is not None and y is not None:
+                    try:
+                        x_value, y_value = float(x), float(y)
+                    except (TypeError, ValueError):
+                        x_value = y_value = math.nan
+                    # json.loads accepts NaN/Infinity, the binary codec carries NaN
+                    if math.isfinite(x_value) and math.isfinite(y_value):
+                        measured.append((x_value, y_value))
+                        keys.append((robot_id, beacon_id))
                     else:
                         self.append_log_message(
-                            f"Missing x or y for {beacon_id} in data: {coords}"
+                            f"Invalid coordinate values for {beacon_id}: x={x}, y={y}"
                         )
                 else:
                     self.append_log_message(
-                        f"Invalid coordinate structure for {beacon_id}: {coords}"
+                        f"Missing x or y for {beacon_id} in data: {coords}"
                     )
-
-        except Exception as e:
+            else:
+                self.append_log_message(
+                    f"Invalid coordinate structure for {beacon_id}: {coords}"
+                )
+        if keys:
+            self._apply_positions(keys, measured)
+        PERF.record("mqtt.position_slot", time.perf_counter() - started)
+
+    def _apply_positions(self, keys, measured):
+        """Smooth, store and draw (robot, beacon) -> (x, y) measurements."""
+        # Batch keys are unique, so the whole batch is smoothed in one step
+        if self.position_filter is not None:
+            positions = self.position_filter.update(keys, measured).tolist()
+        else:
+            positions = measured
+        updated = []
+        moved = []  # (beacon_id, x, y) of the selected robot, drawn in one go
+        for (robot_id, beacon_id), (pos_x, pos_y) in zip(keys, positions):
+            self.robots.update_beacon(robot_id, beacon_id, pos_x, pos_y)
+            if robot_id == self.selected_robot:
+                moved.append((beacon_id, pos_x, pos_y))
+                updated.append(f"{beacon_id} ({pos_x:.2f}, {pos_y:.2f})")
+        if moved:
+            self.map_widget.update_beacon_positions(moved)
+        if updated:
             self.append_log_message(
-                f"Error processing position message: {str(e)} - Data: {data}"
+                f"Updated positions: {', '.join(updated)}", logging.DEBUG
             )
 
+    # --- Fleet ---
+    @Slot(str)
+    def _on_robot_added(self, robot_id):
+        self.robot_selector.addItem(robot_id)  # Selects it if it is the first
+        self.update_status_bar(f"{len(self.robots)} robot(s) online")
+
+    @Slot(str)
+    def _on_robot_selected(self, robot_id):
+        """Redraw the radar and map from the stored state of another robot."""
+        if not robot_id or robot_id == self.selected_robot:
+            return
+        self.selected_robot = robot_id
+        state = self.robots.get(robot_id)
+        self.map_widget.clear_beacons()
+        if self.trails_checkbox.isChecked():
+            self.map_widget.set_trails(state.trails)
+        self.map_widget.update_beacon_positions(
+            [(beacon_id, x, y) for beacon_id, (x, y) in state.beacons.items()]
+        )
+        self.radar_widget.clear()
+        if self.sound_history_checkbox.isChecked():
+            self.radar_widget.set_history(state.history)
+        for position, confidence in self.robots.active_sound(
+            robot_id, self.radar_widget.reset_timeout / 1000.0
+        ):
+            self.radar_widget.update_section(position, confidence)
+        self.append_log_message(f"Showing robot {robot_id}")
+
+    @Slot(bool)
+    def _on_sound_history_toggled(self, checked):
+        # With no robot yet, _on_robot_selected attaches the history later
+        history = None
+        if checked and self.selected_robot in self.robots:
+            history = self.robots.get(self.selected_robot).history
+        self.radar_widget.set_history(history)
+
+    @Slot(bool)
+    def _on_trails_toggled(self, checked):
+        trails = None
+        if checked and self.selected_robot in self.robots:
+            trails = self.robots.get(self.selected_robot).trails
+        self.map_widget.set_trails(trails)
+
     # --- Action Methods ---
     def send_robot_command(self, command):
-        """Send movement command via MQTT."""
+        """Send movement command via MQTT; the bridge acks it by ID."""
         try:
-            message = {"command": command, "timestamp": time.time()}
-            success = self.movement_mqtt_client.publish(
-                MQTT_MOVEMENT_TOPIC, json.dumps(message)
-            )
+            robot_id = self.selected_robot or DEFAULT_ROBOT_ID
+            topic = robot_topic(robot_id, MOVEMENT)
+            message = self.command_tracker.stamp(command)
+            success = self.mqtt_hub.publish(topic, json.dumps(message))
             if success:
                 self.append_log_message(f"Sent movement command: {command}")
+            else:
+                self.command_tracker.discard(message)
         except Exception as e:
             self.append_log_message(f"Error sending movement command: {str(e)}")
 
+    # --- Mission Replay ---
+    def _start_replay(self, directory, speed):
+        """Feed a recorded mission through the live decode and widget paths."""
+        try:
+            reader = MissionReader(directory)
+        except (OSError, ValueError) as e:
+            self.append_log_message(f"Cannot open recording {directory}: {e}")
+            return
+        self.replay_reader = reader
+        self.ws_client.replay_start_time = reader.start_time
+
+        for btn in [
+            self.btn_forward,
+            self.btn_left,
+            self.btn_stop,
+            self.btn_right,
+            self.btn_backward,
+            self.btn_record,
+        ]:
+            btn.setEnabled(False)
+
+        self.replay_thread = ReplayThread(
+            reader,
+            {
+                STREAM_VIDEO: self.ws_client.replay_frame,
+                STREAM_AUDIO: self.audio_client.replay_audio,
+                STREAM_MQTT: self._replay_mqtt,
+            },
+            speed=speed,
+            frames_in_flight=self.ws_client.frames_in_flight,
+            stop_at_end=self.benchmark,
+        )
+        self.replay_thread.position_changed.connect(self._on_replay_position)
+        self.replay_thread.replay_finished.connect(self._on_replay_finished)
+        self.replay_thread.log_message.connect(self.append_log_message)
+        self._build_replay_controls(reader.duration, speed)
+        self.update_status_bar(f"Replaying {directory}")
+        self.append_log_message(
+            f"Replaying {directory} ({reader.duration:.1f} s) at "
+            f"{'max speed' if speed == 0 else f'{speed:g}x'}"
+        )
+        self.replay_thread.start()
+
+    def _build_replay_controls(self, duration, speed):
+        container = QWidget()
+        layout = QVBoxLayout(container)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(QLabel("Replay:"))
+
+        self.replay_slider = QSlider(Qt.Orientation.Horizontal)
+        self.replay_slider.setRange(0, int(duration * 10))  # 0.1 s steps
+        self.replay_slider.sliderReleased.connect(
+            lambda: self.replay_thread.seek(self.replay_slider.value() / 10.0)
+        )
+        layout.addWidget(self.replay_slider)
+
+        row = QHBoxLayout()
+        self.btn_replay_pause = QPushButton("Pause")
+        self.btn_replay_pause.clicked.connect(self._toggle_replay_pause)
+        row.addWidget(self.btn_replay_pause)
+
+        self.replay_speed_box = QComboBox()
+        for label, value in REPLAY_SPEEDS:
+            self.replay_speed_box.addItem(label, value)
+        index = self.replay_speed_box.findData(speed)
+        if index < 0:
+            self.replay_speed_box.addItem(f"{speed:g}x", speed)
+            index = self.replay_speed_box.count() - 1
+        self.replay_speed_box.setCurrentIndex(index)
+        self.replay_speed_box.currentIndexChanged.connect(
+            lambda i: self.replay_thread.set_speed(self.replay_speed_box.itemData(i))
+        )
+        row.addWidget(self.replay_speed_box)
+
+        self.replay_time_label = QLabel(f"0.0 / {duration:.1f} s")
+        row.addWidget(self.replay_time_label)
+        layout.addLayout(row)
+
+        self.control_layout.insertWidget(2, container)  # Below the movement controls
+
+    def _replay_mqtt(self, payload, t_ns):
+        self.mqtt_hub.dispatch(*unpack_mqtt(payload))
+
+    @Slot()
+    def _toggle_replay_pause(self):
+        if self.replay_thread.paused:
+            self.replay_thread.resume()
+            self.btn_replay_pause.setText("Pause")
+        else:
+            self.replay_thread.pause()
+            self.btn_replay_pause.setText("Play")
+
+    @Slot(float)
+    def _on_replay_position(self, seconds):
+        if not self.replay_slider.isSliderDown():
+            self.replay_slider.setValue(int(seconds * 10))
+        self.replay_time_label.setText(
+            f"{seconds:.1f} / {self.replay_reader.duration:.1f} s"
+        )
+
+    @Slot(dict)
+    def _on_replay_finished(self, stats):
+        self.btn_replay_pause.setText("Play")
+        summary = (
+            f"Replay finished: {stats['records']} records in {stats['elapsed']:.2f} s "
+            f"({stats['records_per_s']:.0f} rec/s, {stats['mb_per_s']:.1f} MB/s, "
+            f"video {stats['video_per_s']:.1f} fps, mqtt {stats['mqtt_per_s']:.0f} msg/s)"
+        )
+        self.append_log_message(summary)
+        if self.benchmark:
+            print(json.dumps(stats, indent=2))
+            print(json.dumps(PERF.snapshot(recent=False)["stages"], indent=2))
+            self.close()
+
+    # --- Mission Recording ---
+    def _recording_sources(self):
+        return [self.ws_client, self.audio_client, self.mqtt_hub]
+
+    def start_recording(self, directory=None):
+        """Start recording every received payload to a mission directory."""
+        if self.recorder is not None:
+            return
+        if directory is None:
+            directory = os.path.join(
+                MISSION_RECORDINGS_DIR, time.strftime("mission-%Y%m%d-%H%M%S")
+            )
+        try:
+            recorder = MissionRecorder(directory)
+            recorder.start()
+        except OSError as e:
+            self.append_log_message(f"Cannot start recording: {e}")
+            self.btn_record.setChecked(False)
+            return
+        self.recorder = recorder
+        for source in self._recording_sources():
+            source.recorder = recorder
+        self.btn_record.blockSignals(True)
+        self.btn_record.setChecked(True)
+        self.btn_record.blockSignals(False)
+        self.btn_record.setText("Stop Recording")
+        self.append_log_message(f"Recording mission to {directory}")
+
+    def stop_recording(self):
+        if self.recorder is None:
+            return
+        for source in self._recording_sources():
+            source.recorder = None
+        recorder = self.recorder
+        self.recorder = None
+        recorder.stop()
+        self.btn_record.setText("Record Mission")
+        self.append_log_message(
+            f"Recording stopped: {recorder.records} records, "
+            f"{recorder.bytes_written / 1e6:.1f} MB, {recorder.dropped} dropped"
+        )
+
+    @Slot(bool)
+    def _on_record_toggled(self, checked):
+        if checked:
+            self.start_recording()
+        else:
+            self.stop_recording()
+
     def closeEvent(self, event):
         """Ensure all threads are stopped gracefully on GUI close."""
         self.append_log_message("GUI closing...")
+        self.stop_recording()
+        if self.replay_thread is not None:
+            self.replay_thread.stop()
+            self.replay_thread.wait(5000)
         self.ws_client.stop()
-        self.sound_mqtt_client.stop()
-        self.movement_mqtt_client.stop()
-        self.position_mqtt_client.stop()
+        self.mqtt_hub.stop()
         self.audio_client.stop()
 
         self.ws_client.wait(5000)
-        self.sound_mqtt_client.wait(5000)
-        self.movement_mqtt_client.wait(5000)
-        self.position_mqtt_client.wait(5000)
+        self.mqtt_hub.wait(5000)
         self.audio_client.wait(5000)
+        self.log_writer.close()
         super().closeEvent(event)
 
 
 # --- Main Execution ---
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
+    parser = argparse.ArgumentParser(description="SAR robot dashboard")
+    parser.add_argument(
+        "--record",
+        metavar="DIR",
+        help="Record the mission (video, audio, MQTT) to DIR from startup",
+    )
+    parser.add_argument(
+        "--replay",
+        metavar="DIR",
+        help="Replay a recorded mission instead of connecting to the robot",
+    )
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help="Replay speed multiplier, 0 = as fast as possible (default 1)",
+    )
+    parser.add_argument(
+        "--benchmark",
+        action="store_true",
+        help="With --replay: exit at the end and print pipeline throughput",
+    )
+    parser.add_argument(
+        "--mqtt-host",
+        default=MQTT_BROKER_HOST,
+        help=f"MQTT broker host (default {MQTT_BROKER_HOST})",
+    )
+    parser.add_argument(
+        "--mqtt-port", type=int, default=MQTT_BROKER_PORT, help="MQTT broker port"
+    )
+    args, qt_args = parser.parse_known_args()
+
+    app = QApplication(sys.argv[:1] + qt_args)
     # Set a font if desired
     # font = QFont("Segoe UI", 10)
     # app.setFont(font)
 
-    window = RobotControlGUI()
+    window = RobotControlGUI(
+        record_dir=args.record,
+        replay_dir=args.replay,
+        replay_speed=args.speed,
+        benchmark=args.benchmark,
+        mqtt_host=args.mqtt_host,
+        mqtt_port=args.mqtt_port,
+    )
     window.show()
     sys.exit(app.exec())
@@ -0,0 +1,251 @@
+"""
+Dashboard log: fixed-capacity ring buffer behind a virtualised list view.
+
+LogModel.append() only queues the message; a ~30 Hz timer inserts
+everything queued since the last tick with one beginInsertRows() call and
+drops the oldest rows once LOG_CAPACITY is reached, so the view repaints at
+most once per tick however many messages arrive. Consecutive identical
+messages are collapsed into one row with a repeat count, and a message
+repeated more than RATE_LIMIT_COUNT times within RATE_LIMIT_WINDOW seconds
+is suppressed (with a summary row) until the window ends.
+
+Every message, including collapsed and suppressed ones, is also handed to
+LogFileWriter, which writes the full history to disk on its own thread.
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+
+from PySide6.QtCore import (
+    QAbstractListModel,
+    QModelIndex,
+    QSortFilterProxyModel,
+    Qt,
+    QTimer,
+)
+from PySide6.QtGui import QColor
+
+LOG_CAPACITY = 5000  # rows kept in the view
+LOG_FLUSH_MS = 33
+RATE_LIMIT_WINDOW = 1.0  # seconds
+RATE_LIMIT_COUNT = 5  # identical messages allowed per window
+RATE_LIMIT_MAX_KEYS = 1000  # distinct messages tracked for rate limiting
+FILE_FLUSH_INTERVAL = 1.0  # seconds
+
+LEVEL_COLORS = {
+    logging.DEBUG: QColor(120, 120, 120),
+    logging.WARNING: QColor(170, 100, 0),
+    logging.ERROR: QColor(190, 0, 0),
+}
+
+
+def guess_level(message):
+    """Level for messages from sources that only emit text."""
+    lowered = message.lower()
+    if "error" in lowered or "failed" in lowered:
+        return logging.ERROR
+    if "invalid" in lowered or "cannot" in lowered or "unexpected" in lowered:
+        return logging.WARNING
+    return logging.INFO
+
+
+class LogFileWriter:
+    """Appends log lines to a file (and optionally stdout) on a daemon thread."""
+
+    def __init__(self, path, echo_level=logging.INFO):
+        self.path = path
+        self.echo_level = echo_level
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="LogFileWriter", daemon=True)
+        self._thread.start()
+
+    def write(self, timestamp, level, message):
+        self._queue.put((timestamp, level, message))
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join(5.0)
+
+    def _run(self):
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            f = open(self.path, "a", encoding="utf-8")
+        except OSError as e:
+            print(f"Cannot open log file {self.path}: {e}")
+            f = None
+        last_flush = time.monotonic()
+        while True:
+            try:
+                item = self._queue.get(timeout=FILE_FLUSH_INTERVAL)
+            except queue.Empty:
+                item = ()
+            if item is None:
+                break
+            if item:
+                timestamp, level, message = item
+                line = f"{_format_time(timestamp)} {logging.getLevelName(level):<7} {message}"
+                if f is not None:
+                    f.write(line + "\n")
+                if level >= self.echo_level:
+                    print(f"LOG: {message}")
+            if f is not None and time.monotonic() - last_flush >= FILE_FLUSH_INTERVAL:
+                f.flush()
+                last_flush = time.monotonic()
+        if f is not None:
+            f.close()
+
+
+class LogModel(QAbstractListModel):
+    """Ring buffer of [timestamp, level, message, repeats] rows (GUI thread only)."""
+
+    def __init__(self, parent=None, capacity=LOG_CAPACITY, writer=None):
+        super().__init__(parent)
+        self.capacity = capacity
+        self.writer = writer
+        self._rows = [None] * capacity
+        self._start = 0
+        self._count = 0
+        self._pending = []
+        self._changed_last = False  # last visible row got another repeat
+        self._rate = {}  # message -> [window start, count, suppressed, level]
+        self._suppressing = set()  # messages with suppressed repeats pending a summary
+        self.suppressed = 0
+        self._timer = QTimer(self)
+        self._timer.setInterval(LOG_FLUSH_MS)
+        self._timer.timeout.connect(self.flush)
+        self._timer.start()
+
+    # --- Appending ---
+    def append(self, message, level=None):
+        now = time.time()
+        if level is None:
+            level = guess_level(message)
+        if self.writer is not None:
+            self.writer.write(now, level, message)
+
+        limit = self._rate.get(message)
+        if limit is None or now - limit[0] >= RATE_LIMIT_WINDOW:
+            if limit is not None and limit[2]:
+                self._summarize(message, limit)
+            if len(self._rate) >= RATE_LIMIT_MAX_KEYS:
+                self._expire_suppressed(float("inf"))
+                self._rate.clear()  # Bound memory with many distinct messages
+            self._rate[message] = [now, 1, 0, level]
+        else:
+            limit[1] += 1
+            if limit[1] > RATE_LIMIT_COUNT:
+                limit[2] += 1
+                self.suppressed += 1
+                self._suppressing.add(message)
+                return
+        self._queue_row(now, level, message)
+
+    def _summarize(self, message, limit):
+        self._queue_row(time.time(), limit[3], f"Suppressed {limit[2]} repeats of: {message}")
+        limit[2] = 0
+        self._suppressing.discard(message)
+
+    def _expire_suppressed(self, now):
+        """Add summary rows for rate-limited messages whose window has ended."""
+        for message in list(self._suppressing):
+            limit = self._rate[message]
+            if now - limit[0] >= RATE_LIMIT_WINDOW:
+                self._summarize(message, limit)
+
+    def _queue_row(self, now, level, message):
+        last = self._pending[-1] if self._pending else self._last_row()
+        if last is not None and last[2] == message and last[1] == level:
+            last[0] = now
+            last[3] += 1
+            if not self._pending:
+                self._changed_last = True
+            return
+        self._pending.append([now, level, message, 1])
+
+    def _last_row(self):
+        if self._count == 0:
+            return None
+        return self._rows[(self._start + self._count - 1) % self.capacity]
+
+    def flush(self):
+        """Insert queued rows in one batch (timer driven)."""
+        if self._suppressing:
+            self._expire_suppressed(time.time())
+        if self._changed_last and self._count:
+            row = self._count - 1
+            self.dataChanged.emit(self.index(row), self.index(row))
+        self._changed_last = False
+        if not self._pending:
+            return
+        pending = self._pending[-self.capacity :]
+        self._pending = []
+
+        overflow = self._count + len(pending) - self.capacity
+        if overflow > 0:
+            self.beginRemoveRows(QModelIndex(), 0, overflow - 1)
+            self._start = (self._start + overflow) % self.capacity
+            self._count -= overflow
+            self.endRemoveRows()
+
+        first = self._count
+        self.beginInsertRows(QModelIndex(), first, first + len(pending) - 1)
+        for entry in pending:
+            self._rows[(self._start + self._count) % self.capacity] = entry
+            self._count += 1
+        self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self._rows = [None] * self.capacity
+        self._start = 0
+        self._count = 0
+        self._pending = []
+        self.endResetModel()
+
+    # --- Model interface ---
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._count
+
+    def entry(self, row):
+        return self._rows[(self._start + row) % self.capacity]
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= self._count:
+            return None
+        timestamp, level, message, repeats = self.entry(index.row())
+        if role == Qt.ItemDataRole.DisplayRole:
+            text = f"{_format_time(timestamp)[11:]} {message}"
+            return f"{text} (x{repeats})" if repeats > 1 else text
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return message
+        if role == Qt.ItemDataRole.ForegroundRole:
+            return LEVEL_COLORS.get(level)
+        if role == Qt.ItemDataRole.UserRole:
+            return level
+        return None
+
+
+class LogLevelFilter(QSortFilterProxyModel):
+    """Hides rows below a minimum level."""
+
+    def __init__(self, parent=None, min_level=logging.INFO):
+        super().__init__(parent)
+        self.min_level = min_level
+
+    def set_min_level(self, level):
+        self.min_level = level
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        return self.sourceModel().entry(source_row)[1] >= self.min_level
+
+
+def _format_time(timestamp):
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp)) + (
+        f".{int(timestamp * 1000) % 1000:03d}"
+    )
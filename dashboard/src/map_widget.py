@@ -1,6 +1,30 @@
-from PySide6.QtWidgets import QWidget, QSizePolicy
-from PySide6.QtCore import Qt, QPointF
-from PySide6.QtGui import QPainter, QColor, QPen, QBrush, QFont
+from PySide6.QtWidgets import QWidget, QSizePolicy, QToolTip
+from PySide6.QtCore import Qt, QPointF, QRect, QRectF, QTimer
+from PySide6.QtGui import QPainter, QColor, QPen, QFont, QImage, QPixmap, QPolygonF
+import time
+
+import numpy as np
+
+from .beacon_store import BeaconStore
+from .trails import TRAIL_MAX_POINTS, ScreenTrail, lttb
+
+POINT_RADIUS = 5
+HOVER_RADIUS = 8  # pixels
+# Above this many visible beacons, stamp small squares into an image with
+# NumPy instead of drawing antialiased dots (which cost ~6 us each)
+DETAILED_POINTS_LIMIT = 1000
+DENSE_POINT_SIZE = 5  # pixels
+# max_coord = extent * SCALE_HEADROOM; it grows with some slack and shrinks
+# only once beacons use less than SCALE_SHRINK of it, so moving beacons
+# rarely force a full repaint
+SCALE_HEADROOM = 1.1
+SCALE_GROWTH = 1.25
+SCALE_SHRINK = 0.5
+MIN_MAX_COORD = 10.0
+TRAIL_SECONDS = 120.0  # default length of beacon trails
+TRAIL_FADE = 0.15  # opacity of the oldest end of a trail (1.0 = no fade)
+TRAIL_FADE_STEPS = 8  # a faded trail is drawn as this many polylines
+TRAIL_REFRESH_MS = 1000  # full repaint so trail tails expire and re-fade
 
 
 class MapWidget(QWidget):
@@ -9,8 +33,7 @@ class MapWidget(QWidget):
         self.setMinimumSize(300, 300)  # Minimum size, actual size will be constrained
         self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
 
-        self.beacon_positions = {}  # Stores {beacon_id: QPointF}
-        self.beacon_colors = {}
+        self.beacons = BeaconStore()
         self._default_colors = [
             Qt.GlobalColor.red,
             Qt.GlobalColor.blue,
@@ -20,68 +43,253 @@ class MapWidget(QWidget):
             QColor("#FFA500"),  # Orange
             QColor("#800080"),  # Purple
         ]
-        self._color_index = 0
+        self._hovered = None  # beacon ID under the mouse
+        self._dense_buffer = None  # ARGB pixels for the many-beacons path
 
         self.padding = 30
         self.axis_color = Qt.GlobalColor.black
         self.grid_color = QColor(220, 220, 220)
         self.max_coord = 100  # Default max coordinate for scaling, updated dynamically
 
+        # Grid, axes and labels are rendered once per widget size
+        self._background = None
+        self.setMouseTracking(True)  # Hover tooltips
+
+        # Optional TrailHistory drawn under the beacons
+        self._trails = None
+        self.trail_seconds = TRAIL_SECONDS
+        self.trail_fade = TRAIL_FADE
+        self._screen_trails = {}  # beacon ID -> ScreenTrail
+        self._trail_cache = {}  # beacon ID -> (key, bounding QRectF, [(QColor, QPolygonF)])
+        self._trail_epoch = 0
+        self._trail_timer = QTimer(self)
+        self._trail_timer.setInterval(TRAIL_REFRESH_MS)
+        self._trail_timer.timeout.connect(self._refresh_trails)
+
     def _get_beacon_color(self, beacon_id):
-        if beacon_id not in self.beacon_colors:
-            self.beacon_colors[beacon_id] = self._default_colors[
-                self._color_index % len(self._default_colors)
-            ]
-            self._color_index += 1
-        return self.beacon_colors[beacon_id]
+        # Colours follow insertion order, so rows of one colour are a stride
+        return self._default_colors[self.beacons.index[beacon_id] % len(self._default_colors)]
 
     def update_beacon_position(self, beacon_id, x, y):
         """Add or update a beacon's position."""
-        self.beacon_positions[beacon_id] = QPointF(x, y)
-        self._get_beacon_color(beacon_id)  # Ensure color is assigned
-        self._update_max_coord()
-        self.update()
-
-    def _update_max_coord(self):
-        """Dynamically adjust max_coord based on current beacon positions."""
-        if not self.beacon_positions:
-            self.max_coord = 100
-            return
+        self.update_beacon_positions([(beacon_id, x, y)])
 
-        max_abs_val = 10.0  # Start with a small sensible minimum range, e.g. -10 to +10
-        for point in self.beacon_positions.values():
-            max_abs_val = max(max_abs_val, abs(point.x()), abs(point.y()))
+    def update_beacon_positions(self, updates):
+        """Apply (beacon_id, x, y) updates and schedule a single repaint."""
+        xs = []
+        ys = []
+        for beacon_id, x, y in updates:
+            try:
+                old = self.beacons.update(beacon_id, x, y)
+            except ValueError:
+                continue  # NaN/inf: keep the last drawable position
+            # Only the old and the new dots need repainting
+            xs.append(x)
+            ys.append(y)
+            if old is not None:
+                xs.append(old[0])
+                ys.append(old[1])
+        if self._update_max_coord():
+            self.update()  # Every point moves when the scale changes
+        elif xs:
+            self.update(self._data_rect(min(xs), min(ys), max(xs), max(ys)))
 
-        self.max_coord = max(10.0, max_abs_val * 1.1)  # Ensure max_coord is at least 10
+    def _update_max_coord(self):
+        """Adjust max_coord to the beacon extent; True if it changed."""
+        if not len(self.beacons):
+            return False
+        extent = max(MIN_MAX_COORD, self.beacons.max_abs() * SCALE_HEADROOM)
+        if extent > self.max_coord:
+            self.max_coord = extent * SCALE_GROWTH
+        elif extent < self.max_coord * SCALE_SHRINK:
+            self.max_coord = extent
+        else:
+            return False
+        return True
 
     def clear_beacons(self):
-        self.beacon_positions = {}
-        self.beacon_colors = {}
-        self._color_index = 0
+        self.beacons.clear()
+        self._hovered = None
+        self._screen_trails = {}
+        self._trail_cache = {}
         self.max_coord = 100
         self.update()
 
+    # --- Trails ---
+    def set_trails(self, trails):
+        """Draw a TrailHistory under the beacons (None hides trails)."""
+        self._trails = trails
+        self._screen_trails = {}
+        self._trail_cache = {}
+        if trails is None:
+            self._trail_timer.stop()
+        else:
+            self._trail_timer.start()
+        self.update()
+
+    def set_trail_length(self, seconds):
+        self.trail_seconds = seconds
+        self._refresh_trails()
+
+    def set_trail_fade(self, oldest_opacity):
+        """Opacity of the oldest end of each trail, 0..1 (1 disables fading)."""
+        self.trail_fade = min(max(oldest_opacity, 0.0), 1.0)
+        self._refresh_trails()
+
+    def _refresh_trails(self):
+        self._trail_epoch += 1  # Re-trims and re-fades every cached trail
+        self.update()
+
+    def _trail_polylines(self, beacon_id, buffer, scale, origin_x, origin_y):
+        """Cached (bounding rect, [(colour, polyline)]) of one beacon's trail."""
+        transform = (scale, origin_x, origin_y)
+        key = (buffer.total, self._trail_epoch, transform)
+        cached = self._trail_cache.get(beacon_id)
+        if cached is not None and cached[0] == key:
+            return cached[1], cached[2]
+
+        screen_trail = self._screen_trails.get(beacon_id)
+        if screen_trail is None:
+            screen_trail = self._screen_trails[beacon_id] = ScreenTrail()
+        points = screen_trail.update(buffer, time.monotonic() - self.trail_seconds, transform)
+        polylines = []
+        bounds = QRectF()
+        if len(points) >= 2:
+            if len(points) > TRAIL_MAX_POINTS:
+                points = lttb(points, TRAIL_MAX_POINTS)
+            low = points.min(axis=0)
+            high = points.max(axis=0)
+            bounds = QRectF(low[0], low[1], high[0] - low[0], high[1] - low[1])
+            color = QColor(self._get_beacon_color(beacon_id))
+            steps = 1 if self.trail_fade >= 1.0 else min(TRAIL_FADE_STEPS, len(points) - 1)
+            edges = np.linspace(0, len(points) - 1, steps + 1).astype(int)
+            for step in range(steps):
+                # Chunks share their end points so the line stays connected
+                chunk = points[edges[step] : edges[step + 1] + 1]
+                shade = QColor(color)
+                shade.setAlphaF(self.trail_fade + (1.0 - self.trail_fade) * (step + 1) / steps)
+                polylines.append((shade, QPolygonF([QPointF(x, y) for x, y in chunk.tolist()])))
+        self._trail_cache[beacon_id] = (key, bounds, polylines)
+        return bounds, polylines
+
+    def _paint_trails(self, painter, dirty, scale, origin_x, origin_y):
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+        for beacon_id, buffer in self._trails.buffers.items():
+            if beacon_id not in self.beacons:
+                continue
+            bounds, polylines = self._trail_polylines(beacon_id, buffer, scale, origin_x, origin_y)
+            if not polylines or not dirty.intersects(bounds.adjusted(-2, -2, 2, 2)):
+                continue
+            for color, polyline in polylines:
+                # 1 px: wider antialiased polylines are ~20x slower to stroke
+                painter.setPen(QPen(color, 1))
+                painter.drawPolyline(polyline)
+
+    def beacon_at(self, pos):
+        """ID of the beacon drawn at widget position pos (QPoint/QPointF), or None."""
+        offset_x, offset_y, side, drawable_size, origin_x, origin_y = self._layout()
+        scale = self._scale(drawable_size)
+        x = (pos.x() - offset_x - origin_x) / scale
+        y = -(pos.y() - offset_y - origin_y) / scale
+        return self.beacons.nearest(x, y, HOVER_RADIUS / scale)
+
+    def mouseMoveEvent(self, event):
+        beacon_id = self.beacon_at(event.position())
+        if beacon_id != self._hovered:
+            for previous in (self._hovered, beacon_id):
+                if previous is not None and previous in self.beacons:
+                    self.update(
+                        self._point_rect(QPointF(*self.beacons.position(previous))).adjusted(
+                            -2, -2, 2, 2
+                        )
+                    )
+            self._hovered = beacon_id
+        if beacon_id is None:
+            QToolTip.hideText()
+        else:
+            x, y = self.beacons.position(beacon_id)
+            QToolTip.showText(
+                event.globalPosition().toPoint(), f"{beacon_id} ({x:.2f}, {y:.2f})", self
+            )
+        super().mouseMoveEvent(event)
+
+    def leaveEvent(self, event):
+        self._hovered = None
+        self.update()
+        super().leaveEvent(event)
+
     def heightForWidth(self, width):
         return width  # Makes the widget prefer a square aspect ratio
 
     def hasHeightForWidth(self):
         return True
 
-    def paintEvent(self, event):
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-
+    # --- Layout and cached background ---
+    def _layout(self):
+        """(offset_x, offset_y, side, drawable_size, origin_x, origin_y) for this size."""
         # Determine square drawing area
         side = min(self.width(), self.height())
         offset_x = (self.width() - side) / 2
         offset_y = (self.height() - side) / 2
-
-        painter.translate(offset_x, offset_y)  # Center the square drawing area
-
         # Define the drawable area within the square, considering padding for labels
         drawable_size = side - 2 * self.padding
         origin_x = self.padding + drawable_size / 2
         origin_y = self.padding + drawable_size / 2
+        return offset_x, offset_y, side, drawable_size, origin_x, origin_y
+
+    def _scale(self, drawable_size):
+        return drawable_size / (2 * self.max_coord) if self.max_coord != 0 else 1
+
+    def _point_rect(self, point):
+        """Widget-coordinate box of a beacon dot, padded for antialiasing."""
+        return self._data_rect(point.x(), point.y(), point.x(), point.y())
+
+    def _data_rect(self, x0, y0, x1, y1):
+        """Widget-coordinate box around the dots of a data-space rectangle."""
+        offset_x, offset_y, side, drawable_size, origin_x, origin_y = self._layout()
+        scale = self._scale(drawable_size)
+        margin = POINT_RADIUS + 2
+        left = int(offset_x + origin_x + x0 * scale) - margin
+        top = int(offset_y + origin_y - y1 * scale) - margin  # Y is inverted
+        right = int(offset_x + origin_x + x1 * scale) + margin + 1
+        bottom = int(offset_y + origin_y - y0 * scale) + margin + 1
+        return QRect(left, top, right - left, bottom - top)
+
+    def resizeEvent(self, event):
+        self._background = None
+        self._dense_buffer = None
+        super().resizeEvent(event)
+
+    def _dense_points_image(self, screen, colors, side):
+        """side x side image with a DENSE_POINT_SIZE square per point."""
+        if self._dense_buffer is None or self._dense_buffer.shape != (side, side):
+            self._dense_buffer = np.zeros((side, side), dtype=np.uint32)
+            self._palette_argb = np.array(
+                [QColor(color).rgba() for color in self._default_colors], dtype=np.uint32
+            )
+        buffer = self._dense_buffer
+        buffer[:] = 0
+        half = DENSE_POINT_SIZE // 2
+        offsets = np.arange(-half, DENSE_POINT_SIZE - half)
+        stencil = (offsets[:, None] * side + offsets[None, :]).ravel()
+        # Points are inside the plot area, except ones at the very edge
+        cx = screen[:, 0].astype(np.intp)
+        cy = screen[:, 1].astype(np.intp)
+        inside = (cx >= half) & (cx < side - half) & (cy >= half) & (cy < side - half)
+        centres = cy[inside] * side + cx[inside]
+        buffer.ravel()[centres[:, None] + stencil] = self._palette_argb[colors[inside]][:, None]
+        return QImage(buffer.data, side, side, side * 4, QImage.Format.Format_ARGB32_Premultiplied)
+
+    def _render_background(self):
+        offset_x, offset_y, side, drawable_size, origin_x, origin_y = self._layout()
+        ratio = self.devicePixelRatioF()
+        pixmap = QPixmap(int(self.width() * ratio), int(self.height() * ratio))
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.translate(offset_x, offset_y)  # Center the square drawing area
 
         # Fill background for the square drawing area
         painter.fillRect(0, 0, side, side, Qt.GlobalColor.white)
@@ -145,21 +353,61 @@ class MapWidget(QWidget):
             side - self.padding + fm.height() + 5,
             "Y-",
         )
+        painter.end()
+        return pixmap
+
+    def paintEvent(self, event):
+        if self._background is None:
+            self._background = self._render_background()
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, self._background)
+        if not len(self.beacons):
+            return
+
+        offset_x, offset_y, side, drawable_size, origin_x, origin_y = self._layout()
+        painter.translate(offset_x, offset_y)
 
         # Scale for plotting points
-        scale = drawable_size / (2 * self.max_coord) if self.max_coord != 0 else 1
-
-        # Plot beacon points
-        point_radius = 5
-        for beacon_id, point in self.beacon_positions.items():
-            beacon_color = self._get_beacon_color(beacon_id)
-            painter.setBrush(QBrush(beacon_color))
-            painter.setPen(Qt.PenStyle.NoPen)
-
-            plot_x = origin_x + point.x() * scale
-            plot_y = origin_y - point.y() * scale  # Y is inverted
-            painter.drawEllipse(QPointF(plot_x, plot_y), point_radius, point_radius)
-
-            # Optionally, draw beacon_id label next to point
-            # painter.setPen(QPen(Qt.GlobalColor.black))
-            # painter.drawText(int(plot_x + point_radius + 2), int(plot_y + point_radius), beacon_id)
+        scale = self._scale(drawable_size)
+
+        # Only beacons whose dot overlaps the dirty rectangle (grid lookup)
+        dirty = event.rect()
+        if self._trails is not None:
+            self._paint_trails(
+                painter, QRectF(dirty).translated(-offset_x, -offset_y), scale, origin_x, origin_y
+            )
+        margin = POINT_RADIUS + 2
+        left = (dirty.left() - margin - offset_x - origin_x) / scale
+        right = (dirty.right() + margin - offset_x - origin_x) / scale
+        top = -(dirty.top() - margin - offset_y - origin_y) / scale
+        bottom = -(dirty.bottom() + margin - offset_y - origin_y) / scale
+        rows = self.beacons.rows_in_rect(left, bottom, right, top)
+        if len(rows) == 0 and self._hovered is None:
+            return
+
+        screen = self.beacons.xy[rows] * (scale, -scale) + (origin_x, origin_y)  # Y is inverted
+        colors = rows % len(self._default_colors)
+        if len(rows) <= DETAILED_POINTS_LIMIT:
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            # One drawPoints call per colour: a wide round pen draws each dot
+            for color_index, color in enumerate(self._default_colors):
+                points = screen[colors == color_index]
+                if not len(points):
+                    continue
+                pen = QPen(QColor(color), 2 * POINT_RADIUS)
+                pen.setCapStyle(Qt.PenCapStyle.RoundCap)
+                painter.setPen(pen)
+                painter.drawPoints(QPolygonF([QPointF(x, y) for x, y in points.tolist()]))
+        else:
+            painter.drawImage(0, 0, self._dense_points_image(screen, colors, side))
+
+        if self._hovered is not None and self._hovered in self.beacons:
+            x, y = self.beacons.position(self._hovered)
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            painter.setPen(QPen(Qt.GlobalColor.black, 2))
+            painter.setBrush(Qt.BrushStyle.NoBrush)
+            painter.drawEllipse(
+                QPointF(origin_x + x * scale, origin_y - y * scale),
+                POINT_RADIUS + 2,
+                POINT_RADIUS + 2,
+            )
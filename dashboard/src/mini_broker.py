@@ -0,0 +1,208 @@
+"""
+Minimal in-process MQTT 3.1.1 broker for load tests without mosquitto.
+
+Supports CONNECT, SUBSCRIBE/UNSUBSCRIBE with + and # wildcards, PUBLISH
+(QoS 1/2 are acknowledged, everything is forwarded at QoS 0), PINGREQ and
+DISCONNECT. No retained messages, sessions, wills or authentication. A
+subscriber whose socket cannot keep up has messages dropped (and counted)
+instead of growing memory without bound.
+
+    python -m dashboard.src.mini_broker --port 1883
+"""
+
+import argparse
+import asyncio
+import struct
+import threading
+
+import paho.mqtt.client as mqtt
+
+CONNECT = 1
+PUBLISH = 3
+PUBREL = 6
+SUBSCRIBE = 8
+UNSUBSCRIBE = 10
+PINGREQ = 12
+DISCONNECT = 14
+
+CONNACK_OK = b"\x20\x02\x00\x00"
+PINGRESP = b"\xd0\x00"
+MAX_CLIENT_BUFFER = 8 * 1024 * 1024  # drop QoS 0 messages to slower clients
+
+
+def _encode_length(length):
+    out = bytearray()
+    while True:
+        byte = length % 128
+        length //= 128
+        out.append(byte | 0x80 if length else byte)
+        if not length:
+            return bytes(out)
+
+
+def _read_string(data, pos):
+    (size,) = struct.unpack_from("!H", data, pos)
+    pos += 2
+    return data[pos : pos + size].decode("utf-8"), pos + size
+
+
+class _Client:
+    def __init__(self, writer):
+        self.writer = writer
+        self.filters = set()
+
+
+class MiniBroker:
+    def __init__(self, host="127.0.0.1", port=1883):
+        self.host = host
+        self.port = port
+        self.messages_in = 0
+        self.messages_out = 0
+        self.dropped = 0
+        self._clients = set()
+        self._routes = {}  # topic -> list of subscribed clients
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._ready = threading.Event()
+
+    # --- Background thread ---
+    def start(self):
+        """Serve on a daemon thread; returns once the port is listening."""
+        self._thread = threading.Thread(target=self._run, name="MiniBroker", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._server = self._loop.run_until_complete(
+            asyncio.start_server(self._handle, self.host, self.port)
+        )
+        self._ready.set()
+        self._loop.run_forever()
+        self._server.close()
+        self._loop.run_until_complete(self._server.wait_closed())
+        self._loop.close()
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop = None
+
+    async def serve_forever(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        async with self._server:
+            await self._server.serve_forever()
+
+    # --- Protocol ---
+    async def _handle(self, reader, writer):
+        client = _Client(writer)
+        self._clients.add(client)
+        try:
+            while True:
+                first = await reader.readexactly(1)
+                length = 0
+                multiplier = 1
+                while True:
+                    (byte,) = await reader.readexactly(1)
+                    length += (byte & 0x7F) * multiplier
+                    if not byte & 0x80:
+                        break
+                    multiplier *= 128
+                body = await reader.readexactly(length) if length else b""
+                if not self._packet(client, first[0], body):
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._clients.discard(client)
+            if client.filters:
+                self._routes = {}
+            writer.close()
+
+    def _packet(self, client, first, body):
+        kind = first >> 4
+        writer = client.writer
+        if kind == PUBLISH:
+            qos = (first >> 1) & 0x03
+            topic, pos = _read_string(body, 0)
+            if qos:
+                packet_id = body[pos : pos + 2]
+                pos += 2
+                # PUBACK for QoS 1, PUBREC for QoS 2 (completed on PUBREL)
+                writer.write((b"\x40\x02" if qos == 1 else b"\x50\x02") + packet_id)
+            self._forward(topic, body[pos:])
+        elif kind == CONNECT:
+            writer.write(CONNACK_OK)
+        elif kind == SUBSCRIBE:
+            packet_id = body[:2]
+            pos = 2
+            granted = bytearray()
+            while pos < len(body):
+                topic_filter, pos = _read_string(body, pos)
+                pos += 1  # requested QoS, always granted as 0
+                client.filters.add(topic_filter)
+                granted.append(0)
+            self._routes = {}
+            writer.write(b"\x90" + _encode_length(2 + len(granted)) + packet_id + granted)
+        elif kind == UNSUBSCRIBE:
+            packet_id = body[:2]
+            pos = 2
+            while pos < len(body):
+                topic_filter, pos = _read_string(body, pos)
+                client.filters.discard(topic_filter)
+            self._routes = {}
+            writer.write(b"\xb0\x02" + packet_id)
+        elif kind == PUBREL:
+            writer.write(b"\x70\x02" + body[:2])
+        elif kind == PINGREQ:
+            writer.write(PINGRESP)
+        elif kind == DISCONNECT:
+            return False
+        return True
+
+    def _forward(self, topic, payload):
+        self.messages_in += 1
+        targets = self._routes.get(topic)
+        if targets is None:
+            targets = [
+                c
+                for c in self._clients
+                if any(mqtt.topic_matches_sub(f, topic) for f in c.filters)
+            ]
+            self._routes[topic] = targets
+        if not targets:
+            return
+        topic_bytes = topic.encode("utf-8")
+        variable = struct.pack("!H", len(topic_bytes)) + topic_bytes
+        packet = b"\x30" + _encode_length(len(variable) + len(payload)) + variable + payload
+        for client in targets:
+            transport = client.writer.transport
+            if transport.is_closing() or transport.get_write_buffer_size() > MAX_CLIENT_BUFFER:
+                self.dropped += 1
+                continue
+            client.writer.write(packet)
+            self.messages_out += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Minimal MQTT broker for load tests")
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address")
+    parser.add_argument("--port", type=int, default=1883, help="Listen port")
+    args = parser.parse_args()
+
+    broker = MiniBroker(args.host, args.port)
+    print(f"MQTT stand-in broker on {args.host}:{args.port} (QoS 0, no retain)")
+    try:
+        asyncio.run(broker.serve_forever())
+    except KeyboardInterrupt:
+        print(
+            f"\nStopped: {broker.messages_in} in, {broker.messages_out} out, "
+            f"{broker.dropped} dropped"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Append-only mission recorder for everything the dashboard receives.
+
+A recording is a directory:
+
+    meta.json                 start time, stream names, format version
+    segment-00000.sarrec      records, rotated every SEGMENT_MAX_BYTES
+    segment-00001.sarrec
+    index.bin                 fixed-size (t_ns, segment, offset) entries
+
+Each segment starts with SEGMENT_HEADER and is followed by records of
+RECORD_HEADER + payload. Timestamps are monotonic nanoseconds since the
+start of the recording. An index entry is written at the start of every
+segment and then at most every INDEX_INTERVAL_NS, so a reader can seek to
+any time with a binary search over index.bin instead of scanning records.
+"""
+
+import json
+import os
+import struct
+import threading
+import time
+from collections import deque
+
+FORMAT_VERSION = 1
+SEGMENT_MAGIC = b"SARREC01"
+SEGMENT_HEADER = struct.Struct("<8sIq")  # magic, segment number, wall clock ns
+RECORD_HEADER = struct.Struct("<QBI")  # t_ns, stream id, payload length
+INDEX_ENTRY = struct.Struct("<QII")  # t_ns, segment number, byte offset
+MQTT_TOPIC_HEADER = struct.Struct("<H")  # topic length, followed by topic + payload
+
+STREAM_VIDEO = 1
+STREAM_AUDIO = 2
+STREAM_MQTT = 3
+STREAM_NAMES = {STREAM_VIDEO: "video", STREAM_AUDIO: "audio", STREAM_MQTT: "mqtt"}
+
+SEGMENT_MAX_BYTES = 256 * 1024 * 1024
+WRITE_BUFFER_BYTES = 4 * 1024 * 1024
+FLUSH_INTERVAL = 1.0  # seconds, upper bound on data sitting in memory
+INDEX_INTERVAL_NS = 250_000_000
+MAX_BACKLOG_BYTES = 512 * 1024 * 1024  # drop records beyond this (disk too slow)
+
+META_FILE = "meta.json"
+INDEX_FILE = "index.bin"
+
+
+def segment_filename(segment_no):
+    return f"segment-{segment_no:05d}.sarrec"
+
+
+def pack_mqtt(topic, payload):
+    """Encode an MQTT message as a single record payload."""
+    topic_bytes = topic.encode("utf-8")
+    return MQTT_TOPIC_HEADER.pack(len(topic_bytes)) + topic_bytes + bytes(payload)
+
+
+def unpack_mqtt(data):
+    """Split a recorded MQTT payload into (topic, payload)."""
+    (topic_len,) = MQTT_TOPIC_HEADER.unpack_from(data)
+    start = MQTT_TOPIC_HEADER.size
+    topic = bytes(data[start : start + topic_len]).decode("utf-8")
+    return topic, data[start + topic_len :]
+
+
+class MissionRecorder:
+    """Records (stream id, payload) pairs from any thread to disk.
+
+    record() only timestamps the payload and appends it to an in-memory
+    queue; packing and file I/O happen on a background thread that writes
+    in large blocks. Call stop() to flush and close the recording.
+    """
+
+    def __init__(self, directory, segment_max_bytes=SEGMENT_MAX_BYTES):
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.records = 0
+        self.bytes_written = 0
+        self.dropped = 0
+        self._queue = deque()
+        self._backlog_bytes = 0
+        self._backlog_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._running = False
+        self._thread = None
+        self._start_ns = 0
+        self._segment_no = -1
+        self._segment = None
+        self._segment_bytes = 0
+        self._index = None
+        self._last_index_ns = -INDEX_INTERVAL_NS
+        self._buffer = bytearray()
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._start_ns = time.monotonic_ns()
+        meta = {
+            "format_version": FORMAT_VERSION,
+            "start_time": time.time(),
+            "streams": {str(k): v for k, v in STREAM_NAMES.items()},
+        }
+        with open(os.path.join(self.directory, META_FILE), "w") as f:
+            json.dump(meta, f, indent=2)
+
+        self._index = open(os.path.join(self.directory, INDEX_FILE), "wb")
+        self._open_segment()
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._writer_loop, name="MissionRecorder", daemon=True
+        )
+        self._thread.start()
+
+    def record(self, stream_id, payload):
+        """Queue one payload; safe to call from any thread."""
+        if not self._running:
+            return
+        t_ns = time.monotonic_ns() - self._start_ns
+        size = len(payload)
+        with self._backlog_lock:
+            if self._backlog_bytes + size > MAX_BACKLOG_BYTES:
+                self.dropped += 1
+                return
+            self._backlog_bytes += size
+            self._queue.append((t_ns, stream_id, payload))
+
+    @property
+    def backlog_bytes(self):
+        """Bytes queued in memory but not yet written."""
+        return self._backlog_bytes
+
+    @property
+    def is_recording(self):
+        return self._running
+
+    def elapsed(self):
+        """Seconds since the recording started."""
+        return (time.monotonic_ns() - self._start_ns) / 1e9 if self._running else 0.0
+
+    def stop(self):
+        if not self._running:
+            return
+        self._running = False
+        self._wakeup.set()
+        self._thread.join()
+        self._thread = None
+
+    # --- Writer thread ---
+    def _writer_loop(self):
+        try:
+            while self._running:
+                self._wakeup.wait(FLUSH_INTERVAL)
+                self._drain()
+                self._flush()
+            self._drain()
+            self._flush()
+        finally:
+            self._segment.close()
+            self._index.close()
+
+    def _drain(self):
+        queue = self._queue
+        buffer = self._buffer
+        drained = 0
+        while queue:
+            t_ns, stream_id, payload = queue.popleft()
+            size = len(payload)
+            drained += size
+            record_size = RECORD_HEADER.size + size
+
+            if self._segment_bytes + len(buffer) + record_size > self.segment_max_bytes:
+                self._flush()
+                self._open_segment()
+            if t_ns - self._last_index_ns >= INDEX_INTERVAL_NS:
+                self._write_index(t_ns)
+
+            buffer += RECORD_HEADER.pack(t_ns, stream_id, size)
+            buffer += payload
+            self.records += 1
+            if len(buffer) >= WRITE_BUFFER_BYTES:
+                self._flush()
+        with self._backlog_lock:
+            self._backlog_bytes -= drained
+
+    def _flush(self):
+        if self._buffer:
+            self._segment.write(self._buffer)
+            self._segment_bytes += len(self._buffer)
+            self.bytes_written += len(self._buffer)
+            self._buffer.clear()
+        self._segment.flush()
+        self._index.flush()
+
+    def _open_segment(self):
+        if self._segment is not None:
+            self._segment.close()
+        self._segment_no += 1
+        path = os.path.join(self.directory, segment_filename(self._segment_no))
+        self._segment = open(path, "wb", buffering=0)
+        header = SEGMENT_HEADER.pack(SEGMENT_MAGIC, self._segment_no, time.time_ns())
+        self._segment.write(header)
+        self._segment_bytes = len(header)
+        # Force an index entry at the first record of every segment
+        self._last_index_ns = -INDEX_INTERVAL_NS
+
+    def _write_index(self, t_ns):
+        offset = self._segment_bytes + len(self._buffer)
+        self._index.write(INDEX_ENTRY.pack(t_ns, self._segment_no, offset))
+        self._last_index_ns = t_ns
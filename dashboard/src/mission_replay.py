@@ -0,0 +1,336 @@
+"""
+Replay of missions written by MissionRecorder.
+
+MissionReader memory-maps the segment files and uses index.bin to seek by
+time, so payloads are handed out as zero-copy memoryviews. ReplayThread
+paces the records (real time, N x, or as fast as possible) and feeds them
+to the same client objects that handle live data, so decode and widget
+code paths are identical to a live mission.
+"""
+
+import json
+import mmap
+import os
+import threading
+import time
+
+import numpy as np
+from PySide6.QtCore import QThread, Signal
+
+from .mission_recorder import (
+    INDEX_FILE,
+    META_FILE,
+    RECORD_HEADER,
+    SEGMENT_HEADER,
+    SEGMENT_MAGIC,
+    STREAM_AUDIO,
+    STREAM_MQTT,
+    STREAM_NAMES,
+    STREAM_VIDEO,
+    segment_filename,
+)
+
+INDEX_DTYPE = np.dtype([("t_ns", "<u8"), ("segment", "<u4"), ("offset", "<u4")])
+
+# As-fast-as-possible replay never lets more than this many decoded video
+# frames wait in the Qt event queue, so the benchmark measures the whole
+# pipeline instead of how fast signals can be queued.
+MAX_FRAMES_IN_FLIGHT = 2
+POSITION_UPDATE_INTERVAL = 0.1  # seconds between position_changed signals
+# A seek while paused delivers the telemetry since the preceding index entry
+# and the records up to the first video frame at the target, looking at
+# most this far ahead for it.
+SEEK_PREVIEW_NS = 1_000_000_000
+
+
+class MissionReader:
+    """Random access to a recorded mission."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, META_FILE)) as f:
+            self.meta = json.load(f)
+        self.start_time = self.meta.get("start_time", 0.0)
+        self.index = np.fromfile(os.path.join(directory, INDEX_FILE), dtype=INDEX_DTYPE)
+        if len(self.index) == 0:
+            raise ValueError(f"Recording {directory} has an empty index")
+
+        self._files = []
+        self._maps = []
+        segment_no = 0
+        while True:
+            path = os.path.join(directory, segment_filename(segment_no))
+            if not os.path.exists(path):
+                break
+            f = open(path, "rb")
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, number, _wall_ns = SEGMENT_HEADER.unpack_from(mm)
+            if magic != SEGMENT_MAGIC or number != segment_no:
+                raise ValueError(f"{path} is not a mission segment")
+            self._files.append(f)
+            self._maps.append(mm)
+            segment_no += 1
+        if not self._maps:
+            raise ValueError(f"No segments found in {directory}")
+
+        self.duration_ns = self._find_duration()
+
+    def _find_duration(self):
+        """Scan forward from the last index entry to find the final timestamp."""
+        last = self.index[-1]
+        t_ns = int(last["t_ns"])
+        for t_ns, _stream, _payload in self.records(int(last["segment"]), int(last["offset"])):
+            pass
+        return t_ns
+
+    @property
+    def duration(self):
+        return self.duration_ns / 1e9
+
+    def locate(self, t_ns):
+        """Return (segment, offset) of the index entry at or before t_ns."""
+        i = int(np.searchsorted(self.index["t_ns"], t_ns, side="right")) - 1
+        entry = self.index[max(i, 0)]
+        return int(entry["segment"]), int(entry["offset"])
+
+    def records(self, segment=0, offset=None):
+        """Yield (t_ns, stream_id, payload memoryview) from a position onward."""
+        header_size = RECORD_HEADER.size
+        if offset is None:
+            offset = SEGMENT_HEADER.size
+        for seg in range(segment, len(self._maps)):
+            mm = self._maps[seg]
+            view = memoryview(mm)
+            end = len(mm)
+            pos = offset if seg == segment else SEGMENT_HEADER.size
+            while pos + header_size <= end:
+                t_ns, stream_id, size = RECORD_HEADER.unpack_from(mm, pos)
+                pos += header_size
+                if pos + size > end:
+                    break  # Truncated tail (recording was interrupted)
+                yield t_ns, stream_id, view[pos : pos + size]
+                pos += size
+
+    def records_from(self, t_ns):
+        """Yield records with a timestamp at or after t_ns."""
+        segment, offset = self.locate(t_ns)
+        for record in self.records(segment, offset):
+            if record[0] >= t_ns:
+                yield record
+
+    def close(self):
+        for mm in self._maps:
+            try:
+                mm.close()
+            except BufferError:
+                pass  # A payload view is still alive; the map goes with it
+        for f in self._files:
+            f.close()
+        self._maps = []
+        self._files = []
+
+
+class ReplayThread(QThread):
+    """Feeds recorded payloads to per-stream sinks with controllable pacing.
+
+    sinks maps a stream id to a callable taking (payload, t_ns). speed is a
+    playback multiplier; 0 means as fast as possible. Audio is only played
+    at 1x, at other speeds it is skipped.
+    """
+
+    position_changed = Signal(float)  # seconds into the recording
+    replay_finished = Signal(dict)  # throughput statistics
+    log_message = Signal(str)
+
+    def __init__(self, reader, sinks, speed=1.0, frames_in_flight=None, stop_at_end=False):
+        super().__init__()
+        self.reader = reader
+        self.sinks = sinks
+        self.speed = speed
+        # Callable returning the number of video frames not yet displayed
+        self.frames_in_flight = frames_in_flight
+        # Exit when the recording ends instead of pausing for a seek
+        self.stop_at_end = stop_at_end
+        self.running = True
+        self._lock = threading.Lock()
+        # Wakes the playback loop while paused (resume, seek or stop)
+        self._wake = threading.Condition(self._lock)
+        self._seek_ns = None
+        self._paused = False
+        self._interrupt = threading.Event()
+
+    # --- Controls (any thread) ---
+    def set_speed(self, speed):
+        with self._lock:
+            self.speed = speed
+        self._interrupt.set()
+
+    def seek(self, seconds):
+        """Jump to a time in the recording.
+
+        While paused, the frame at the target is shown right away and
+        playback stays paused.
+        """
+        with self._lock:
+            self._seek_ns = int(max(0.0, seconds) * 1e9)
+            self._wake.notify_all()
+        self._interrupt.set()
+
+    @property
+    def paused(self):
+        return self._paused
+
+    def pause(self):
+        with self._lock:
+            self._paused = True
+
+    def resume(self):
+        with self._lock:
+            self._paused = False
+            self._wake.notify_all()
+
+    def stop(self):
+        with self._lock:
+            self.running = False
+            self._wake.notify_all()
+        self._interrupt.set()
+
+    def _wait_while_paused(self):
+        """Block while paused, until resumed, stopped or seeked."""
+        with self._lock:
+            self._wake.wait_for(
+                lambda: not self._paused or self._seek_ns is not None or not self.running
+            )
+
+    # --- Playback loop ---
+    def _deliver(self, stream_id, payload, t_ns, speed):
+        """Hand a record to its sink; False if the stream is skipped."""
+        sink = self.sinks.get(stream_id)
+        if sink is None or (stream_id == STREAM_AUDIO and speed != 1.0):
+            return False
+        try:
+            sink(payload, t_ns)
+        except Exception as e:
+            self.log_message.emit(
+                f"Replay error on {STREAM_NAMES.get(stream_id, stream_id)}: {e}"
+            )
+        return True
+
+    def _preview(self, seek_ns):
+        """Deliver the state at a paused seek target, without audio.
+
+        Returns the record iterator to resume from and the first record
+        after the preview (or None), which is played first on resume.
+        """
+        records = self.reader.records(*self.reader.locate(seek_ns))
+        for t_ns, stream_id, payload in records:
+            if t_ns < seek_ns:
+                if stream_id == STREAM_MQTT:
+                    self._deliver(stream_id, payload, t_ns, speed=1.0)
+                continue
+            if t_ns > seek_ns + SEEK_PREVIEW_NS:
+                return records, (t_ns, stream_id, payload)
+            if stream_id != STREAM_AUDIO:
+                self._deliver(stream_id, payload, t_ns, speed=1.0)
+            if stream_id == STREAM_VIDEO:
+                break
+        return records, None
+
+    def _stats(self, counts, total_bytes, skipped, elapsed):
+        records = sum(counts.values())
+        stats = {
+            "elapsed": elapsed,
+            "records": records,
+            "bytes": total_bytes,
+            "skipped": skipped,
+            "records_per_s": records / elapsed if elapsed > 0 else 0.0,
+            "mb_per_s": total_bytes / 1e6 / elapsed if elapsed > 0 else 0.0,
+        }
+        for stream_id, count in counts.items():
+            name = STREAM_NAMES.get(stream_id, str(stream_id))
+            stats[f"{name}_records"] = count
+            stats[f"{name}_per_s"] = count / elapsed if elapsed > 0 else 0.0
+        return stats
+
+    def run(self):
+        counts = {stream_id: 0 for stream_id in STREAM_NAMES}
+        total_bytes = 0
+        skipped = 0
+        bench_start = time.perf_counter()
+
+        records = self.reader.records()
+        anchor_wall = None
+        anchor_t = 0
+        speed = None
+        last_position = -1.0
+        held = None  # Record read ahead by a paused seek
+
+        while self.running:
+            self._interrupt.clear()
+            with self._lock:
+                seek_ns, self._seek_ns = self._seek_ns, None
+                new_speed = self.speed
+            if seek_ns is not None:
+                held = None
+                anchor_wall = None
+                if self._paused:
+                    records, held = self._preview(seek_ns)
+                    last_position = seek_ns / 1e9
+                    self.position_changed.emit(last_position)
+                    self._wait_while_paused()
+                    continue
+                records = self.reader.records_from(seek_ns)
+            if new_speed != speed:
+                speed = new_speed
+                anchor_wall = None
+
+            try:
+                if held is not None:
+                    (t_ns, stream_id, payload), held = held, None
+                else:
+                    t_ns, stream_id, payload = next(records)
+            except StopIteration:
+                self.position_changed.emit(self.reader.duration)
+                self.replay_finished.emit(
+                    self._stats(
+                        counts, total_bytes, skipped, time.perf_counter() - bench_start
+                    )
+                )
+                if self.stop_at_end:
+                    break
+                # Wait for a seek (or play again from the start)
+                self.pause()
+                self._wait_while_paused()
+                if self._seek_ns is None and self.running:
+                    self.seek(0.0)
+                continue
+
+            if speed > 0:
+                if anchor_wall is None:
+                    anchor_wall, anchor_t = time.monotonic(), t_ns
+                delay = anchor_wall + (t_ns - anchor_t) / 1e9 / speed - time.monotonic()
+                if delay > 0 and self._interrupt.wait(delay):
+                    if self._seek_ns is not None or not self.running:
+                        continue  # Seek or stop while waiting, drop this record
+                    # Speed changed: deliver now, re-anchor on the next record
+                    speed = self.speed
+                    anchor_wall = None
+            elif self.frames_in_flight is not None and stream_id == STREAM_VIDEO:
+                while self.running and self.frames_in_flight() >= MAX_FRAMES_IN_FLIGHT:
+                    time.sleep(0.0005)
+
+            if self._paused:
+                self._wait_while_paused()
+                anchor_wall = None
+                if self._seek_ns is not None:
+                    continue  # Seeked while paused, drop the stale record
+
+            if not self._deliver(stream_id, payload, t_ns, speed):
+                skipped += 1
+            counts[stream_id] = counts.get(stream_id, 0) + 1
+            total_bytes += len(payload)
+
+            position = t_ns / 1e9
+            if abs(position - last_position) >= POSITION_UPDATE_INTERVAL:
+                self.position_changed.emit(position)
+                last_position = position
@@ -1,8 +1,24 @@
 import json
+import threading
 import time
-from PySide6.QtCore import QThread, Signal
+from PySide6.QtCore import QObject, QThread, QTimer, Signal
 import paho.mqtt.client as mqtt
 
+from common.sar_codec import decode_payload
+from .mission_recorder import STREAM_MQTT, pack_mqtt
+from .perf_monitor import PERF
+
+BATCH_INTERVAL_MS = 33  # Flush batched subscriptions at ~30 Hz
+RETRY_REPORT_EVERY = 10  # Failed connection attempts between reminders in the log
+
+CONNECT_ERRORS = {
+    1: "Connection refused - incorrect protocol version",
+    2: "Connection refused - invalid client identifier",
+    3: "Connection refused - server unavailable",
+    4: "Connection refused - bad username or password",
+    5: "Connection refused - not authorized",
+}
+
 
 class MQTTClient(QThread):
     connected = Signal()
@@ -19,6 +35,7 @@ class MQTTClient(QThread):
         self.topic = topic
         self.client = None
         self.is_running = True
+        self.recorder = None  # Optional MissionRecorder, set by the GUI
 
     def run(self):
         try:
@@ -67,14 +84,7 @@ class MQTTClient(QThread):
             self.client.subscribe(self.topic)
             self.error_occurred.emit(f"Subscribed to topic: {self.topic}")
         else:
-            error_messages = {
-                1: "Connection refused - incorrect protocol version",
-                2: "Connection refused - invalid client identifier",
-                3: "Connection refused - server unavailable",
-                4: "Connection refused - bad username or password",
-                5: "Connection refused - not authorized",
-            }
-            error_msg = error_messages.get(rc, f"Connection failed with code {rc}")
+            error_msg = CONNECT_ERRORS.get(rc, f"Connection failed with code {rc}")
             self.error_occurred.emit(error_msg)
 
     def _on_disconnect(self, client, userdata, rc):
@@ -85,8 +95,22 @@ class MQTTClient(QThread):
 
     def _on_message(self, client, userdata, msg):
         """Callback when message is received."""
+        recorder = self.recorder
+        if recorder is not None:
+            recorder.record(STREAM_MQTT, pack_mqtt(msg.topic, msg.payload))
+        self.dispatch(msg.topic, msg.payload)
+
+    def matches(self, topic):
+        """Whether a topic is covered by this client's subscription."""
+        return mqtt.topic_matches_sub(self.topic, topic)
+
+    def dispatch(self, topic, payload):
+        """Parse a raw payload and emit it; also used to replay recordings."""
         try:
-            payload = json.loads(msg.payload.decode())
+            started = time.perf_counter()
+            payload = json.loads(bytes(payload).decode())
+            PERF.record("mqtt.parse", time.perf_counter() - started)
+            PERF.mark("mqtt.messages")
             self.message_received.emit(payload)
         except json.JSONDecodeError as e:
             self.error_occurred.emit(f"Invalid JSON received: {str(e)}")
@@ -109,3 +133,264 @@ class MQTTClient(QThread):
         else:
             self.error_occurred.emit("Cannot publish: Client not initialized")
             return False
+
+
+class MQTTSubscription(QObject):
+    """One topic filter registered on an MQTTHub.
+
+    In immediate mode message_received is emitted with every parsed JSON
+    payload; connect it with the default (queued) connection to handle
+    messages on the GUI thread. The optional callback runs directly on the
+    network thread with (topic, data) and must be thread-safe.
+
+    In batched mode (batch_items given) nothing is emitted per message.
+    batch_items(topic, data) returns (key, value) pairs; they are collected
+    on the network thread keeping only the latest value per key, and the
+    hub emits them as one batch_received list per flush interval.
+    """
+
+    message_received = Signal(dict)
+    batch_received = Signal(list)  # [(key, value), ...], latest value per key
+
+    def __init__(self, topic_filter, qos=0, callback=None, batch_items=None):
+        super().__init__()
+        self.topic_filter = topic_filter
+        self.qos = qos
+        self.callback = callback
+        self.batch_items = batch_items
+        self.wildcard = "+" in topic_filter or "#" in topic_filter
+        # Counters for batched delivery
+        self.received = 0
+        self.coalesced = 0
+        self.batches = 0
+        self._pending = {}
+        self._pending_coalesced = 0
+        self._pending_lock = threading.Lock()
+
+    @property
+    def batched(self):
+        return self.batch_items is not None
+
+    def matches(self, topic):
+        if not self.wildcard:
+            return topic == self.topic_filter
+        return mqtt.topic_matches_sub(self.topic_filter, topic)
+
+    def deliver(self, topic, data):
+        if self.callback is not None:
+            self.callback(topic, data)
+        if self.batch_items is None:
+            self.message_received.emit(data)
+            return
+        items = self.batch_items(topic, data)
+        with self._pending_lock:
+            pending = self._pending
+            for key, value in items:
+                self.received += 1
+                if key in pending:
+                    self._pending_coalesced += 1
+                pending[key] = value
+
+    def flush(self):
+        """Emit everything collected since the last flush (GUI thread).
+
+        Returns the number of messages that were coalesced into this batch.
+        """
+        with self._pending_lock:
+            if not self._pending:
+                return 0
+            pending, self._pending = self._pending, {}
+            coalesced, self._pending_coalesced = self._pending_coalesced, 0
+        self.coalesced += coalesced
+        self.batches += 1
+        self.batch_received.emit(list(pending.items()))
+        return coalesced
+
+
+class MQTTHub(QThread):
+    """A single broker connection shared by every dashboard component.
+
+    Components call subscribe() for the topics they need (wildcards
+    allowed) instead of opening their own connection. The thread runs
+    paho's loop_forever(), which reconnects on its own and re-subscribes
+    every filter in one SUBSCRIBE packet; stop() disconnects, which ends
+    the loop without any polling. Failed attempts are reported through
+    error_occurred: the first of a series, then every RETRY_REPORT_EVERY.
+    """
+
+    connected = Signal()
+    disconnected = Signal()
+    error_occurred = Signal(str)
+
+    def __init__(
+        self,
+        broker_host="vlg2.local",
+        broker_port=1883,
+        keepalive=60,
+        batch_interval_ms=BATCH_INTERVAL_MS,
+    ):
+        super().__init__()
+        self.broker_host = broker_host
+        self.broker_port = broker_port
+        self.keepalive = keepalive
+        self.client = mqtt.Client()
+        self.client.on_connect = self._on_connect
+        self.client.on_message = self._on_message
+        self.client.on_disconnect = self._on_disconnect
+        self.client.on_connect_fail = self._on_connect_fail
+        self.client.reconnect_delay_set(min_delay=1, max_delay=10)
+        self.recorder = None  # Optional MissionRecorder, set by the GUI
+        self.is_connected = False
+        self._failed_attempts = 0  # Since the last successful connection
+        self._stop_event = threading.Event()
+        self._subscriptions = []
+        self._routes = {}  # topic -> tuple of matching subscriptions
+        self._lock = threading.Lock()
+        # Lives in the thread that created the hub (the GUI thread)
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setInterval(batch_interval_ms)
+        self._flush_timer.timeout.connect(self.flush_batches)
+
+    # --- Subscriptions ---
+    def subscribe(self, topic_filter, callback=None, qos=0, batch_items=None):
+        """Register a topic filter and return its MQTTSubscription.
+
+        Pass batch_items for batched delivery (see MQTTSubscription); batched
+        subscriptions must be created from the GUI thread.
+        """
+        subscription = MQTTSubscription(topic_filter, qos, callback, batch_items)
+        if subscription.batched and not self._flush_timer.isActive():
+            self._flush_timer.start()
+        with self._lock:
+            known = any(s.topic_filter == topic_filter for s in self._subscriptions)
+            self._subscriptions = self._subscriptions + [subscription]
+            self._routes = {}
+        if self.is_connected and not known:
+            self.client.subscribe(topic_filter, qos)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions = [s for s in self._subscriptions if s is not subscription]
+            self._routes = {}
+            still_used = any(
+                s.topic_filter == subscription.topic_filter for s in self._subscriptions
+            )
+        if self.is_connected and not still_used:
+            self.client.unsubscribe(subscription.topic_filter)
+
+    def flush_batches(self):
+        coalesced = 0
+        for subscription in self._subscriptions:
+            if subscription.batched:
+                coalesced += subscription.flush()
+        if coalesced:
+            PERF.mark("mqtt.coalesced", coalesced)
+
+    def _route(self, topic):
+        routes = self._routes
+        targets = routes.get(topic)
+        if targets is None:
+            # Wildcard matching is done once per distinct topic, then cached
+            targets = tuple(s for s in self._subscriptions if s.matches(topic))
+            routes[topic] = targets
+        return targets
+
+    # --- Thread ---
+    def run(self):
+        if self._stop_event.is_set():
+            return
+        self.error_occurred.emit(
+            f"Attempting to connect to {self.broker_host}:{self.broker_port}"
+        )
+        try:
+            self.client.connect_async(self.broker_host, self.broker_port, self.keepalive)
+            # Returns once stop() has disconnected the client
+            self.client.loop_forever(retry_first_connection=True)
+        except Exception as e:
+            self.error_occurred.emit(f"MQTT Error: {str(e)}")
+
+    def stop(self):
+        """Disconnect and end the network loop."""
+        self._stop_event.set()
+        self.client.disconnect()
+        self.wait()
+
+    # --- paho callbacks (network thread) ---
+    def _on_connect(self, client, userdata, flags, rc):
+        if rc != 0:
+            self._connection_failed(
+                CONNECT_ERRORS.get(rc, f"Connection failed with code {rc}")
+            )
+            return
+        self._failed_attempts = 0
+        self.is_connected = True
+        self.error_occurred.emit("Successfully connected to broker")
+        self.connected.emit()
+        filters = {}
+        for s in self._subscriptions:
+            filters[s.topic_filter] = max(s.qos, filters.get(s.topic_filter, 0))
+        if filters:
+            client.subscribe(list(filters.items()))
+            self.error_occurred.emit(f"Subscribed to topics: {', '.join(filters)}")
+
+    def _on_connect_fail(self, client, userdata):
+        self._connection_failed(
+            f"Could not reach broker at {self.broker_host}:{self.broker_port}"
+        )
+
+    def _connection_failed(self, reason):
+        self._failed_attempts += 1
+        attempts = self._failed_attempts
+        if attempts == 1:
+            self.error_occurred.emit(f"{reason}, retrying")
+        elif attempts % RETRY_REPORT_EVERY == 0:
+            self.error_occurred.emit(f"{reason}, still retrying ({attempts} attempts)")
+
+    def _on_disconnect(self, client, userdata, rc):
+        if not self.is_connected:
+            return  # A refused connection attempt, already reported
+        self.is_connected = False
+        self.disconnected.emit()
+        if rc != 0 and not self._stop_event.is_set():
+            self.error_occurred.emit(f"Unexpected disconnection (code {rc})")
+
+    def _on_message(self, client, userdata, msg):
+        recorder = self.recorder
+        if recorder is not None:
+            recorder.record(STREAM_MQTT, pack_mqtt(msg.topic, msg.payload))
+        self.dispatch(msg.topic, msg.payload)
+
+    def dispatch(self, topic, payload):
+        """Decode a raw payload once and hand it to every matching subscription.
+
+        Also used to feed recorded messages during replay.
+        """
+        targets = self._route(topic)
+        if not targets:
+            return
+        try:
+            started = time.perf_counter()
+            data = decode_payload(payload)  # JSON or binary (common/sar_codec.py)
+            PERF.record("mqtt.parse", time.perf_counter() - started)
+            PERF.mark("mqtt.messages")
+        except (UnicodeDecodeError, ValueError) as e:
+            self.error_occurred.emit(f"Invalid payload received on {topic}: {str(e)}")
+            return
+        for subscription in targets:
+            try:
+                subscription.deliver(topic, data)
+            except Exception as e:
+                self.error_occurred.emit(f"Error processing message on {topic}: {str(e)}")
+
+    def publish(self, topic, message, qos=0):
+        """Publish a message; returns True when it was queued for sending."""
+        try:
+            result = self.client.publish(topic, message, qos)
+        except Exception as e:
+            self.error_occurred.emit(f"Error publishing message: {str(e)}")
+            return False
+        if result.rc != mqtt.MQTT_ERR_SUCCESS:
+            self.error_occurred.emit(f"Publish failed with code {result.rc}")
+            return False
+        return True
@@ -0,0 +1,213 @@
+"""
+Subscriber that measures MQTT delivery latency and loss.
+
+Works with messages from mqtt_load_generator (JSON or binary), which carry
+a send "timestamp" and a per-topic "seq" in every record. Loss is tracked
+per topic (i.e. per robot) and reported per message type. Run it on the
+same machine as the generator so both use the same clock.
+
+    python -m dashboard.src.mqtt_latency_probe --host localhost
+    python -m dashboard.src.mqtt_latency_probe --mode hub
+
+--mode paho measures broker + network only. --mode hub receives through
+MQTTHub and a queued Qt signal to the main thread, the same path the
+dashboard uses, so it shows when that path saturates.
+"""
+
+import argparse
+import signal
+import sys
+import time
+
+import paho.mqtt.client as mqtt
+
+from common.sar_codec import decode_payload
+from common.sar_topics import POSITION, SOUND, fleet_topic, legacy_topic, parse_topic
+from .perf_monitor import LatencyHistogram
+
+DEFAULT_TOPICS = [
+    fleet_topic(POSITION),
+    fleet_topic(SOUND),
+    legacy_topic(POSITION),
+    legacy_topic(SOUND),
+]
+REPORT_INTERVAL = 1.0
+
+
+class _Stats:
+    def __init__(self):
+        self.histogram = LatencyHistogram()
+        self.received = 0
+        self.lost = 0
+        self.late = 0  # sequence lower than one already seen (reordered/duplicate)
+
+
+class LatencyProbe:
+    """Accumulates latency, loss and reordering per message type."""
+
+    def __init__(self):
+        self.kinds = {}  # message type (sound, position, ...) -> _Stats
+        self.next_seq = {}  # topic -> next expected sequence number
+        self.topics = set()
+        self.errors = 0
+
+    def handle(self, topic, data, recv_time=None):
+        """Account for one decoded message received at recv_time (wall clock)."""
+        if recv_time is None:
+            recv_time = time.time()
+        parsed = parse_topic(topic)
+        kind = parsed[1] if parsed else topic
+        stats = self.kinds.get(kind)
+        if stats is None:
+            stats = self.kinds[kind] = _Stats()
+        self.topics.add(topic)
+        record = _first_record(data)
+        if record is None or "timestamp" not in record:
+            self.errors += 1
+            return
+        stats.received += 1
+        stats.histogram.add(max(recv_time - record["timestamp"], 0.0))
+
+        seq = record.get("seq")
+        if seq is None:
+            return
+        expected = self.next_seq.get(topic)
+        if expected is None or seq == expected:
+            self.next_seq[topic] = seq + 1
+        elif seq > expected:
+            stats.lost += seq - expected
+            self.next_seq[topic] = seq + 1
+        else:
+            stats.late += 1
+
+    def summary(self):
+        result = {}
+        for kind, stats in sorted(self.kinds.items()):
+            entry = stats.histogram.summary(recent=False)
+            entry.update(received=stats.received, lost=stats.lost, late=stats.late)
+            expected = stats.received + stats.lost
+            entry["loss_pct"] = 100.0 * stats.lost / expected if expected else 0.0
+            result[kind] = entry
+        return result
+
+    def report(self):
+        lines = []
+        for kind, s in self.summary().items():
+            lines.append(
+                f"{kind}: {s['received']} msgs, lost {s['lost']} ({s['loss_pct']:.2f}%), "
+                f"late {s['late']} | latency ms p50 {s['p50_ms']:.2f} "
+                f"p90 {s['p90_ms']:.2f} p99 {s['p99_ms']:.2f} max {s['max_ms']:.2f}"
+            )
+        if lines:
+            lines.append(f"({len(self.topics)} topics, {self.errors} undecodable)")
+        return "\n".join(lines) if lines else "no messages yet"
+
+
+def _first_record(data):
+    """The record carrying timestamp/seq: sound dict or the first beacon."""
+    if not isinstance(data, dict):
+        return None
+    if "timestamp" in data:
+        return data
+    for value in data.values():
+        return value if isinstance(value, dict) else None
+    return None
+
+
+def run_paho(probe, host, port, topics, duration):
+    def on_connect(client, userdata, flags, rc):
+        client.subscribe([(topic, 0) for topic in topics])
+
+    def on_message(client, userdata, msg):
+        recv_time = time.time()
+        try:
+            probe.handle(msg.topic, decode_payload(msg.payload), recv_time)
+        except ValueError:
+            probe.errors += 1
+
+    client = mqtt.Client()
+    client.on_connect = on_connect
+    client.on_message = on_message
+    client.connect(host, port, 60)
+    client.loop_start()
+    try:
+        _report_until(probe, duration)
+    finally:
+        client.loop_stop()
+        client.disconnect()
+
+
+def run_hub(probe, host, port, topics, duration):
+    from PySide6.QtCore import QCoreApplication, QObject, QTimer, Signal
+
+    from .mqtt_client import MQTTHub
+
+    class Relay(QObject):
+        # Like MQTTSubscription.message_received, plus the concrete topic
+        # (a filter such as sar-robot/+/position covers every robot)
+        received = Signal(str, object)
+
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    hub = MQTTHub(broker_host=host, broker_port=port)
+    hub.error_occurred.connect(lambda message: print(f"[hub] {message}"))
+    relay = Relay()
+    # Queued to this (main) thread, like the dashboard's slots
+    relay.received.connect(probe.handle)
+    for topic in topics:
+        hub.subscribe(topic, callback=relay.received.emit)
+
+    report_timer = QTimer()
+    report_timer.timeout.connect(lambda: print(probe.report() + "\n"))
+    report_timer.start(int(REPORT_INTERVAL * 1000))
+    if duration > 0:
+        QTimer.singleShot(int(duration * 1000), app.quit)
+    signal.signal(signal.SIGINT, lambda *args: app.quit())
+    # Wake the event loop periodically so Ctrl+C is noticed
+    wake_timer = QTimer()
+    wake_timer.timeout.connect(lambda: None)
+    wake_timer.start(200)
+
+    hub.start()
+    app.exec()
+    hub.stop()
+
+
+def _report_until(probe, duration):
+    end = time.monotonic() + duration if duration > 0 else None
+    try:
+        while end is None or time.monotonic() < end:
+            time.sleep(REPORT_INTERVAL)
+            print(probe.report() + "\n")
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MQTT delivery latency and loss probe")
+    parser.add_argument("--host", default="localhost", help="MQTT broker host")
+    parser.add_argument("--port", type=int, default=1883, help="MQTT broker port")
+    parser.add_argument(
+        "--topic", action="append", help="Topic filter (repeatable, default: position+sound)"
+    )
+    parser.add_argument(
+        "--mode",
+        choices=["paho", "hub"],
+        default="paho",
+        help="paho: plain client callback; hub: MQTTHub + Qt signal (dashboard path)",
+    )
+    parser.add_argument(
+        "--duration", type=float, default=0.0, help="Seconds to run (0 = until Ctrl+C)"
+    )
+    args = parser.parse_args()
+
+    probe = LatencyProbe()
+    topics = args.topic or DEFAULT_TOPICS
+    if args.mode == "hub":
+        run_hub(probe, args.host, args.port, topics, args.duration)
+    else:
+        run_paho(probe, args.host, args.port, topics, args.duration)
+    print("Final:\n" + probe.report())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+MQTT load generator simulating many robots, beacons and sound events.
+
+Publishes position and sound messages at fixed per-robot rates on one
+connection, each robot under its own sar-robot/<robot_id>/ namespace
+(robot-1 ... robot-N). Message order per topic is preserved, so the
+latency probe can detect loss from the per-topic sequence numbers. Every
+record carries its send time ("timestamp") and sequence ("seq"); binary
+payloads carry them in the header.
+
+    # Self-contained: in-process broker + probe, 20 robots x 5 beacons
+    python -m dashboard.src.mqtt_load_generator --local --probe \\
+        --robots 20 --beacons 5 --position-rate 10 --sound-rate 5
+
+    # Against a real broker, with the dashboard or the probe subscribed
+    python -m dashboard.src.mqtt_load_generator --host vlg2.local --format binary
+"""
+
+import argparse
+import heapq
+import json
+import random
+import threading
+import time
+
+import paho.mqtt.client as mqtt
+
+from common.sar_codec import encode_positions, encode_sound
+from common.sar_topics import POSITION, SOUND, legacy_topic, robot_topic
+from .mini_broker import MiniBroker
+from .mqtt_latency_probe import DEFAULT_TOPICS, LatencyProbe, run_paho
+
+POSITION_RANGE = 80.0  # beacons wander within +-POSITION_RANGE
+
+
+class LoadGenerator:
+    def __init__(
+        self,
+        client,
+        robots=1,
+        beacons=3,
+        position_rate=10.0,
+        sound_rate=5.0,
+        payload_format="json",
+        batch_beacons=False,
+        legacy_topics=False,
+    ):
+        self.client = client
+        self.robots = robots
+        self.beacons = beacons
+        self.position_rate = position_rate
+        self.sound_rate = sound_rate
+        self.binary = payload_format == "binary"
+        # One message with all of a robot's beacons instead of one per beacon
+        self.batch_beacons = batch_beacons
+        # Legacy layout: every robot shares sar-robot/<name>
+        self.legacy_topics = legacy_topics
+        self.sequence = {}
+        self.sent = 0
+        self.sent_bytes = 0
+        self.late = 0  # publishes more than one period behind schedule
+        self._positions = [
+            [random.uniform(-POSITION_RANGE, POSITION_RANGE) for _ in range(2)]
+            for _ in range(robots * beacons)
+        ]
+
+    def _beacon_id(self, robot, beacon):
+        if self.legacy_topics:
+            # Shared topic, so beacon IDs must be unique across robots
+            return f"beacon-{robot * self.beacons + beacon + 1}"
+        return f"beacon-{beacon + 1}"
+
+    def _topic(self, robot, name):
+        if self.legacy_topics:
+            return legacy_topic(name)
+        return robot_topic(f"robot-{robot + 1}", name)
+
+    def _position_messages(self, robot):
+        coords = {}
+        for beacon in range(self.beacons):
+            pos = self._positions[robot * self.beacons + beacon]
+            for axis in range(2):
+                pos[axis] = min(
+                    max(pos[axis] + random.gauss(0.0, 0.5), -POSITION_RANGE), POSITION_RANGE
+                )
+            coords[self._beacon_id(robot, beacon)] = (pos[0], pos[1])
+        if self.batch_beacons:
+            return [coords]
+        return [{beacon_id: xy} for beacon_id, xy in coords.items()]
+
+    def _publish(self, topic, build):
+        seq = self.sequence.get(topic, 0)
+        self.sequence[topic] = seq + 1
+        payload = build(seq, time.time())
+        self.client.publish(topic, payload)
+        self.sent += 1
+        self.sent_bytes += len(payload)
+
+    def publish_positions(self, robot):
+        topic = self._topic(robot, POSITION)
+        for coords in self._position_messages(robot):
+            if self.binary:
+                self._publish(topic, lambda seq, t: encode_positions(coords, seq, t))
+            else:
+                self._publish(
+                    topic,
+                    lambda seq, t: json.dumps(
+                        {
+                            beacon_id: {"x": x, "y": y, "timestamp": t, "seq": seq}
+                            for beacon_id, (x, y) in coords.items()
+                        }
+                    ),
+                )
+
+    def publish_sound(self, robot):
+        angle = random.uniform(0.0, 300.0)
+        confidence = random.random()
+        topic = self._topic(robot, SOUND)
+        if self.binary:
+            self._publish(topic, lambda seq, t: encode_sound([(angle, confidence)], seq, t))
+        else:
+            self._publish(
+                topic,
+                lambda seq, t: json.dumps(
+                    {"position": angle, "human_confidence": confidence, "timestamp": t, "seq": seq}
+                ),
+            )
+
+    def run(self, duration, stop_event=None):
+        """Publish on schedule for duration seconds (0 = until stop_event)."""
+        schedule = []
+        start = time.monotonic()
+        for robot in range(self.robots):
+            # Spread robots over the period so they do not publish in bursts
+            for rate, action in (
+                (self.position_rate, self.publish_positions),
+                (self.sound_rate, self.publish_sound),
+            ):
+                if rate > 0:
+                    offset = random.random() / rate
+                    heapq.heappush(schedule, (start + offset, 1.0 / rate, id(action), robot, action))
+        end = start + duration if duration > 0 else None
+
+        while schedule and not (stop_event is not None and stop_event.is_set()):
+            due, period, key, robot, action = heapq.heappop(schedule)
+            if end is not None and due >= end:
+                break
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            elif -delay > period:
+                self.late += 1
+            action(robot)
+            heapq.heappush(schedule, (due + period, period, key, robot, action))
+        return time.monotonic() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SAR robot MQTT load generator")
+    parser.add_argument("--host", default="localhost", help="MQTT broker host")
+    parser.add_argument("--port", type=int, default=1883, help="MQTT broker port")
+    parser.add_argument(
+        "--local", action="store_true", help="Start an in-process stand-in broker on --port"
+    )
+    parser.add_argument(
+        "--probe", action="store_true", help="Also run the latency probe in this process"
+    )
+    parser.add_argument("--robots", type=int, default=1, help="Number of simulated robots")
+    parser.add_argument("--beacons", type=int, default=3, help="Beacons per robot")
+    parser.add_argument(
+        "--position-rate", type=float, default=10.0, help="Position updates per robot per second"
+    )
+    parser.add_argument(
+        "--sound-rate", type=float, default=5.0, help="Sound events per robot per second"
+    )
+    parser.add_argument(
+        "--batch-beacons",
+        action="store_true",
+        help="Send all beacons of a robot in one message (default: one per beacon)",
+    )
+    parser.add_argument(
+        "--legacy-topics",
+        action="store_true",
+        help="Publish on the shared sar-robot/<name> topics instead of per robot",
+    )
+    parser.add_argument("--format", choices=["json", "binary"], default="json")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds (0 = forever)")
+    args = parser.parse_args()
+
+    broker = None
+    if args.local:
+        broker = MiniBroker("127.0.0.1", args.port)
+        broker.start()
+        args.host = "127.0.0.1"
+        print(f"Stand-in broker listening on 127.0.0.1:{args.port}")
+
+    probe = None
+    probe_thread = None
+    if args.probe:
+        probe = LatencyProbe()
+        probe_thread = threading.Thread(
+            target=run_paho,
+            args=(probe, args.host, args.port, DEFAULT_TOPICS, args.duration + 1.0),
+            daemon=True,
+        )
+        probe_thread.start()
+        time.sleep(0.5)  # Let the probe subscribe before the first message
+
+    client = mqtt.Client()
+    client.connect(args.host, args.port, 60)
+    client.loop_start()
+    generator = LoadGenerator(
+        client,
+        robots=args.robots,
+        beacons=args.beacons,
+        position_rate=args.position_rate,
+        sound_rate=args.sound_rate,
+        payload_format=args.format,
+        batch_beacons=args.batch_beacons,
+        legacy_topics=args.legacy_topics,
+    )
+    messages_per_s = args.robots * (
+        args.position_rate * (1 if args.batch_beacons else args.beacons) + args.sound_rate
+    )
+    print(
+        f"Publishing {args.robots} robots x {args.beacons} beacons "
+        f"(~{messages_per_s:.0f} msg/s, {args.format})"
+    )
+    try:
+        elapsed = generator.run(args.duration)
+    except KeyboardInterrupt:
+        elapsed = args.duration
+    finally:
+        time.sleep(0.5)  # Let paho flush queued publishes
+        client.loop_stop()
+        client.disconnect()
+
+    print(
+        f"Sent {generator.sent} messages ({generator.sent_bytes / 1e6:.2f} MB) in "
+        f"{elapsed:.1f} s = {generator.sent / max(elapsed, 1e-9):.0f} msg/s, "
+        f"{generator.late} late"
+    )
+    if probe_thread is not None:
+        probe_thread.join()
+    if broker is not None:
+        print(
+            f"Broker: {broker.messages_in} in, {broker.messages_out} out, "
+            f"{broker.dropped} dropped"
+        )
+        broker.stop()
+    if probe is not None:
+        print("Probe:\n" + probe.report())
+
+
+if __name__ == "__main__":
+    main()
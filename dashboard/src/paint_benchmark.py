@@ -0,0 +1,168 @@
+"""
+Offscreen paint-time benchmark for the radar and map widgets.
+
+Renders each widget into a QImage repeatedly and reports per-paint times
+for three cases:
+
+    cold   background cache invalidated before every paint (the cost of a
+           resize, and roughly what every paint cost before the cache)
+    full   whole widget repainted from the cached background
+    dirty  only the region a single update repaints (one radar section,
+           one beacon dot)
+
+and for the map with --trail-beacons trails of --trail-seconds at 10 Hz:
+
+    cold    every trail rebuilt from its samples (after a resize or rescale)
+    redraw  polylines rebuilt from the pixel-decimated trails (after a new
+            sample or the 1 s refresh)
+    warm    cached polylines
+
+    python -m dashboard.src.paint_benchmark --sections 36 --active 12 --beacons 20
+    python -m dashboard.src.paint_benchmark --trail-beacons 10 --trail-seconds 3600
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+from PySide6.QtCore import QPoint, QPointF
+from PySide6.QtGui import QImage, QRegion
+from PySide6.QtWidgets import QApplication
+
+from .map_widget import MapWidget
+from .radar_widget import RadarWidget
+from .trails import TrailHistory
+
+
+def _time_paints(widget, iterations, region=None, before=None):
+    """Milliseconds per render of widget (or of region) into an offscreen image."""
+    image = QImage(widget.size(), QImage.Format.Format_ARGB32_Premultiplied)
+    source = QRegion(widget.rect()) if region is None else QRegion(region)
+    timings = []
+    for _ in range(iterations):
+        if before is not None:
+            before()
+        started = time.perf_counter()
+        widget.render(image, QPoint(), source)
+        timings.append((time.perf_counter() - started) * 1000.0)
+    timings.sort()
+    return {
+        "mean_ms": sum(timings) / len(timings),
+        "p50_ms": timings[len(timings) // 2],
+        "p99_ms": timings[min(len(timings) - 1, int(len(timings) * 0.99))],
+    }
+
+
+def _report(name, results):
+    for case, stats in results.items():
+        print(
+            f"{name:<6} {case:<7} mean {stats['mean_ms']:7.3f} ms  "
+            f"p50 {stats['p50_ms']:7.3f} ms  p99 {stats['p99_ms']:7.3f} ms"
+        )
+
+
+def benchmark_radar(size, sections, active, iterations):
+    radar = RadarWidget(num_sections=sections)
+    radar.resize(size, size)
+    # Fill the state directly: update_section would start the fade timer
+    for section in random.sample(range(sections), min(active, sections)):
+        radar.peak_confidences[section] = random.random()
+        radar.section_confidences[section] = radar.peak_confidences[section]
+        radar.active[section] = True
+    one_section = radar._section_rect(int(radar.active.argmax()))
+    return {
+        "cold": _time_paints(radar, iterations, before=radar._invalidate_background),
+        "full": _time_paints(radar, iterations),
+        "dirty": _time_paints(radar, iterations, region=one_section),
+    }
+
+
+def benchmark_map(size, beacons, iterations):
+    map_widget = MapWidget()
+    map_widget.resize(size, size)
+    map_widget.update_beacon_positions(
+        [
+            (f"beacon-{beacon + 1}", random.uniform(-80, 80), random.uniform(-80, 80))
+            for beacon in range(beacons)
+        ]
+    )
+    one_point = map_widget._point_rect(QPointF(0.0, 0.0))
+
+    def invalidate():
+        map_widget._background = None
+
+    return {
+        "cold": _time_paints(map_widget, iterations, before=invalidate),
+        "full": _time_paints(map_widget, iterations),
+        "dirty": _time_paints(map_widget, iterations, region=one_point),
+    }
+
+
+def benchmark_trails(size, beacons, seconds, iterations):
+    map_widget = MapWidget()
+    map_widget.resize(size, size)
+    trails = TrailHistory()
+    rng = np.random.default_rng(1)
+    samples = int(seconds * 10)
+    now = time.monotonic()
+    for beacon in range(beacons):
+        beacon_id = f"beacon-{beacon + 1}"
+        walk = np.clip(np.cumsum(rng.normal(0.0, 0.15, (samples, 2)), axis=0), -70, 70)
+        times = now - seconds + np.arange(samples) * 0.1
+        for (x, y), t in zip(walk.tolist(), times.tolist()):
+            trails.append(beacon_id, x, y, t)
+        map_widget.update_beacon_position(beacon_id, x, y)
+    map_widget.set_trail_length(seconds)
+    map_widget.set_trails(trails)
+
+    def invalidate():
+        map_widget._screen_trails = {}
+        map_widget._trail_cache = {}
+
+    def redraw():
+        map_widget._trail_cache = {}
+
+    return {
+        "cold": _time_paints(map_widget, iterations, before=invalidate),
+        "redraw": _time_paints(map_widget, iterations, before=redraw),
+        "warm": _time_paints(map_widget, iterations),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Radar/map paint-time benchmark (offscreen)")
+    parser.add_argument("--size", type=int, default=480, help="Widget width and height in pixels")
+    parser.add_argument("--sections", type=int, default=36, help="Radar sections")
+    parser.add_argument("--active", type=int, default=12, help="Radar sections with confidence")
+    parser.add_argument("--beacons", type=int, default=20, help="Beacons on the map")
+    parser.add_argument("--trail-beacons", type=int, default=0, help="Beacons with trails")
+    parser.add_argument(
+        "--trail-seconds", type=float, default=3600.0, help="Trail history per beacon (10 Hz)"
+    )
+    parser.add_argument("--iterations", type=int, default=300, help="Paints per case")
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)  # noqa: F841
+    random.seed(1)
+    print(
+        f"{args.size}x{args.size} px, {args.sections} sections ({args.active} active), "
+        f"{args.beacons} beacons, {args.iterations} paints per case"
+    )
+    _report("radar", benchmark_radar(args.size, args.sections, args.active, args.iterations))
+    _report("map", benchmark_map(args.size, args.beacons, args.iterations))
+    if args.trail_beacons:
+        _report(
+            "trails",
+            benchmark_trails(
+                args.size, args.trail_beacons, args.trail_seconds, args.iterations
+            ),
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+from PySide6.QtWidgets import QLabel
+from PySide6.QtCore import Qt, QTimer
+
+from .perf_monitor import PERF
+
+HUD_REFRESH_MS = 500
+
+
+class PerfHUD(QLabel):
+    """Translucent overlay with FPS, per-stage p50/p99 latency and queue depths."""
+
+    def __init__(self, parent=None, monitor=PERF):
+        super().__init__(parent)
+        self.monitor = monitor
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.setTextFormat(Qt.TextFormat.PlainText)
+        self.setAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop)
+        self.setStyleSheet(
+            """
+            QLabel {
+                background-color: rgba(0, 0, 0, 170);
+                color: #7CFC00;
+                font-family: monospace;
+                font-size: 11px;
+                padding: 6px;
+                border-radius: 4px;
+            }
+            """
+        )
+        self._timer = QTimer(self)
+        self._timer.setInterval(HUD_REFRESH_MS)
+        self._timer.timeout.connect(self.refresh)
+        self.hide()
+
+    def toggle(self):
+        self.setVisible(not self.isVisible())
+
+    def showEvent(self, event):
+        self.refresh()
+        self._timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self._timer.stop()
+        super().hideEvent(event)
+
+    def refresh(self):
+        snap = self.monitor.snapshot()
+        lines = []
+
+        rates = "  ".join(
+            f"{name} {r['per_s']:.1f}/s" for name, r in snap["rates"].items()
+        )
+        if rates:
+            lines.append(rates)
+        gauges = "  ".join(
+            f"{name} {value if value is not None else '-'}"
+            for name, value in snap["gauges"].items()
+        )
+        if gauges:
+            lines.append(f"queues: {gauges}")
+
+        lines.append(f"{'stage':<18}{'n':>6}{'p50':>8}{'p99':>8}{'max':>8}  (ms)")
+        for name, s in snap["stages"].items():
+            lines.append(
+                f"{name:<18}{s['count']:>6}{_fmt(s['p50_ms'])}{_fmt(s['p99_ms'])}"
+                f"{_fmt(s['max_ms'])}"
+            )
+        self.setText("\n".join(lines))
+        self.adjustSize()
+        if self.parentWidget() is not None:
+            # Keep the overlay in the top-right corner of its parent
+            self.move(self.parentWidget().width() - self.width() - 8, 8)
+        self.raise_()
+
+
+def _fmt(value):
+    if value != value:  # NaN, no samples in the window
+        return f"{'-':>8}"
+    return f"{value:>8.2f}" if value < 100 else f"{value:>8.0f}"
@@ -0,0 +1,270 @@
+"""
+Lightweight pipeline instrumentation for the dashboard.
+
+Code on any thread reports stage durations with PERF.record(stage, seconds)
+(measured with time.perf_counter), counts events with PERF.mark(name) and
+exposes queue depths with PERF.add_gauge(name, callable). Durations go into
+fixed log-spaced histograms backed by preallocated NumPy arrays, so
+recording is a bisect plus a few increments and never allocates.
+
+Each histogram keeps lifetime counts plus two rotating windows (counts,
+sum and max), so the HUD shows percentiles, mean and max all over roughly
+the last WINDOW_SECONDS..2*WINDOW_SECONDS. The windows rotate on the
+first record or mark after WINDOW_SECONDS (or on a snapshot), so they stay
+current whether or not anything reads them.
+Updates are not locked; a count may occasionally be lost when a window
+rotates, which is acceptable for monitoring.
+"""
+
+import bisect
+import csv
+import json
+import math
+import threading
+import time
+
+import numpy as np
+
+# 64 log-spaced buckets from 10 us to 10 s (~25% resolution per bucket)
+BUCKET_EDGES_MS = np.geomspace(0.01, 10000.0, 64)
+WINDOW_SECONDS = 5.0
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with lifetime and windowed counts."""
+
+    def __init__(self, edges_ms=BUCKET_EDGES_MS):
+        self.edges_ms = np.asarray(edges_ms, dtype=np.float64)
+        self._edges = self.edges_ms.tolist()  # bisect on a list is fastest
+        nbins = len(self._edges) + 1  # last bin catches overflow
+        # Representative value per bin (geometric centre, edges for the ends)
+        centres = np.sqrt(self.edges_ms[1:] * self.edges_ms[:-1])
+        self._values = np.concatenate(
+            ([self.edges_ms[0]], centres, [self.edges_ms[-1]])
+        )
+        self.counts = np.zeros(nbins, dtype=np.int64)
+        self._windows = np.zeros((2, nbins), dtype=np.int64)
+        self._window_total_ms = [0.0, 0.0]
+        self._window_max_ms = [0.0, 0.0]
+        self._current = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, seconds):
+        ms = seconds * 1000.0
+        i = bisect.bisect_left(self._edges, ms)
+        current = self._current
+        self.counts[i] += 1
+        self._windows[current, i] += 1
+        self._window_total_ms[current] += ms
+        if ms > self._window_max_ms[current]:
+            self._window_max_ms[current] = ms
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def rotate(self):
+        """Start a new window, dropping the oldest one."""
+        self._current ^= 1
+        self._windows[self._current].fill(0)
+        self._window_total_ms[self._current] = 0.0
+        self._window_max_ms[self._current] = 0.0
+
+    @property
+    def count(self):
+        return int(self.counts.sum())
+
+    def recent_counts(self):
+        return self._windows.sum(axis=0)
+
+    def percentile(self, p, counts=None, max_ms=None):
+        """Approximate p-th percentile in ms (bucket resolution)."""
+        if counts is None:
+            counts = self.counts
+        if max_ms is None:
+            max_ms = self.max_ms
+        total = counts.sum()
+        if total == 0:
+            return math.nan
+        cumulative = np.cumsum(counts)
+        i = int(np.searchsorted(cumulative, total * p / 100.0))
+        # Never report more than the largest sample seen
+        return min(float(self._values[min(i, len(self._values) - 1)]), max_ms)
+
+    def summary(self, recent=True):
+        """Percentiles, max and mean over the recent windows or the lifetime."""
+        if recent:
+            counts = self.recent_counts()
+            total_ms = sum(self._window_total_ms)
+            max_ms = max(self._window_max_ms)
+        else:
+            counts = self.counts
+            total_ms = self.total_ms
+            max_ms = self.max_ms
+        n = int(counts.sum())
+        return {
+            "count": n,
+            "p50_ms": self.percentile(50, counts, max_ms),
+            "p90_ms": self.percentile(90, counts, max_ms),
+            "p99_ms": self.percentile(99, counts, max_ms),
+            "max_ms": max_ms if n else math.nan,
+            "mean_ms": total_ms / n if n else math.nan,
+        }
+
+    def reset(self):
+        self.counts.fill(0)
+        self._windows.fill(0)
+        self._window_total_ms = [0.0, 0.0]
+        self._window_max_ms = [0.0, 0.0]
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+
+class RateCounter:
+    """Events per second over the last rotation window."""
+
+    def __init__(self):
+        self.total = 0
+        self._window_count = 0
+        self._window_start = time.monotonic()
+        self.rate = 0.0
+
+    def mark(self, n=1):
+        self.total += n
+        self._window_count += n
+
+    def rotate(self, now):
+        elapsed = now - self._window_start
+        if elapsed > 0:
+            self.rate = self._window_count / elapsed
+        self._window_count = 0
+        self._window_start = now
+
+
+class PerfMonitor:
+    def __init__(self, window_seconds=WINDOW_SECONDS):
+        self.window_seconds = window_seconds
+        self.histograms = {}
+        self.rates = {}
+        self.gauges = {}
+        self._lock = threading.Lock()  # Only guards creation of new entries
+        self._rotate_lock = threading.Lock()
+        self._last_rotate = time.monotonic()
+        self._next_rotate = self._last_rotate + window_seconds
+        self.started = time.time()
+
+    def histogram(self, stage):
+        hist = self.histograms.get(stage)
+        if hist is None:
+            with self._lock:
+                hist = self.histograms.setdefault(stage, LatencyHistogram())
+        return hist
+
+    def record(self, stage, seconds):
+        """Record one duration (seconds) for a pipeline stage."""
+        hist = self.histograms.get(stage)
+        if hist is None:
+            hist = self.histogram(stage)
+        hist.add(seconds)
+        if time.monotonic() >= self._next_rotate:
+            self.maybe_rotate()
+
+    def mark(self, name, n=1):
+        """Count an event, e.g. a displayed video frame."""
+        counter = self.rates.get(name)
+        if counter is None:
+            with self._lock:
+                counter = self.rates.setdefault(name, RateCounter())
+        counter.mark(n)
+        if time.monotonic() >= self._next_rotate:
+            self.maybe_rotate()
+
+    def add_gauge(self, name, func):
+        """Register a callable returning a current value (e.g. queue depth)."""
+        self.gauges[name] = func
+
+    def remove_gauge(self, name):
+        self.gauges.pop(name, None)
+
+    def maybe_rotate(self):
+        # Several threads may see the deadline pass; only one rotates
+        if not self._rotate_lock.acquire(blocking=False):
+            return
+        try:
+            now = time.monotonic()
+            if now - self._last_rotate >= self.window_seconds:
+                for hist in list(self.histograms.values()):
+                    hist.rotate()
+                for counter in list(self.rates.values()):
+                    counter.rotate(now)
+                self._last_rotate = now
+                self._next_rotate = now + self.window_seconds
+        finally:
+            self._rotate_lock.release()
+
+    def snapshot(self, recent=True):
+        """Current statistics as plain Python types."""
+        self.maybe_rotate()
+        gauges = {}
+        for name, func in list(self.gauges.items()):
+            try:
+                gauges[name] = func()
+            except Exception:
+                gauges[name] = None
+        return {
+            "time": time.time(),
+            "stages": {
+                name: hist.summary(recent)
+                for name, hist in sorted(self.histograms.items())
+            },
+            "rates": {
+                name: {"per_s": counter.rate, "total": counter.total}
+                for name, counter in sorted(self.rates.items())
+            },
+            "gauges": gauges,
+        }
+
+    def reset(self):
+        for hist in self.histograms.values():
+            hist.reset()
+
+    # --- Export ---
+    def export_json(self, path):
+        """Write lifetime statistics and raw bucket counts as JSON."""
+        data = self.snapshot(recent=False)
+        data["started"] = self.started
+        data["bucket_edges_ms"] = BUCKET_EDGES_MS.tolist()
+        data["buckets"] = {
+            name: hist.counts.tolist() for name, hist in sorted(self.histograms.items())
+        }
+        with open(path, "w") as f:
+            json.dump(_without_nan(data), f, indent=2)
+
+    def export_csv(self, path):
+        """Write one row per stage with lifetime percentiles."""
+        data = self.snapshot(recent=False)
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["stage", "count", "mean_ms", "p50_ms", "p90_ms", "p99_ms", "max_ms"])
+            for name, s in data["stages"].items():
+                writer.writerow(
+                    [name, s["count"], s["mean_ms"], s["p50_ms"], s["p90_ms"],
+                     s["p99_ms"], s["max_ms"]]
+                )
+            for name, r in data["rates"].items():
+                writer.writerow([f"{name} (per s)", r["total"], r["per_s"], "", "", "", ""])
+
+
+def _without_nan(value):
+    """Replace NaN (empty histograms) with None so the JSON stays standard."""
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, dict):
+        return {k: _without_nan(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_without_nan(v) for v in value]
+    return value
+
+
+# Shared instance used by all dashboard threads
+PERF = PerfMonitor()
@@ -1,33 +1,84 @@
 from PySide6.QtWidgets import QWidget
-from PySide6.QtCore import Qt, QTimer, Signal
-from PySide6.QtGui import QPainter, QColor, QPen, QBrush, QFont
+from PySide6.QtCore import Qt, QRect, QRectF, QTimer, Signal
+from PySide6.QtGui import QPainter, QColor, QPen, QBrush, QFont, QImage, QPixmap
 import math
+import time
+
+import numpy as np
 
 # Define the input angle that corresponds to visual North (top of the radar)
 INPUT_NORTH_ANGLE_OFFSET = 150.0
 
+MAX_SECTIONS = 360
+FADE_INTERVAL_MS = 50  # Animation tick while any section is fading
+MAX_LABELLED_SECTIONS = 72  # Confidence text only fits on wider sections
+
+
+def _heat_lut():
+    """256 premultiplied ARGB colours: transparent -> yellow -> red -> dark red."""
+    level = np.linspace(0.0, 1.0, 256)
+    alpha = np.clip(level * 4.0, 0.0, 1.0)
+    red = np.where(level < 0.5, 255.0, 255.0 - (level - 0.5) * 254.0)
+    green = np.clip(255.0 - level * 510.0, 0.0, 255.0)
+    blue = np.zeros_like(level)
+    argb = (
+        (np.round(alpha * 255).astype(np.uint32) << 24)
+        | (np.round(red * alpha).astype(np.uint32) << 16)
+        | (np.round(green * alpha).astype(np.uint32) << 8)
+        | np.round(blue * alpha).astype(np.uint32)
+    )
+    return argb
+
+
+HEAT_LUT = _heat_lut()
+
 
 class RadarWidget(QWidget):
     # Signal emitted when a section's confidence is reset
     section_reset = Signal(int)  # section index
 
-    def __init__(self, parent=None, reset_timeout=5000):
+    def __init__(self, parent=None, reset_timeout=5000, num_sections=36):
         super().__init__(parent)
         self.setMinimumSize(320, 320)  # Minimum size to ensure visibility
 
         # Configuration
-        self.num_sections = 36  # Changed from 12 to 36
-        self.section_angle = 360.0 / self.num_sections  # Should be 10.0
         self.reset_timeout = reset_timeout  # milliseconds
 
-        # State
-        self.section_confidences = [0.0] * self.num_sections
-        self.section_timers = [QTimer(self) for _ in range(self.num_sections)]
+        # One timer animates every fading section and stops when all are idle
+        self._fade_timer = QTimer(self)
+        self._fade_timer.setInterval(FADE_INTERVAL_MS)
+        self._fade_timer.timeout.connect(self._fade)
+
+        # Static layer (idle sections) and per-section geometry, rebuilt
+        # only when the size or the number of sections changes
+        self._background = None
+        self._geometry_key = None
+        self._label_font = QFont("Arial", 8)
+
+        # Optional SoundHistory drawn as a heatmap under the live sections
+        self._history = None
+        self._heat_key = None
+        self._heat_image = None
+        self._history_timer = QTimer(self)
+        self._history_timer.timeout.connect(self.update)
 
-        # Configure timers
-        for i, timer in enumerate(self.section_timers):
-            timer.setSingleShot(True)
-            timer.timeout.connect(lambda idx=i: self._reset_section(idx))
+        self.set_num_sections(num_sections)
+
+    def set_num_sections(self, num_sections):
+        """Change the angular resolution (1..MAX_SECTIONS); clears the radar."""
+        if not 1 <= num_sections <= MAX_SECTIONS:
+            raise ValueError(f"num_sections must be between 1 and {MAX_SECTIONS}")
+        self._fade_timer.stop()
+        self.num_sections = num_sections
+        self.section_angle = 360.0 / num_sections
+        # State: confidence at the last update, when it happened, and the
+        # faded value currently displayed
+        self.peak_confidences = np.zeros(num_sections)
+        self.updated_at = np.zeros(num_sections)
+        self.active = np.zeros(num_sections, dtype=bool)
+        self.section_confidences = np.zeros(num_sections)
+        self._label_font = QFont("Arial", 7 if num_sections > 24 else 8)
+        self._invalidate_background()
 
     def update_section(self, position_degrees, confidence):
         """Update a section with new confidence value, considering custom North."""
@@ -40,6 +91,24 @@ class RadarWidget(QWidget):
         # This means input 0 degrees is visually at (0 - 150 + 360)%360 = 210 degrees on our visual radar (0 is top).
         # And input 300 degrees is visually at (300 - 150 + 360)%360 = 150 degrees on our visual radar.
 
+        section = self.section_index(position_degrees)
+
+        # Update confidence; it then fades out over reset_timeout
+        self.peak_confidences[section] = confidence
+        self.section_confidences[section] = confidence
+        self.updated_at[section] = time.monotonic()
+        self.active[section] = True
+        if not self._fade_timer.isActive():
+            self._fade_timer.start()
+
+        # Trigger repaint of that section only (the heatmap changes everywhere)
+        if self._history is not None:
+            self.update()
+        else:
+            self.update(self._section_rect(section))
+
+    def section_index(self, position_degrees):
+        """Radar section for an input angle (safe to call from any thread)."""
         visual_angle_degrees = (
             float(position_degrees) - INPUT_NORTH_ANGLE_OFFSET + 360.0
         ) % 360.0
@@ -48,99 +117,223 @@ class RadarWidget(QWidget):
         section = int(visual_angle_degrees / self.section_angle)
 
         # Clamp section index to be within valid range
-        section = max(0, min(section, self.num_sections - 1))
+        return max(0, min(section, self.num_sections - 1))
 
-        # Update confidence
-        self.section_confidences[section] = confidence
+    def _fade(self):
+        """Fade all active sections; reset the ones older than reset_timeout."""
+        active = self.active
+        dirty = np.flatnonzero(active)
+        age = (time.monotonic() - self.updated_at[active]) / (self.reset_timeout / 1000.0)
+        # Quadratic ease-out: holds close to the peak at first, 0 at the timeout
+        self.section_confidences[active] = self.peak_confidences[active] * np.clip(
+            1.0 - age * age, 0.0, 1.0
+        )
+        expired = np.flatnonzero(active)[age >= 1.0]
+        if len(expired):
+            self.active[expired] = False
+            self.section_confidences[expired] = 0.0
+            self.peak_confidences[expired] = 0.0
+            for section_idx in expired:
+                self.section_reset.emit(int(section_idx))
+        if not self.active.any():
+            self._fade_timer.stop()
+        self._update_sections(dirty)
 
-        # Reset and start timer for this section
-        self.section_timers[section].stop()
-        self.section_timers[section].start(self.reset_timeout)
+    def clear(self):
+        """Reset every section without emitting section_reset."""
+        self._fade_timer.stop()
+        dirty = np.flatnonzero(self.active)
+        self.active[:] = False
+        self.peak_confidences[:] = 0.0
+        self.section_confidences[:] = 0.0
+        self._update_sections(dirty)
 
-        # Trigger repaint
+    def set_reset_timeout(self, milliseconds):
+        """Set the fade-out duration; applies to sections already fading."""
+        self.reset_timeout = milliseconds
+
+    def set_history(self, history):
+        """Show a SoundHistory as a heatmap (None hides it)."""
+        self._history = history
+        self._heat_key = None
+        if history is None:
+            self._history_timer.stop()
+        else:
+            # Scroll the heatmap as buckets age even without new detections
+            self._history_timer.start(int(history.bucket_seconds * 1000))
         self.update()
 
-    def _reset_section(self, section_idx):
-        """Reset a section's confidence to 0."""
-        self.section_confidences[section_idx] = 0.0
-        self.section_reset.emit(section_idx)
+    # --- Geometry and cached background ---
+    def _invalidate_background(self):
+        self._background = None
+        self._geometry_key = None
         self.update()
 
-    def set_reset_timeout(self, milliseconds):
-        """Set the timeout duration for resetting sections."""
-        self.reset_timeout = milliseconds
-        for timer in self.section_timers:
-            if timer.isActive():
-                timer.setInterval(milliseconds)
+    def resizeEvent(self, event):
+        self._invalidate_background()
+        super().resizeEvent(event)
 
-    def paintEvent(self, event):
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    def _ensure_geometry(self):
+        """Precompute pie angles, dirty rects and label boxes for this size."""
+        key = (self.width(), self.height(), self.num_sections)
+        if key == self._geometry_key:
+            return
+        self._geometry_key = key
+        self._background = None
 
-        width = self.width()
-        height = self.height()
-        center_x = width / 2
-        center_y = height / 2
-        radius = min(width, height) / 2 - 20  # Leave margin for text
-
-        # Draw sections
-        for i in range(self.num_sections):
-            # visual_start_angle_deg is the start angle for drawing the i-th section
-            # on the GUI, where 0 degrees is at the top (North).
-            visual_start_angle_deg = i * self.section_angle
-            confidence = self.section_confidences[i]
+        center_x = self.width() / 2
+        center_y = self.height() / 2
+        radius = min(self.width(), self.height()) / 2 - 20  # Leave margin for text
+        self._pie_rect = QRect(
+            int(center_x - radius), int(center_y - radius), int(radius * 2), int(radius * 2)
+        )
 
-            if confidence == 0:
-                color = QColor(200, 200, 200)  # Light gray
-            else:
-                red_value = int(
-                    255 - (confidence * 155)
-                )  # 255 (light red) to 100 (darker red)
-                color = QColor(255, red_value, red_value)
-
-            painter.setPen(QPen(Qt.GlobalColor.black, 1))
-            painter.setBrush(QBrush(color))
-
-            # Qt's 0 degrees is at 3 o'clock. We need to map our visual_start_angle_deg.
-            # If visual_start_angle_deg = 0 (top), Qt angle is 90.
-            # If visual_start_angle_deg = 90 (right), Qt angle is 0.
-            # Formula: qt_angle = 90 - visual_angle
-            qt_paint_start_angle = (90.0 - visual_start_angle_deg) * 16.0
-            qt_paint_span_angle = (
-                -self.section_angle * 16.0
-            )  # Negative for clockwise span
-
-            painter.drawPie(
-                int(center_x - radius),
-                int(center_y - radius),
-                int(radius * 2),
-                int(radius * 2),
-                int(qt_paint_start_angle),
-                int(qt_paint_span_angle),
+        # Qt's 0 degrees is at 3 o'clock and angles are in 1/16 degree, while
+        # visual 0 degrees is at the top (North): qt_angle = 90 - visual_angle.
+        # The span is negative to draw clockwise.
+        starts = np.arange(self.num_sections) * self.section_angle
+        self._qt_starts = [int((90.0 - start) * 16.0) for start in starts]
+        self._qt_span = int(-self.section_angle * 16.0)
+
+        # Text sits at 70% of the radius, at the middle of the section
+        mids = np.radians(starts + self.section_angle / 2.0)
+        text_radius = radius * 0.7
+        text_x = center_x + text_radius * np.sin(mids)
+        text_y = center_y - text_radius * np.cos(mids)
+        text_rect_width = 30
+        text_rect_height = 15
+        self._label_rects = [
+            QRect(
+                int(x - text_rect_width / 2),
+                int(y - text_rect_height / 2),
+                text_rect_width,
+                text_rect_height,
             )
+            for x, y in zip(text_x, text_y)
+        ]
+
+        # Bounding box of each wedge: centre, arc ends and any arc extreme
+        # (N/E/S/W) inside the section, padded for the pen and antialiasing
+        self._section_rects = []
+        for start in starts:
+            end = start + self.section_angle
+            angles = [start, end] + [a for a in (0, 90, 180, 270, 360) if start < a < end]
+            xs = [center_x] + [center_x + radius * math.sin(math.radians(a)) for a in angles]
+            ys = [center_y] + [center_y - radius * math.cos(math.radians(a)) for a in angles]
+            rect = QRectF(min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys))
+            self._section_rects.append(rect.toAlignedRect().adjusted(-2, -2, 2, 2))
+        self._heat_geometry = None  # Built on first use by _history_image()
+
+    def _section_rect(self, section):
+        self._ensure_geometry()
+        rect = self._section_rects[section]
+        if self.num_sections <= MAX_LABELLED_SECTIONS:
+            rect = rect.united(self._label_rects[section])
+        return rect
 
-            if confidence > 0:
-                # Midpoint of the visual section for text placement
-                visual_mid_angle_deg = visual_start_angle_deg + self.section_angle / 2.0
-                visual_mid_angle_rad = math.radians(visual_mid_angle_deg)
+    def _update_sections(self, sections):
+        """Schedule a repaint of the bounding box of the given sections."""
+        if len(sections) == 0:
+            return
+        if self._history is not None:
+            self.update()
+            return
+        rect = QRect()
+        for section in sections:
+            rect = rect.united(self._section_rect(int(section)))
+        self.update(rect)
+
+    def _render_background(self):
+        """All sections idle: light gray pies with black outlines."""
+        ratio = self.devicePixelRatioF()
+        pixmap = QPixmap(int(self.width() * ratio), int(self.height() * ratio))
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(QPen(Qt.GlobalColor.black, 1))
+        painter.setBrush(QBrush(QColor(200, 200, 200)))  # Light gray
+        for qt_start in self._qt_starts:
+            painter.drawPie(self._pie_rect, qt_start, self._qt_span)
+        painter.end()
+        return pixmap
 
-                text_radius = radius * 0.7
-                text_x = center_x + text_radius * math.sin(visual_mid_angle_rad)
-                text_y = center_y - text_radius * math.cos(visual_mid_angle_rad)
+    def _build_heat_geometry(self, bins, buckets):
+        """Per disc pixel: flat index into the (age, bin) history array."""
+        rect = self._pie_rect
+        size = max(rect.width(), 1)
+        ys, xs = np.mgrid[0:size, 0:size]
+        dx = xs + 0.5 - size / 2.0
+        dy = ys + 0.5 - size / 2.0
+        distance = np.hypot(dx, dy) / (size / 2.0)
+        inside = distance < 1.0
+        # Visual angle, 0 = North, clockwise; rim = newest, centre = oldest
+        angle = np.degrees(np.arctan2(dx, -dy)) % 360.0
+        angle_bin = np.minimum((angle * (bins / 360.0)).astype(np.intp), bins - 1)
+        age = np.minimum(((1.0 - distance) * buckets).astype(np.intp), buckets - 1)
+        self._heat_geometry = (
+            (bins, buckets),
+            np.flatnonzero(inside),
+            (age * bins + angle_bin)[inside],
+            np.zeros(size * size, dtype=np.uint32),
+        )
 
-                painter.setPen(QPen(Qt.GlobalColor.black))
-                # Potentially smaller font if sections are very narrow
-                font_size = 7 if self.num_sections > 24 else 8
-                painter.setFont(QFont("Arial", font_size))
+    def _history_image(self):
+        """Colour-mapped heatmap of the history, re-rendered only on change."""
+        history = self._history
+        history.advance()
+        key = (self._geometry_key, history.version)
+        if key == self._heat_key:
+            return self._heat_image
+        shape = (history.bins, history.buckets)
+        if self._heat_geometry is None or self._heat_geometry[0] != shape:
+            self._build_heat_geometry(*shape)
+        _, pixels, source, buffer = self._heat_geometry
+        levels = np.clip(history.by_age().ravel()[source] * 255.0, 0, 255).astype(np.uint8)
+        buffer[pixels] = HEAT_LUT[levels]
+        size = max(self._pie_rect.width(), 1)
+        self._heat_image = QImage(
+            buffer.data, size, size, size * 4, QImage.Format.Format_ARGB32_Premultiplied
+        )
+        self._heat_key = key
+        return self._heat_image
+
+    def paintEvent(self, event):
+        self._ensure_geometry()
+        if self._background is None:
+            self._background = self._render_background()
+
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, self._background)
+        if self._history is not None:
+            painter.drawImage(self._pie_rect.topLeft(), self._history_image())
+
+        active = np.flatnonzero(self.section_confidences > 0)
+        if len(active) == 0:
+            return
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        dirty = event.rect()
+        labelled = self.num_sections <= MAX_LABELLED_SECTIONS
+        pen = QPen(Qt.GlobalColor.black, 1)
+        painter.setFont(self._label_font)
+
+        # Only active sections differ from the background; over the heatmap
+        # they are outlined instead of filled
+        for i in active:
+            if not dirty.intersects(self._section_rects[i]):
+                continue
+            confidence = self.section_confidences[i]
+            red_value = int(255 - (confidence * 155))  # 255 (light red) to 100 (darker red)
+            if self._history is not None:
+                painter.setPen(QPen(QColor(0, 90, 255), 2))
+                painter.setBrush(Qt.BrushStyle.NoBrush)
+            else:
+                painter.setPen(pen)
+                painter.setBrush(QBrush(QColor(255, red_value, red_value)))
+            painter.drawPie(self._pie_rect, self._qt_starts[i], self._qt_span)
+            painter.setPen(pen)
 
-                # Adjust text box size if needed, though it might be tight for 10-degree sections
-                text_rect_width = 30
-                text_rect_height = 15
+            if labelled:
                 painter.drawText(
-                    int(text_x - text_rect_width / 2),
-                    int(text_y - text_rect_height / 2),
-                    text_rect_width,
-                    text_rect_height,
-                    Qt.AlignmentFlag.AlignCenter,
-                    f"{confidence:.2f}",
+                    self._label_rects[i], Qt.AlignmentFlag.AlignCenter, f"{confidence:.2f}"
                 )
@@ -0,0 +1,78 @@
+"""
+Per-robot state for fleet missions.
+
+Every robot seen on the sar-robot/<robot_id>/... topics gets a RobotState
+in a dictionary keyed by robot ID. The GUI updates the store for all
+robots but only draws the selected one, so switching robots shows their
+latest beacons and sound detections immediately, along with their
+SoundHistory for the radar heatmap and TrailHistory for beacon trails.
+"""
+
+import time
+
+from PySide6.QtCore import QObject, Signal
+
+from .sound_history import SoundHistory
+from .trails import TrailHistory
+
+
+class RobotState:
+    __slots__ = ("robot_id", "beacons", "sound", "history", "trails", "messages", "last_seen")
+
+    def __init__(self, robot_id):
+        self.robot_id = robot_id
+        self.beacons = {}  # beacon_id -> (x, y)
+        self.sound = {}  # radar section -> (position degrees, confidence, monotonic time)
+        self.history = SoundHistory()
+        self.trails = TrailHistory()
+        self.messages = 0
+        self.last_seen = 0.0
+
+
+class RobotStore(QObject):
+    robot_added = Signal(str)  # robot ID
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.robots = {}
+
+    def __len__(self):
+        return len(self.robots)
+
+    def __contains__(self, robot_id):
+        return robot_id in self.robots
+
+    def get(self, robot_id):
+        """State for a robot, created (and announced) on first use."""
+        state = self.robots.get(robot_id)
+        if state is None:
+            state = self.robots[robot_id] = RobotState(robot_id)
+            self.robot_added.emit(robot_id)
+        return state
+
+    def update_sound(self, robot_id, section, position, confidence):
+        state = self.get(robot_id)
+        now = time.monotonic()
+        state.sound[section] = (position, confidence, now)
+        state.messages += 1
+        state.last_seen = now
+
+    def add_sound_history(self, robot_id, positions, confidences):
+        """Record a batch of detections in the robot's SoundHistory."""
+        self.get(robot_id).history.add(positions, confidences)
+
+    def update_beacon(self, robot_id, beacon_id, x, y):
+        state = self.get(robot_id)
+        state.beacons[beacon_id] = (x, y)
+        now = time.monotonic()
+        state.trails.append(beacon_id, x, y, now)
+        state.messages += 1
+        state.last_seen = now
+
+    def active_sound(self, robot_id, max_age):
+        """(position, confidence) of detections younger than max_age seconds."""
+        state = self.robots.get(robot_id)
+        if state is None:
+            return []
+        cutoff = time.monotonic() - max_age
+        return [(p, c) for p, c, t in state.sound.values() if t >= cutoff]
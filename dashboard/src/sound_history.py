@@ -0,0 +1,88 @@
+"""
+Where voices have been heard over the last few minutes.
+
+SoundHistory is a ring buffer of time buckets x angle bins. Detections are
+added with np.maximum.at into the current bucket; whenever time moves on
+by whole buckets the buffer is rotated and every older bucket decays
+exponentially, so a direction heard once fades out while one heard
+repeatedly as the pan sweeps stays bright. The radar renders it as a
+polar heatmap (newest at the rim, oldest at the centre).
+
+Bins are in radar (visual) angles, 0 = North, clockwise, so they line up
+with RadarWidget sections.
+"""
+
+import time
+
+import numpy as np
+
+from .radar_widget import INPUT_NORTH_ANGLE_OFFSET
+
+HISTORY_BINS = 72  # 5 degree angle bins
+HISTORY_BUCKET_SECONDS = 2.0
+HISTORY_SECONDS = 300.0  # five minutes
+HISTORY_HALF_LIFE = 60.0  # seconds for an old detection to fade to half
+
+
+class SoundHistory:
+    def __init__(
+        self,
+        bins=HISTORY_BINS,
+        bucket_seconds=HISTORY_BUCKET_SECONDS,
+        seconds=HISTORY_SECONDS,
+        half_life=HISTORY_HALF_LIFE,
+        north_offset=INPUT_NORTH_ANGLE_OFFSET,
+    ):
+        self.bins = bins
+        self.bucket_seconds = bucket_seconds
+        self.buckets = max(1, int(round(seconds / bucket_seconds)))
+        self.north_offset = north_offset
+        self.decay = 0.5 ** (bucket_seconds / half_life)  # per bucket
+        self.values = np.zeros((self.buckets, bins), dtype=np.float32)
+        self._head = 0  # row of the current bucket
+        self._bucket = int(time.monotonic() / bucket_seconds)
+        self.version = 0  # bumped on every change, for render caching
+
+    def advance(self, now=None):
+        """Rotate to the bucket for `now`, decaying everything older."""
+        if now is None:
+            now = time.monotonic()
+        bucket = int(now / self.bucket_seconds)
+        steps = bucket - self._bucket
+        if steps <= 0:
+            return
+        self._bucket = bucket
+        if steps >= self.buckets:
+            self.values[:] = 0.0
+        else:
+            self.values *= self.decay**steps
+            cleared = (self._head + np.arange(1, steps + 1)) % self.buckets
+            self.values[cleared] = 0.0
+        self._head = (self._head + steps) % self.buckets
+        self.version += 1
+
+    def add(self, positions, confidences, now=None):
+        """Record detections (input angles in degrees) in the current bucket."""
+        self.advance(now)
+        positions = np.asarray(positions, dtype=np.float64)
+        confidences = np.asarray(confidences, dtype=np.float32)
+        # NaN/inf would turn into out-of-range bin indices
+        valid = np.isfinite(positions) & np.isfinite(confidences)
+        if not valid.all():
+            positions, confidences = positions[valid], confidences[valid]
+        if positions.size == 0:
+            return
+        visual = (positions - self.north_offset) % 360.0
+        bins = np.minimum((visual * (self.bins / 360.0)).astype(np.intp), self.bins - 1)
+        np.maximum.at(self.values[self._head], bins, confidences)
+        self.version += 1
+
+    def by_age(self, now=None):
+        """(buckets, bins) copy with row 0 the current bucket, row -1 the oldest."""
+        self.advance(now)
+        order = (self._head - np.arange(self.buckets)) % self.buckets
+        return self.values[order]
+
+    def clear(self):
+        self.values[:] = 0.0
+        self.version += 1
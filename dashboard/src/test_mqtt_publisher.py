@@ -3,6 +3,12 @@ import json
 import time
 import random
 import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from common.sar_codec import encode_sound
+from common.sar_topics import DEFAULT_ROBOT_ID, SOUND, robot_topic
 
 
 def main():
@@ -11,11 +17,22 @@ def main():
     )
     parser.add_argument("--host", default="vlg2.local", help="MQTT broker host")
     parser.add_argument("--port", type=int, default=1883, help="MQTT broker port")
-    parser.add_argument("--topic", default="sar-robot/sound", help="MQTT topic")
+    parser.add_argument("--robot-id", default=DEFAULT_ROBOT_ID, help="Robot ID")
+    parser.add_argument(
+        "--topic", help="MQTT topic (default sar-robot/<robot-id>/sound)"
+    )
     parser.add_argument(
         "--interval", type=float, default=1.0, help="Publish interval in seconds"
     )
+    parser.add_argument(
+        "--format",
+        choices=["json", "binary"],
+        default="json",
+        help="Payload encoding (binary: common/sar_codec.py)",
+    )
     args = parser.parse_args()
+    args.topic = args.topic or robot_topic(args.robot_id, SOUND)
+    sequence = 0
 
     # Create MQTT client
     client = mqtt.Client()
@@ -43,7 +60,11 @@ def main():
             message = {"position": position, "human_confidence": confidence}
 
             # Publish message
-            client.publish(args.topic, json.dumps(message))
+            if args.format == "binary":
+                client.publish(args.topic, encode_sound([(position, confidence)], sequence))
+            else:
+                client.publish(args.topic, json.dumps(message))
+            sequence += 1
             print(f"Published: {message}")
 
             # Wait for interval
@@ -3,6 +3,12 @@ import json
 import time
 import random
 import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from common.sar_codec import encode_positions
+from common.sar_topics import DEFAULT_ROBOT_ID, POSITION, robot_topic
 
 
 def main():
@@ -11,8 +17,9 @@ def main():
     )
     parser.add_argument("--host", default="vlg2.local", help="MQTT broker host")
     parser.add_argument("--port", type=int, default=1883, help="MQTT broker port")
+    parser.add_argument("--robot-id", default=DEFAULT_ROBOT_ID, help="Robot ID")
     parser.add_argument(
-        "--topic", default="sar-robot/position", help="MQTT topic for position data"
+        "--topic", help="MQTT topic for position data (default sar-robot/<robot-id>/position)"
     )
     parser.add_argument(
         "--interval", type=float, default=1.5, help="Publish interval in seconds"
@@ -26,7 +33,15 @@ def main():
     parser.add_argument(
         "--num-beacons", type=int, default=3, help="Number of beacons to simulate"
     )
+    parser.add_argument(
+        "--format",
+        choices=["json", "binary"],
+        default="json",
+        help="Payload encoding (binary: common/sar_codec.py)",
+    )
     args = parser.parse_args()
+    args.topic = args.topic or robot_topic(args.robot_id, POSITION)
+    sequence = 0
 
     client = mqtt.Client()
     beacon_ids = [f"beacon-{i + 1}" for i in range(args.num_beacons)]
@@ -57,7 +72,11 @@ def main():
                 beacon_to_update: {"x": round(x_coord, 2), "y": round(y_coord, 2)}
             }
 
-            client.publish(args.topic, json.dumps(message_payload))
+            if args.format == "binary":
+                client.publish(args.topic, encode_positions(message_payload, sequence))
+            else:
+                client.publish(args.topic, json.dumps(message_payload))
+            sequence += 1
             print(f"Published: {message_payload}")
 
             time.sleep(args.interval)
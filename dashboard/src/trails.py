@@ -0,0 +1,187 @@
+"""
+Beacon trajectory history and decimation for drawing trails.
+
+Each beacon gets a ring buffer of (time, x, y) samples that grows by
+doubling up to TRAIL_CAPACITY (an hour at 10 Hz) and then overwrites the
+oldest samples. Before drawing, a trail is reduced to what is visible:
+ScreenTrail merges consecutive samples falling in the same screen pixel
+(pixel_keep), keeping the result and only decimating new samples as they
+arrive, and if more than TRAIL_MAX_POINTS remain the map lets lttb() pick
+the most shape-preserving ones. Both are vectorised, so an hour of
+samples decimates in about a millisecond.
+"""
+
+import time
+
+import numpy as np
+
+TRAIL_CAPACITY = 36000  # samples per beacon (one hour at 10 Hz)
+TRAIL_INITIAL_CAPACITY = 256
+TRAIL_MAX_POINTS = 500  # vertices per drawn trail after decimation
+
+
+class TrailBuffer:
+    """Ring buffer of one beacon's samples, oldest first when read."""
+
+    __slots__ = ("t", "xy", "start", "count", "capacity", "total")
+
+    def __init__(self, capacity=TRAIL_CAPACITY, initial_capacity=TRAIL_INITIAL_CAPACITY):
+        size = min(initial_capacity, capacity)
+        self.t = np.zeros(size)
+        self.xy = np.zeros((size, 2), dtype=np.float32)
+        self.start = 0
+        self.count = 0
+        self.capacity = capacity
+        self.total = 0  # samples ever appended
+
+    def append(self, t, x, y):
+        size = len(self.t)
+        if self.count == size and size < self.capacity:
+            # Grow (only before wrapping, so the data is still in order)
+            new_size = min(size * 2, self.capacity)
+            self.t = np.concatenate([self.t, np.zeros(new_size - size)])
+            self.xy = np.concatenate([self.xy, np.zeros((new_size - size, 2), np.float32)])
+            size = new_size
+        end = (self.start + self.count) % size
+        self.t[end] = t
+        self.xy[end] = (x, y)
+        if self.count < size:
+            self.count += 1
+        else:
+            self.start = (self.start + 1) % size
+        self.total += 1
+
+    def latest(self, n):
+        """(times, xy) of the newest n samples (at most count), oldest first."""
+        n = min(n, self.count)
+        size = len(self.t)
+        first = self.start + self.count - n
+        end = first + n
+        if end <= size or first >= size:
+            first %= size
+            return self.t[first : first + n], self.xy[first : first + n]
+        return (
+            np.concatenate([self.t[first:], self.t[: end - size]]),
+            np.concatenate([self.xy[first:], self.xy[: end - size]]),
+        )
+
+    def since(self, t0):
+        """(times, xy) of the samples at or after time t0, oldest first."""
+        t, xy = self.latest(self.count)
+        first = np.searchsorted(t, t0)
+        return t[first:], xy[first:]
+
+
+class TrailHistory:
+    """Trails of all beacons of one robot."""
+
+    def __init__(self, capacity=TRAIL_CAPACITY):
+        self.capacity = capacity
+        self.buffers = {}  # beacon ID -> TrailBuffer
+
+    def append(self, beacon_id, x, y, t=None):
+        buffer = self.buffers.get(beacon_id)
+        if buffer is None:
+            buffer = self.buffers[beacon_id] = TrailBuffer(self.capacity)
+        buffer.append(time.monotonic() if t is None else t, x, y)
+
+    def clear(self):
+        self.buffers.clear()
+
+
+class ScreenTrail:
+    """Pixel-decimated screen points of one TrailBuffer, kept up to date.
+
+    transform is (scale, origin_x, origin_y) with Y inverted, as the map
+    draws. New samples are decimated and appended; samples older than the
+    trail length are trimmed by time. Only a transform change (resize or
+    rescale) or samples overwritten before being seen force a rebuild.
+    """
+
+    def __init__(self, pixel=1.0):
+        self.pixel = pixel
+        self.transform = None
+        self.consumed = 0  # buffer.total already decimated
+        self.times = np.zeros(0)
+        self.points = np.zeros((0, 2), dtype=np.float32)
+
+    def _to_screen(self, xy):
+        scale, origin_x, origin_y = self.transform
+        return xy * np.float32((scale, -scale)) + np.float32((origin_x, origin_y))
+
+    def update(self, buffer, t0, transform):
+        """Screen points of the samples since t0, oldest first."""
+        new = buffer.total - self.consumed
+        if transform != self.transform or new > buffer.count:
+            self.transform = transform
+            times, xy = buffer.since(t0)
+            self.points = self._to_screen(xy)
+            keep = pixel_keep(self.points, self.pixel)
+            self.points = self.points[keep]
+            self.times = times[keep]
+        elif new:
+            times, xy = buffer.latest(new)
+            points = self._to_screen(xy)
+            if len(self.points):
+                # Compare the first new sample with the last kept one
+                keep = pixel_keep(np.vstack([self.points[-1:], points]), self.pixel)[1:]
+            else:
+                keep = pixel_keep(points, self.pixel)
+            self.points = np.concatenate([self.points, points[keep]])
+            self.times = np.concatenate([self.times, times[keep]])
+        self.consumed = buffer.total
+
+        first = np.searchsorted(self.times, t0)
+        if first:
+            self.points = self.points[first:]
+            self.times = self.times[first:]
+        # Always end at the current position, even within the last pixel
+        times, xy = buffer.latest(1)
+        if len(times) and times[0] >= t0 and (not len(self.times) or self.times[-1] != times[0]):
+            return np.vstack([self.points, self._to_screen(xy)])
+        return self.points
+
+
+def pixel_keep(points, pixel=1.0):
+    """Mask of screen points not in the same pixel cell as their predecessor."""
+    keep = np.ones(len(points), dtype=bool)
+    if len(points) < 2:
+        return keep
+    cells = np.floor(points * (1.0 / pixel)).astype(np.int32)
+    # One comparison per point: view each (x, y) cell pair as one int64
+    packed = cells.view(np.int64).ravel()
+    np.not_equal(packed[1:], packed[:-1], out=keep[1:])
+    return keep
+
+
+def lttb(points, threshold):
+    """Largest-Triangle-Three-Buckets downsampling to `threshold` points.
+
+    Vectorised variant: each bucket's triangle uses the averages of the
+    previous and next buckets as its other corners (instead of the point
+    selected in the previous bucket), so all buckets are solved at once.
+    """
+    n = len(points)
+    if threshold >= n or threshold < 3:
+        return points
+    middle = points[1:-1]
+    buckets = threshold - 2
+    # Bucket sizes differ by at most one, so there are exactly `buckets`
+    bounds = np.arange(buckets + 1) * len(middle) // buckets
+    starts = bounds[:-1]
+    sizes = np.diff(bounds)
+    means = np.add.reduceat(middle, starts, axis=0) / sizes[:, None]
+    index = starts[:, None] + np.arange(sizes.max())
+    padding = index >= bounds[1:, None]  # Slots past the end of a shorter bucket
+    grid = np.take(middle, np.minimum(index, len(middle) - 1), axis=0)
+
+    previous = np.vstack([points[:1], means[:-1]])
+    following = np.vstack([means[1:], points[-1:]])
+    # Twice the triangle area (previous, candidate, following)
+    area = np.abs(
+        (previous[:, None, 0] - following[:, None, 0]) * (grid[:, :, 1] - previous[:, None, 1])
+        - (previous[:, None, 0] - grid[:, :, 0]) * (following[:, None, 1] - previous[:, None, 1])
+    )
+    area[padding] = -1.0
+    chosen = grid[np.arange(buckets), area.argmax(axis=1)]
+    return np.vstack([points[:1], chosen, points[-1:]])
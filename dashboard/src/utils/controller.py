@@ -1,10 +1,15 @@
 import paho.mqtt.client as mqtt
 import curses
+import os
+import sys
 import time
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))
+from common.sar_topics import CONTROL, robot_id_from_env, robot_topic
+
 MQTT_BROKER = "vlg2.local"  # or IP address of Raspberry Pi
 MQTT_PORT = 1883
-MQTT_TOPIC = "sar-robot/control"
+MQTT_TOPIC = robot_topic(robot_id_from_env(), CONTROL)  # $SAR_ROBOT_ID
 
 client = mqtt.Client()
 
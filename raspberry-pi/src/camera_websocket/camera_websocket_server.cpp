@@ -1,9 +1,45 @@
 #include <libwebsockets.h>
 #include <opencv2/opencv.hpp>
+#include <chrono>
+#include <cstdint>
+#include <cstring>
 #include <vector>
 
 static struct lws *client_wsi = nullptr;
 
+// Optional frame header (see dashboard/src/camera_websocket/frame_protocol.py).
+// Enabled with --framed; without it the server sends bare JPEG as before.
+static bool framed_mode = false;
+static uint32_t frame_sequence = 0;
+
+static const size_t FRAME_HEADER_SIZE = 28;
+static const uint8_t FRAME_VERSION = 1;
+
+static void put_le(unsigned char *dst, uint64_t value, size_t bytes) {
+    for (size_t i = 0; i < bytes; ++i) {
+        dst[i] = static_cast<unsigned char>((value >> (8 * i)) & 0xFF);
+    }
+}
+
+static void write_frame_header(unsigned char *dst, uint32_t sequence,
+                               uint64_t capture_us, uint32_t encode_us,
+                               uint16_t width, uint16_t height) {
+    memcpy(dst, "SARV", 4);
+    dst[4] = FRAME_VERSION;
+    dst[5] = 0;  // flags
+    put_le(dst + 6, FRAME_HEADER_SIZE, 2);
+    put_le(dst + 8, sequence, 4);
+    put_le(dst + 12, capture_us, 8);
+    put_le(dst + 20, encode_us, 4);
+    put_le(dst + 24, width, 2);
+    put_le(dst + 26, height, 2);
+}
+
+static uint64_t wall_clock_us() {
+    using namespace std::chrono;
+    return duration_cast<microseconds>(system_clock::now().time_since_epoch()).count();
+}
+
 static int callback_camera(struct lws *wsi, enum lws_callback_reasons reason,
                            void *user, void *in, size_t len) {
     static std::vector<uchar> jpeg_buf;
@@ -27,15 +63,27 @@ static int callback_camera(struct lws *wsi, enum lws_callback_reasons reason,
             if (cap.isOpened()) {
                 cv::Mat frame;
                 cap >> frame;
+                uint64_t capture_us = wall_clock_us();
 
                 if (!frame.empty()) {
                     jpeg_buf.clear();
                     std::vector<int> params = {cv::IMWRITE_JPEG_QUALITY, 70};
+                    auto encode_start = std::chrono::steady_clock::now();
                     cv::imencode(".jpg", frame, jpeg_buf, params);
+                    uint32_t encode_us = static_cast<uint32_t>(
+                        std::chrono::duration_cast<std::chrono::microseconds>(
+                            std::chrono::steady_clock::now() - encode_start).count());
 
-                    unsigned char *buf = new unsigned char[LWS_PRE + jpeg_buf.size()];
-                    memcpy(&buf[LWS_PRE], jpeg_buf.data(), jpeg_buf.size());
-                    lws_write(wsi, &buf[LWS_PRE], jpeg_buf.size(), LWS_WRITE_BINARY);
+                    size_t header_size = framed_mode ? FRAME_HEADER_SIZE : 0;
+                    size_t msg_size = header_size + jpeg_buf.size();
+                    unsigned char *buf = new unsigned char[LWS_PRE + msg_size];
+                    if (framed_mode) {
+                        write_frame_header(&buf[LWS_PRE], frame_sequence++, capture_us,
+                                           encode_us, static_cast<uint16_t>(frame.cols),
+                                           static_cast<uint16_t>(frame.rows));
+                    }
+                    memcpy(&buf[LWS_PRE + header_size], jpeg_buf.data(), jpeg_buf.size());
+                    lws_write(wsi, &buf[LWS_PRE], msg_size, LWS_WRITE_BINARY);
                     delete[] buf;
                 }
             }
@@ -55,7 +103,13 @@ static struct lws_protocols protocols[] = {
     { NULL, NULL, 0, 0 }
 };
 
-int main() {
+int main(int argc, char **argv) {
+    for (int i = 1; i < argc; ++i) {
+        if (strcmp(argv[i], "--framed") == 0) {
+            framed_mode = true;
+        }
+    }
+
     struct lws_context_creation_info info = {};
     info.port = 9002;
     info.protocols = protocols;
@@ -67,7 +121,8 @@ int main() {
         return -1;
     }
 
-    printf("WebSocket server running at ws://vlg2.local:9002\n");
+    printf("WebSocket server running at ws://vlg2.local:9002 (%s)\n",
+           framed_mode ? "framed" : "raw JPEG");
     while (true)
         lws_service(context, 1000);
 
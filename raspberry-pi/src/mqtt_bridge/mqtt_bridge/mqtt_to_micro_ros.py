@@ -1,116 +1,400 @@
+import argparse
+from collections import deque
+import itertools
+import json
+import math
+import signal
+import sys
+import time
+from types import SimpleNamespace
+
+import paho.mqtt.client as mqtt
 import rclpy
+from rclpy.executors import ExternalShutdownException
 from rclpy.node import Node
+from rclpy.signals import SignalHandlerOptions
 from std_msgs.msg import Int32
-import paho.mqtt.client as mqtt
 
-MQTT_BROKER = "vlg2.local"
+MQTT_BROKER = 'vlg2.local'
 MQTT_PORT = 1883
-MQTT_TOPIC = "sar-robot/control"
-MQTT_TOPIC_PAN = "sar-robot/pan_angle"
+# Topics are namespaced per robot: sar-robot/<robot_id>/<name>
+MQTT_TOPIC_ROOT = 'sar-robot'
+DEFAULT_ROBOT_ID = 'robot-1'
+# Un-namespaced topics, still served when the legacy_topics parameter is set
+MQTT_TOPIC = 'sar-robot/control'
+MQTT_TOPIC_MOVEMENT = 'sar-robot/movement'
+MQTT_TOPIC_PAN = 'sar-robot/pan_angle'
 
 PAN_STEP = 32
 PAN_MIN = 0
 PAN_MAX = 1023
-current_pan = 512
+PAN_CENTER = 512
 
 # Define wheel speeds (can be tuned)
 LINEAR_SPEED = 200  # forward/backward speed
 TURN_SPEED = 150    # turning speed
+MAX_WHEEL_SPEED = 200  # MAX_DXL_WHEEL_VELOCITY in the OpenCR firmware
+
+# Velocity control: wheels are ramped towards the newest target by a timer
+CONTROL_RATE = 50.0  # Hz
+ACCELERATION = 800.0  # wheel units/s when speeding up (0 -> LINEAR_SPEED in 0.25 s)
+DECELERATION = 2000.0  # wheel units/s when slowing down or reversing
+WATCHDOG_TIMEOUT = 0.5  # s without a streamed setpoint before the wheels stop
+
+# Command table: wheel commands -> (left, right), pan commands -> pan step
+WHEEL_COMMANDS = {
+    'forward': (-LINEAR_SPEED, -LINEAR_SPEED),
+    'backward': (LINEAR_SPEED, LINEAR_SPEED),
+    'left': (-TURN_SPEED, TURN_SPEED),
+    'right': (TURN_SPEED, -TURN_SPEED),
+    'stop': (0, 0),
+}
+PAN_COMMANDS = {
+    'pan_left': PAN_STEP,
+    'pan_right': -PAN_STEP,
+}
+
+LOG_THROTTLE = 1.0  # seconds between repeated log lines of one kind
+
+
+def ramp(current, target, accel_step, decel_step):
+    """Move current towards target by at most one step."""
+    if abs(target) < abs(current) or current * target < 0:
+        step = decel_step  # Slowing down, or reversing through zero
+    else:
+        step = accel_step
+    if abs(target - current) <= step:
+        return target
+    return current + math.copysign(step, target - current)
+
 
 class MqttToMicroROS(Node):
+
     def __init__(self):
         super().__init__('mqtt_to_micro_ros')
         self.left_pub = self.create_publisher(Int32, '/left_wheel_vel', 10)
         self.right_pub = self.create_publisher(Int32, '/right_wheel_vel', 10)
         self.pan_pub = self.create_publisher(Int32, '/pan_angle', 10)
 
+        self.declare_parameter('robot_id', DEFAULT_ROBOT_ID)
+        self.declare_parameter('legacy_topics', True)
+        robot_id = self.get_parameter('robot_id').value
+        legacy = self.get_parameter('legacy_topics').value
+        # Commands arrive on control (controller, scripts) and movement (dashboard)
+        self.control_topics = [
+            f'{MQTT_TOPIC_ROOT}/{robot_id}/control',
+            f'{MQTT_TOPIC_ROOT}/{robot_id}/movement',
+        ]
+        self.pan_topics = [f'{MQTT_TOPIC_ROOT}/{robot_id}/pan_angle']
+        self.ack_topic = f'{MQTT_TOPIC_ROOT}/{robot_id}/ack'
+        if legacy:
+            self.control_topics += [MQTT_TOPIC, MQTT_TOPIC_MOVEMENT]
+            self.pan_topics.append(MQTT_TOPIC_PAN)
+
+        self.declare_parameter('control_rate', CONTROL_RATE)
+        self.declare_parameter('acceleration', ACCELERATION)
+        self.declare_parameter('deceleration', DECELERATION)
+        self.declare_parameter('watchdog_timeout', WATCHDOG_TIMEOUT)
+        self.period = 1.0 / self.get_parameter('control_rate').value
+        self.accel_step = self.get_parameter('acceleration').value * self.period
+        self.decel_step = self.get_parameter('deceleration').value * self.period
+        self.watchdog_timeout = self.get_parameter('watchdog_timeout').value
+
+        # Newest wheel target as one tuple (left, right, time, streamed),
+        # replaced whole by the MQTT thread and read by the control timer, so
+        # setpoints arriving between two ticks coalesce to the last one.
+        # Discrete commands latch; streamed setpoints expire after the
+        # watchdog timeout.
+        self.setpoint = (0.0, 0.0, time.monotonic(), False)
+        self.left = 0.0
+        self.right = 0.0
+        self.sent = (0, 0)
+        self.expired = None  # Time of the last setpoint the watchdog stopped
+        self.watchdog_stops = 0
+        self.pending_acks = deque()  # Acks of wheel commands, sent by the next tick
+        self.left_msg = Int32()
+        self.right_msg = Int32()
+        self.control_timer = self.create_timer(self.period, self.control_tick)
+
+        # Dispatch table built once: command -> (handler, argument). Plain
+        # payloads are looked up as raw bytes, without decoding.
+        self.pan = PAN_CENTER
+        self.pan_msg = Int32()
+        self.commands = {}
+        for command, wheels in WHEEL_COMMANDS.items():
+            self.commands[command] = (self.set_wheels, wheels)
+        for command, step in PAN_COMMANDS.items():
+            self.commands[command] = (self.step_pan, step)
+        self.raw_commands = {
+            command.encode(): entry for command, entry in self.commands.items()
+        }
+        self.handled = 0
+        self.rejected = 0
+
         self.mqtt_client = mqtt.Client()
         self.mqtt_client.on_connect = self.on_connect
         self.mqtt_client.on_message = self.on_message
 
+    def start_mqtt(self):
+        """Connect to the broker; return False if that failed."""
         try:
             self.mqtt_client.connect(MQTT_BROKER, MQTT_PORT, 60)
         except Exception as e:
-            self.get_logger().error(f"MQTT connection failed: {e}")
-            rclpy.shutdown()
-            return
-
+            self.get_logger().error(f'MQTT connection failed: {e}')
+            return False
         self.mqtt_client.loop_start()
-        self.get_logger().info("MQTT to micro-ROS bridge started")
+        self.get_logger().info('MQTT to micro-ROS bridge started')
+        return True
 
     def on_connect(self, client, userdata, flags, rc):
         if rc == 0:
-            self.get_logger().info("Connected to MQTT broker")
-            client.subscribe(MQTT_TOPIC)
+            self.get_logger().info('Connected to MQTT broker')
+            client.subscribe([(topic, 0) for topic in self.control_topics])
+            self.get_logger().info(f'Subscribed to {", ".join(self.control_topics)}')
         else:
-            self.get_logger().error(f"Failed to connect to MQTT broker. Code: {rc}")
+            self.get_logger().error(f'Failed to connect to MQTT broker. Code: {rc}')
 
     def on_message(self, client, userdata, msg):
-        global current_pan
-        command = msg.payload.decode()
-        left = 0
-        right = 0
-
-        if command == "forward":
-            left = -LINEAR_SPEED
-            right = -LINEAR_SPEED
-        elif command == "backward":
-            left = LINEAR_SPEED
-            right = LINEAR_SPEED
-        elif command == "left":
-            left = -TURN_SPEED
-            right = TURN_SPEED
-        elif command == "right":
-            left = TURN_SPEED
-            right = -TURN_SPEED
-        elif command == "stop":
-            left = 0
-            right = 0
-        elif command == "pan_right":
-            current_pan = max(PAN_MIN, current_pan - PAN_STEP)
-            self.send_pan(current_pan)
-            return
-        elif command == "pan_left":
-            current_pan = min(PAN_MAX, current_pan + PAN_STEP)
-            self.send_pan(current_pan)
-            return
-        else:
-            self.get_logger().warn(f"Unknown command: {command}")
-            return
+        entry = self.raw_commands.get(msg.payload)
+        ack = None
+        if entry is None:
+            received = time.time()
+            command, velocity, data = parse_payload(msg.payload)
+            ack = ack_message(data, 'velocity' if velocity else command, received)
+            if velocity is not None:
+                self.set_velocity(*velocity, ack)
+                self.handled += 1
+                return
+            entry = self.commands.get(command)
+            if entry is None:
+                self.rejected += 1
+                self.get_logger().warn(
+                    f'Unknown command: {msg.payload[:64]!r}',
+                    throttle_duration_sec=LOG_THROTTLE)
+                if ack is not None:
+                    self.send_ack(ack, error='unknown command')
+                return
+        handler, argument = entry
+        handler(argument, ack)
+        self.handled += 1
+
+    def set_wheels(self, wheels, ack=None):
+        """Latch a discrete command's wheel speeds until the next command."""
+        left, right = wheels
+        self.setpoint = (float(left), float(right), time.monotonic(), False)
+        if ack is not None:
+            self.pending_acks.append(ack)
+
+    def set_velocity(self, linear, angular, ack=None):
+        """Take a streamed setpoint, both in [-1, 1] (angular > 0 turns left)."""
+        left = -linear * LINEAR_SPEED - angular * TURN_SPEED
+        right = -linear * LINEAR_SPEED + angular * TURN_SPEED
+        left = min(MAX_WHEEL_SPEED, max(-MAX_WHEEL_SPEED, left))
+        right = min(MAX_WHEEL_SPEED, max(-MAX_WHEEL_SPEED, right))
+        self.setpoint = (left, right, time.monotonic(), True)
+        if ack is not None:
+            self.pending_acks.append(ack)
+
+    def control_tick(self):
+        """Ramp the wheels towards the newest setpoint and publish them."""
+        left_target, right_target, stamp, streamed = self.setpoint
+        if streamed and time.monotonic() - stamp > self.watchdog_timeout:
+            left_target = right_target = 0.0
+            if self.expired != stamp:
+                self.expired = stamp
+                self.watchdog_stops += 1
+                self.get_logger().warn(
+                    f'Velocity stream stopped for {self.watchdog_timeout} s, stopping wheels',
+                    throttle_duration_sec=LOG_THROTTLE)
+        self.left = ramp(self.left, left_target, self.accel_step, self.decel_step)
+        self.right = ramp(self.right, right_target, self.accel_step, self.decel_step)
+        wheels = (round(self.left), round(self.right))
+        if wheels != self.sent or wheels != (0, 0):
+            self.send_wheels(*wheels)  # Quiet once standing still and the stop was sent
+        # Every command taken since the last tick is now in effect, or was
+        # superseded by one that is
+        while self.pending_acks:
+            self.send_ack(self.pending_acks.popleft())
 
-        self.send_wheel_vel(left, right)
-        self.get_logger().info(f"Published wheels: L={left} R={right}")
+    def send_wheels(self, left, right):
+        self.left_msg.data = left
+        self.right_msg.data = right
+        self.left_pub.publish(self.left_msg)
+        self.right_pub.publish(self.right_msg)
+        if (left, right) != self.sent:
+            self.get_logger().info(
+                f'Published wheels: L={left} R={right} ({self.handled} commands)',
+                throttle_duration_sec=LOG_THROTTLE)
+        self.sent = (left, right)
 
-    def send_wheel_vel(self, left, right):
-        lmsg = Int32()
-        rmsg = Int32()
-        lmsg.data = left
-        rmsg.data = right
-        self.left_pub.publish(lmsg)
-        self.right_pub.publish(rmsg)
+    def stop_wheels(self):
+        """Stop at once, without ramping (shutdown)."""
+        self.setpoint = (0.0, 0.0, time.monotonic(), False)
+        self.left = self.right = 0.0
+        self.send_wheels(0, 0)
+
+    def step_pan(self, step, ack=None):
+        self.pan = min(PAN_MAX, max(PAN_MIN, self.pan + step))
+        self.send_pan(self.pan)
+        if ack is not None:
+            self.send_ack(ack)
+
+    def send_ack(self, ack, error=None):
+        """Publish a command's ack, stamped with the time it reached ROS."""
+        if error is None:
+            ack['published'] = time.time()
+        else:
+            ack['error'] = error
+        try:
+            self.mqtt_client.publish(self.ack_topic, json.dumps(ack))
+        except Exception as e:
+            self.get_logger().error(
+                f'Failed to publish ack: {e}', throttle_duration_sec=LOG_THROTTLE)
 
     def send_pan(self, angle):
-        msg = Int32()
-        msg.data = angle
-        self.pan_pub.publish(msg)
+        self.pan_msg.data = angle
+        self.pan_pub.publish(self.pan_msg)
 
         try:
-            self.mqtt_client.publish(MQTT_TOPIC_PAN, str(angle))
-            self.get_logger().info(f"Published pan angle: {angle}")
+            payload = str(angle)
+            for topic in self.pan_topics:
+                self.mqtt_client.publish(topic, payload)
+            self.get_logger().info(
+                f'Published pan angle: {angle}', throttle_duration_sec=LOG_THROTTLE)
         except Exception as e:
-            self.get_logger().error(f"Failed to publish pan angle: {e}")
+            self.get_logger().error(
+                f'Failed to publish pan angle: {e}', throttle_duration_sec=LOG_THROTTLE)
+
+
+def parse_payload(payload):
+    """Return (command, velocity, data) of a payload, any of them None.
+
+    Plain text and JSON {"command": ...} payloads give a command; JSON
+    {"linear": ..., "angular": ...} gives a velocity setpoint (linear,
+    angular), each clamped to [-1, 1]. data is the decoded JSON object.
+    """
+    if payload[:1] != b'{':
+        try:
+            return payload.decode().strip(), None, None
+        except UnicodeDecodeError:
+            return None, None, None
+    try:
+        data = json.loads(payload)
+    except ValueError:
+        return None, None, None
+    if not isinstance(data, dict):
+        return None, None, None
+    if 'linear' in data or 'angular' in data:
+        try:
+            velocity = [float(data.get(key, 0.0)) for key in ('linear', 'angular')]
+        except (TypeError, ValueError):
+            return None, None, data
+        if not all(map(math.isfinite, velocity)):
+            return None, None, data
+        return None, tuple(min(1.0, max(-1.0, value)) for value in velocity), data
+    command = data.get('command')
+    return (command if isinstance(command, str) else None), None, data
+
+
+def ack_message(data, command, received):
+    """Return the ack for a JSON command carrying an "id", else None.
+
+    The command's id and timestamp are echoed so the sender can match the
+    ack and measure the round trip; received is when the bridge got it.
+    """
+    if data is None or 'id' not in data:
+        return None
+    return {
+        'id': data['id'],
+        'command': command,
+        'timestamp': data.get('timestamp'),
+        'received': received,
+    }
+
 
 def main():
-    rclpy.init()
+    # rclpy's own handlers shut the context down on SIGINT/SIGTERM before
+    # the finally below runs, and the stop could no longer be published;
+    # without them Ctrl-C is a KeyboardInterrupt and SIGTERM a SystemExit
+    rclpy.init(signal_handler_options=SignalHandlerOptions.NO)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
     node = MqttToMicroROS()
+    if not node.start_mqtt():
+        node.destroy_node()
+        rclpy.try_shutdown()
+        return
     try:
         rclpy.spin(node)
-    except KeyboardInterrupt:
+    except (KeyboardInterrupt, ExternalShutdownException):
         pass
     finally:
         node.mqtt_client.loop_stop()
+        if rclpy.ok():
+            node.stop_wheels()
+        else:
+            node.get_logger().error('ROS context already shut down, wheels not stopped')
+        node.destroy_node()
+        rclpy.try_shutdown()
+
+
+def benchmark(node, iterations):
+    """Time on_message and the control tick that publishes to ROS."""
+    topic = node.control_topics[0]
+    cases = [
+        ('plain', b'forward'),
+        ('plain padded', b'forward\n'),
+        ('json', json.dumps({'command': 'left', 'timestamp': time.time()}).encode()),
+        ('velocity', json.dumps({'linear': 0.5, 'angular': -0.25}).encode()),
+        ('pan', b'pan_left'),
+        ('pan + ack', json.dumps(
+            {'command': 'pan_left', 'id': 'benchmark', 'timestamp': time.time()}).encode()),
+        ('unknown', b'jump'),
+    ]
+    print(f'{"payload":<14}{"mean us":>9}{"p50 us":>9}{"p99 us":>9}')
+    for label, payload in cases:
+        msg = SimpleNamespace(topic=topic, payload=payload)
+        print_timings(label, time_calls(lambda: node.on_message(None, None, msg), iterations))
+    # Streamed setpoints swinging between full forward and reverse, so every
+    # tick ramps and publishes
+    setpoints = itertools.cycle([1.0] * 25 + [-1.0] * 25)
+
+    def tick():
+        node.set_velocity(next(setpoints), 0.0)
+        node.control_tick()
+    print_timings('control tick', time_calls(tick, iterations))
+    print(
+        'Wheel commands reach ROS at the next control tick '
+        f'(up to {node.period * 1000:.0f} ms after on_message)')
+
+
+def time_calls(call, iterations):
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - started) * 1e6)
+    timings.sort()
+    return timings
+
+
+def print_timings(label, timings):
+    print(
+        f'{label:<14}{sum(timings) / len(timings):>9.1f}'
+        f'{timings[len(timings) // 2]:>9.1f}{timings[int(len(timings) * 0.99)]:>9.1f}')
+
+
+def benchmark_main(args=None):
+    parser = argparse.ArgumentParser(description='Command dispatch latency benchmark')
+    parser.add_argument('--iterations', type=int, default=10000)
+    rclpy.init(args=args)
+    parsed = parser.parse_args(rclpy.utilities.remove_ros_args(args)[1:])
+    node = MqttToMicroROS()  # Not connected: pan echoes to MQTT are dropped
+    try:
+        benchmark(node, parsed.iterations)
+    finally:
         node.destroy_node()
-        rclpy.shutdown()
+        rclpy.try_shutdown()
+
 
 if __name__ == '__main__':
     main()
@@ -19,6 +19,7 @@ setup(
     entry_points={
         'console_scripts': [
             'mqtt_to_micro_ros = mqtt_bridge.mqtt_to_micro_ros:main',
+            'mqtt_bridge_benchmark = mqtt_bridge.mqtt_to_micro_ros:benchmark_main',
         ],
     },
 )
@@ -0,0 +1,123 @@
+import json
+import math
+
+from mqtt_bridge import mqtt_to_micro_ros
+from mqtt_bridge.mqtt_to_micro_ros import (
+    LINEAR_SPEED, MAX_WHEEL_SPEED, MqttToMicroROS, parse_payload, ramp)
+import pytest
+import rclpy
+
+
+# --- ramp() ---
+@pytest.mark.parametrize('current, target, expected', [
+    (0.0, 100.0, 10.0),  # Speeding up: acceleration step
+    (0.0, -100.0, -10.0),
+    (100.0, 0.0, 70.0),  # Slowing down: deceleration step
+    (-100.0, -50.0, -70.0),
+    (50.0, -50.0, 20.0),  # Reversing: deceleration step towards zero
+    (95.0, 100.0, 100.0),  # Within one step: lands on the target
+    (100.0, 100.0, 100.0),
+])
+def test_ramp(current, target, expected):
+    assert ramp(current, target, 10.0, 30.0) == pytest.approx(expected)
+
+
+# --- parse_payload() ---
+@pytest.mark.parametrize('payload, command', [
+    (b'forward', 'forward'),
+    (b' stop\n', 'stop'),
+    (b'{"command": "left", "timestamp": 1.5}', 'left'),
+])
+def test_parse_command(payload, command):
+    assert parse_payload(payload)[:2] == (command, None)
+
+
+@pytest.mark.parametrize('data, velocity', [
+    ({'linear': 0.5, 'angular': -0.25}, (0.5, -0.25)),
+    ({'linear': 1}, (1.0, 0.0)),  # Missing axis: 0
+    ({'angular': 0.3}, (0.0, 0.3)),
+    ({'linear': 4.0, 'angular': -2.0}, (1.0, -1.0)),  # Clamped to [-1, 1]
+])
+def test_parse_velocity(data, velocity):
+    assert parse_payload(json.dumps(data).encode()) == (None, velocity, data)
+
+
+@pytest.mark.parametrize('payload', [
+    b'{"linear": "fast"}',
+    b'{"linear": NaN}',  # json.loads accepts NaN and Infinity
+    b'{"angular": Infinity}',
+    b'{"linear": [1]}',
+    b'{"command": 3}',
+])
+def test_parse_rejected_json(payload):
+    command, velocity, data = parse_payload(payload)
+    assert (command, velocity) == (None, None)
+    assert isinstance(data, dict)  # Still returned, so the command can be acked
+
+
+@pytest.mark.parametrize('payload', [b'{"command": ', b'{"linear": 1,}', b'\xff\xfe'])
+def test_parse_malformed(payload):
+    assert parse_payload(payload) == (None, None, None)
+
+
+# --- Watchdog ---
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(mqtt_to_micro_ros.time, 'monotonic', lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def node(clock):
+    rclpy.init()
+    node = MqttToMicroROS()  # Not connected to a broker
+    node.control_timer.cancel()  # Ticks are driven by the tests
+    yield node
+    node.destroy_node()
+    rclpy.try_shutdown()
+
+
+def run(node, clock, seconds):
+    for _ in range(round(seconds / node.period)):
+        clock[0] += node.period
+        node.control_tick()
+
+
+def test_watchdog_stops_stale_stream(node, clock):
+    node.set_velocity(1.0, 0.0)
+    run(node, clock, node.watchdog_timeout * 0.8)
+    assert node.sent == (-LINEAR_SPEED, -LINEAR_SPEED)
+    assert node.watchdog_stops == 0
+
+    run(node, clock, node.watchdog_timeout)  # No setpoint for longer than the timeout
+    assert node.sent == (0, 0)
+    assert node.watchdog_stops == 1
+
+    node.set_velocity(-0.5, 0.0)  # A resumed stream drives again
+    run(node, clock, node.watchdog_timeout * 0.8)
+    assert node.sent == (LINEAR_SPEED // 2, LINEAR_SPEED // 2)
+    assert node.watchdog_stops == 1
+
+
+def test_streamed_setpoints_keep_driving(node, clock):
+    for _ in range(5):
+        node.set_velocity(0.0, 1.0)
+        run(node, clock, node.watchdog_timeout * 0.8)
+    assert node.watchdog_stops == 0
+    assert max(map(abs, node.sent)) <= MAX_WHEEL_SPEED
+    assert node.sent[0] == -node.sent[1] != 0
+
+
+def test_discrete_command_is_latched(node, clock):
+    node.set_wheels(node.commands['forward'][1])
+    run(node, clock, node.watchdog_timeout * 3)
+    assert node.sent == (-LINEAR_SPEED, -LINEAR_SPEED)
+    assert node.watchdog_stops == 0
+
+
+def test_acceleration_is_limited(node, clock):
+    node.set_velocity(1.0, 0.0)
+    run(node, clock, node.period)
+    assert abs(node.sent[0]) == round(node.accel_step)
+    assert not math.isclose(abs(node.sent[0]), LINEAR_SPEED)
@@ -0,0 +1,289 @@
+"""
+ESP32 serial simulator for testing and benchmarking the bridge without hardware.
+
+Opens a pseudo-terminal pair and writes what the firmware writes to its
+UART each scan cycle (esp32/main/main_functions.cc, uart_sender.cc):
+
+    I (8123) MAIN: Beacon A: RSSI=-61.0 Result=243.1187     (--reports)
+    Beacon A: (250.000000, 120.000000)                       std::to_string
+    Beacon B: (-350.000000, 120.000000)
+    Beacon C: (-50.000000, 420.000000)
+
+    I (8124) UART_SENDER: Sent: Beacon A: (250.000000, ...   (--echo)
+    ...
+
+The receiver drives a circle around the origin among the anchors;
+positions get Gaussian noise, and lines can be corrupted (bit flips,
+truncation, lost newlines, garbage) with a given probability. Point the
+bridge at the printed device (or --link path), and with --broker the
+simulator subscribes to the position topic and reports the serial -> MQTT
+latency of every cycle it recognises:
+
+    python esp32_simulator.py --link /tmp/ttyESP32 --rate 10 --broker localhost
+    python main.py --port /tmp/ttyESP32 --broker localhost
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+import threading
+import time
+import tty
+from collections import defaultdict, deque
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))
+from common.sar_codec import decode_payload
+from common.sar_topics import POSITION, robot_id_from_env, robot_topic
+from trilateration import ANCHORS, PATH_LOSS_EXPONENT, TX_POWER
+
+ORBIT_RADIUS = 100.0  # cm, receiver path around the origin
+ORBIT_PERIOD = 60.0  # s per lap
+UART_MESSAGE_SIZE = 128  # uart_sender.cc formats into char[128]
+LOG_COLOR = "\x1b[0;32m"  # CONFIG_LOG_COLORS=y
+LOG_RESET = "\x1b[0m"
+REPORT_INTERVAL = 5.0  # s between progress lines
+LOST_AFTER = 10.0  # s without a matching message before a cycle counts as unpublished
+
+
+def esp_log(start, tag, message):
+    """One ESP_LOGI line as the console prints it."""
+    millis = int((time.monotonic() - start) * 1000)
+    return f"{LOG_COLOR}I ({millis}) {tag}: {message}{LOG_RESET}\n"
+
+
+def corrupt(line, rng):
+    """Damage one line the way a noisy UART or a reset might."""
+    kind = rng.randrange(4)
+    if kind == 0 and len(line) > 1:  # Flipped bits
+        position = rng.randrange(len(line) - 1)
+        data = bytearray(line)
+        data[position] ^= 1 << rng.randrange(7)
+        return bytes(data)
+    if kind == 1:  # Truncated line
+        return line[: rng.randrange(len(line))] + b"\n"
+    if kind == 2:  # Lost newline, runs into the next line
+        return line.rstrip(b"\n")
+    return bytes(rng.randrange(256) for _ in range(rng.randrange(1, 40))) + line  # Garbage
+
+
+class Simulator:
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.noise = np.random.default_rng(args.seed)
+        self.names = list(ANCHORS)[: args.beacons]
+        self.anchors = np.array([ANCHORS[name] for name in self.names])
+        self.start = time.monotonic()
+        self.cycles = 0
+        self.lines = 0
+        self.bytes = 0
+        self.corrupted = 0
+        # Latency matching, shared with the MQTT thread under _lock:
+        # (beacon number, rounded x, rounded y) -> cycles with that position
+        self.pending = defaultdict(deque)
+        self.sent_at = {}  # cycle -> send time, until published or expired
+        self.sent = deque()  # (send time, cycle, keys) in order, for expiry
+        self._lock = threading.Lock()
+        self.latencies = []
+        self.received = 0
+        self.unmatched = 0
+        self.unpublished = 0  # Lost, or every beacon held back by the bridge
+
+    def cycle_lines(self):
+        """Lines of one scan cycle, the matching keys of its positions and
+        the number of lines up to the end of the position block."""
+        args = self.args
+        t = time.monotonic() - self.start
+        angle = 2.0 * math.pi * t / ORBIT_PERIOD
+        receiver = np.array((math.cos(angle), math.sin(angle))) * ORBIT_RADIUS
+        heard = [self.rng.random() >= args.miss for _ in self.names]
+
+        lines = []
+        if args.reports:
+            distances = np.hypot(*(self.anchors - receiver).T)
+            distances += self.noise.normal(0.0, args.noise, len(distances))
+            for name, distance, ok in zip(self.names, np.maximum(distances, 1.0), heard):
+                if ok:
+                    rssi = TX_POWER - 10.0 * PATH_LOSS_EXPONENT * math.log10(distance / 100.0)
+                    report = f"Beacon {name}: RSSI={rssi:.1f} Result={distance:.4f}"
+                    lines.append(esp_log(self.start, "MAIN", report))
+            lines.append(
+                esp_log(self.start, "CENTROID_UTILS", "Calculating weighted centroid for points")
+            )
+
+        # Firmware: each anchor relative to the receiver, float32, skipped when 0
+        relative = self.anchors - receiver + self.noise.normal(0.0, args.noise, self.anchors.shape)
+        relative = relative.astype(np.float32).tolist()
+        message = ""
+        keys = []
+        for number, (name, (x, y), ok) in enumerate(zip(self.names, relative, heard), start=1):
+            if ok and x != 0.0 and y != 0.0:
+                message += f"Beacon {name}: ({x:f}, {y:f})\n"  # std::to_string(float)
+                keys.append((number, round(x, 1), round(y, 1)))
+        uart_message = (message + "\n")[: UART_MESSAGE_SIZE - 1]  # snprintf truncation
+        lines.extend(uart_message.splitlines(keepends=True))
+        block_end = len(lines)
+        if args.echo:
+            echo = esp_log(self.start, "UART_SENDER", f"Sent: {uart_message}")
+            lines.extend(echo.splitlines(keepends=True))
+        return [line.encode() for line in lines], keys, block_end
+
+    def on_message(self, client, userdata, msg):
+        now = time.monotonic()
+        try:
+            positions = decode_payload(msg.payload)
+            keys = [
+                (int(beacon_id.split("-")[1]), round(coords["x"], 1), round(coords["y"], 1))
+                for beacon_id, coords in positions.items()
+            ]
+        except (ValueError, KeyError, IndexError, AttributeError):
+            keys = []
+        with self._lock:
+            self.received += 1
+            # A governed bridge may send any subset of a cycle's beacons, or
+            # aggregate several cycles: the newest cycle matched counts
+            matched = []
+            for key in keys:
+                cycles = self.pending.get(key)
+                if cycles:
+                    matched.append(cycles.popleft())
+                    if not cycles:
+                        del self.pending[key]
+            sent = [self.sent_at.pop(cycle) for cycle in matched if cycle in self.sent_at]
+            if sent:
+                self.latencies.append(now - max(sent))
+            else:
+                self.unmatched += 1  # Smoothed, corrupted, or rest of a delivered cycle
+
+    def run(self, master):
+        args = self.args
+        period = 1.0 / args.rate if args.rate > 0 else 0.0
+        byte_time = 10.0 / args.baud if args.baud > 0 else 0.0  # 8N1
+        next_cycle = time.monotonic()
+        next_report = next_cycle + REPORT_INTERVAL
+        end = next_cycle + args.seconds if args.seconds > 0 else math.inf
+        while time.monotonic() < end:
+            lines, keys, block_end = self.cycle_lines()
+            for number, line in enumerate(lines, start=1):
+                if self.rng.random() < args.corrupt:
+                    line = corrupt(line, self.rng)
+                    self.corrupted += 1
+                os.write(master, line)
+                self.bytes += len(line)
+                if byte_time:
+                    time.sleep(len(line) * byte_time)
+                if number == block_end and keys and args.broker:
+                    sent = time.monotonic()  # Last byte of the positions on the wire
+                    with self._lock:
+                        self.sent_at[self.cycles] = sent
+                        self.sent.append((sent, self.cycles, keys))
+                        for key in keys:
+                            self.pending[key].append(self.cycles)
+            self.lines += len(lines)
+            self.cycles += 1
+
+            now = time.monotonic()
+            if now >= next_report:
+                self.report(now)
+                next_report = now + REPORT_INTERVAL
+            if period:
+                next_cycle += period
+                if next_cycle > now:
+                    time.sleep(next_cycle - now)
+                else:
+                    next_cycle = now  # Falling behind: do not burst to catch up
+
+    def expire(self, now):
+        with self._lock:
+            while self.sent and self.sent[0][0] < now - LOST_AFTER:
+                _, cycle, keys = self.sent.popleft()
+                if self.sent_at.pop(cycle, None) is not None:
+                    self.unpublished += 1
+                for key in keys:
+                    cycles = self.pending.get(key)
+                    if cycles and cycles[0] == cycle:
+                        cycles.popleft()
+                        if not cycles:
+                            del self.pending[key]
+
+    def report(self, now=None):
+        now = now or time.monotonic()
+        self.expire(now)
+        elapsed = now - self.start
+        text = (
+            f"{elapsed:6.1f} s  {self.cycles} cycles  {self.lines / elapsed:.0f} lines/s  "
+            f"{self.bytes / elapsed / 1024:.1f} KiB/s  {self.corrupted} corrupted"
+        )
+        if self.args.broker:
+            text += f"  {self.received} received  {self.unmatched} unmatched"
+            text += f"  {self.unpublished} unpublished"
+            if self.latencies:
+                latency = np.array(self.latencies) * 1000.0
+                text += (
+                    f"  latency p50 {np.percentile(latency, 50):.2f} ms"
+                    f"  p99 {np.percentile(latency, 99):.2f} ms  max {latency.max():.2f} ms"
+                )
+        print(text, flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate the ESP32 serial output on a pty")
+    parser.add_argument("--link", help="Also make this path a symlink to the pty device")
+    parser.add_argument("--rate", type=float, default=1.0, help="Scan cycles/s (0: max)")
+    parser.add_argument("--baud", type=int, default=115200, help="Pace bytes like a UART (0: off)")
+    parser.add_argument("--beacons", type=int, default=len(ANCHORS), help="Anchors reported")
+    parser.add_argument("--noise", type=float, default=30.0, help="Position/range noise, cm")
+    parser.add_argument("--miss", type=float, default=0.0, help="Chance an anchor is not heard")
+    parser.add_argument("--corrupt", type=float, default=0.0, help="Chance a line is damaged")
+    parser.add_argument(
+        "--echo", action=argparse.BooleanOptionalAction, default=True, help="UART_SENDER log echo"
+    )
+    parser.add_argument("--reports", action="store_true", help="Per-anchor RSSI log lines")
+    parser.add_argument("--seconds", type=float, default=0.0, help="Run time (0: until Ctrl-C)")
+    parser.add_argument("--broker", help="Measure serial -> MQTT latency through this broker")
+    parser.add_argument("--mqtt-port", type=int, default=1883)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    master, slave = os.openpty()
+    tty.setraw(slave)  # No echo or newline translation, like a USB serial port
+    device = os.ttyname(slave)
+    if args.link:
+        if os.path.islink(args.link):
+            os.remove(args.link)
+        os.symlink(device, args.link)
+    print(f"Simulated ESP32 on {device}" + (f" ({args.link})" if args.link else ""), flush=True)
+
+    simulator = Simulator(args)
+    client = None
+    if args.broker:
+        import paho.mqtt.client as mqtt
+
+        client = mqtt.Client()
+        client.on_message = simulator.on_message
+        client.connect(args.broker, args.mqtt_port)
+        client.subscribe(robot_topic(robot_id_from_env(), POSITION))
+        client.loop_start()
+
+    try:
+        simulator.run(master)
+        time.sleep(0.5)  # Let the last messages arrive
+    except KeyboardInterrupt:
+        pass
+    finally:
+        simulator.report()
+        if client is not None:
+            client.loop_stop()
+            client.disconnect()
+        if args.link and os.path.islink(args.link):
+            os.remove(args.link)
+        os.close(master)
+        os.close(slave)
+
+
+if __name__ == "__main__":
+    main()
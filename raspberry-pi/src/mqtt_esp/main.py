@@ -1,65 +1,249 @@
-import serial
-import re
-import paho.mqtt.client as mqtt
+"""
+Serial -> MQTT bridge for the beacon positions computed on the ESP32.
+
+Every scan cycle the firmware writes one block of position lines and then
+logs the same block on the same UART:
+
+    Beacon A: (250.000000, 120.000000)
+    Beacon B: (-350.000000, 120.000000)
+    Beacon C: (-50.000000, 420.000000)
+    I (81234) UART_SENDER: Sent: Beacon A: (250.000000, 120.000000)
+    Beacon B: (-350.000000, 120.000000)
+    ...
+
+The port is read in chunks of whatever is waiting, lines are split from
+a byte buffer and matched with a precompiled pattern. A cycle ends at
+the first other line (the log echo, which is skipped) or after
+READ_TIMEOUT without data. The beacons of a cycle that PublishGovernor
+lets through (moved, or due for a heartbeat) are published together as
+one message on sar-robot/<robot_id>/position. With
+--log-dir every cycle is also logged, unsmoothed and tagged with its
+cycle number, by the background PositionLogger.
+
+    python main.py --port /dev/ttyUSB0 --broker vlg2.local
+"""
+
+import argparse
 import json
-import csv
+import math
 import os
+import re
+import signal
+import sys
 import time
 
-broker = "vlg2.local"  # Change to your MQTT broker address
-port = 1883  # Default MQTT port
-topic = "sar-robot/position"
+import paho.mqtt.client as mqtt
+import serial
 
-client = mqtt.Client()
-client.connect(broker, port)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))
+from common.beacon_filter import BeaconFilter
+from common.sar_codec import encode_positions
+from common.sar_topics import POSITION, robot_id_from_env, robot_topic
+from position_log import PositionLogger
+from publish_governor import DEADBAND, MAX_INTERVAL, MIN_INTERVAL, WINDOW, PublishGovernor
 
-# Adjust to your actual port (e.g., COM3 for Windows, /dev/ttyUSB0 for Linux)
-PORT = '/dev/ttyUSB0'
+BROKER = "vlg2.local"  # Change to your MQTT broker address
+MQTT_PORT = 1883
+SERIAL_PORT = "/dev/ttyUSB0"  # e.g. COM3 on Windows
 BAUD = 115200
+PAYLOAD_FORMAT = "json"  # or "binary" (common/sar_codec.py), the dashboard reads both
+SMOOTH_POSITIONS = False  # Kalman-smooth here (then set POSITION_SMOOTHING = False in the dashboard)
+LOG_DIR = None  # e.g. "position_logs" to log every cycle (position_log.py)
+
+READ_TIMEOUT = 0.05  # s; a quiet gap this long also ends a cycle
+MAX_LINE = 1024  # bytes without a newline before the buffer is dropped as noise
+STATS_INTERVAL = 10.0  # s between counter reports
+
+_NUMBER = rb"(-?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?|-?nan|-?inf)"
+POSITION_LINE = re.compile(
+    rb"Beacon ([A-Za-z]): \(\s*" + _NUMBER + rb",\s*" + _NUMBER + rb"\s*\)"
+)
+ECHO_MARKER = b"Sent: "  # uart_sender.cc logs every block it writes
+
+
+class SerialIngest:
+    """Turns serial bytes into cycles of {beacon number: (x, y)}."""
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.pending = {}
+        self.echo = False  # Inside the logged copy of a block
+        self.lines = 0
+        self.positions = 0
+        self.cycles = 0
+        self.parse_errors = 0
+        self.dropped_bytes = 0
+
+    def feed(self, data):
+        """Add received bytes; returns the cycles they completed."""
+        self.buffer += data
+        cycles = []
+        start = 0
+        while True:
+            end = self.buffer.find(b"\n", start)
+            if end < 0:
+                break
+            cycle = self._line(bytes(self.buffer[start:end]).strip())
+            if cycle:
+                cycles.append(cycle)
+            start = end + 1
+        del self.buffer[:start]
+        if len(self.buffer) > MAX_LINE:
+            self.dropped_bytes += len(self.buffer)
+            self.buffer.clear()
+        return cycles
+
+    def _line(self, line):
+        self.lines += 1
+        match = POSITION_LINE.match(line)
+        if match is None:
+            if line.startswith(b"Beacon ") and not self.echo:
+                self.parse_errors += 1  # Truncated or corrupted position line
+            cycle = self.flush()
+            self.echo = ECHO_MARKER in line
+            return cycle
+        if self.echo:
+            return None
+        number = ord(match.group(1).lower()) - ord("a") + 1
+        x = float(match.group(2))
+        y = float(match.group(3))
+        if not (math.isfinite(x) and math.isfinite(y)):
+            self.parse_errors += 1  # Firmware printed nan/inf
+            return None
+        cycle = None
+        if number in self.pending:
+            cycle = self.flush()  # Same beacon again: the end of the last cycle was lost
+        self.pending[number] = (x, y)
+        self.positions += 1
+        return cycle
+
+    def flush(self):
+        """End the current cycle; returns it, or None if it is empty."""
+        self.echo = False
+        if not self.pending:
+            return None
+        cycle = self.pending
+        self.pending = {}
+        self.cycles += 1
+        return cycle
+
+
+def smooth_cycle(cycle, position_filter):
+    """Kalman-smoothed copy of a cycle, every beacon in one update."""
+    numbers = list(cycle)
+    smoothed = position_filter.update(numbers, [cycle[number] for number in numbers])
+    return dict(zip(numbers, map(tuple, smoothed.tolist())))
+
+
+def position_message(positions):
+    return {f"beacon-{number}": {"x": x, "y": y} for number, (x, y) in sorted(positions.items())}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Forward ESP32 beacon positions to MQTT")
+    parser.add_argument("--port", default=SERIAL_PORT, help="ESP32 serial port")
+    parser.add_argument("--baud", type=int, default=BAUD)
+    parser.add_argument("--broker", default=BROKER, help="MQTT broker address")
+    parser.add_argument("--mqtt-port", type=int, default=MQTT_PORT)
+    parser.add_argument("--format", choices=("json", "binary"), default=PAYLOAD_FORMAT)
+    parser.add_argument(
+        "--smooth",
+        action=argparse.BooleanOptionalAction,
+        default=SMOOTH_POSITIONS,
+        help="Kalman-smooth positions before publishing",
+    )
+    parser.add_argument(
+        "--deadband", type=float, default=DEADBAND, help="cm a beacon must move to be resent"
+    )
+    parser.add_argument(
+        "--min-interval", type=float, default=MIN_INTERVAL, help="s between sends of a beacon"
+    )
+    parser.add_argument(
+        "--max-interval", type=float, default=MAX_INTERVAL, help="s heartbeat for still beacons"
+    )
+    parser.add_argument(
+        "--window", type=float, default=WINDOW, help="s to aggregate changes into one message"
+    )
+    parser.add_argument(
+        "--log-dir", default=LOG_DIR, help="Log raw positions here (see position_log.py)"
+    )
+    parser.add_argument("--verbose", action="store_true", help="Print every published message")
+    args = parser.parse_args()
+
+    topic = robot_topic(robot_id_from_env(), POSITION)  # sar-robot/<$SAR_ROBOT_ID>/position
+    # Exit through the finally below on SIGTERM too, so the log is flushed
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    position_filter = BeaconFilter() if args.smooth else None
+    ingest = SerialIngest()
+    governor = PublishGovernor(args.deadband, args.min_interval, args.max_interval, args.window)
+    position_logger = None
+    if args.log_dir:
+        position_logger = PositionLogger(args.log_dir)
+        position_logger.start()
+    client = mqtt.Client()
+    client.connect(args.broker, args.mqtt_port)
+    client.loop_start()
+    sequence = 0
+
+    def publish(positions):
+        nonlocal sequence
+        message = position_message(positions)
+        if args.format == "binary":
+            client.publish(topic, encode_positions(message, sequence))
+        else:
+            client.publish(topic, json.dumps(message))
+        sequence += 1
+        if args.verbose:
+            print(f"Published: {message}")
+
+    try:
+        with serial.Serial(args.port, args.baud, timeout=READ_TIMEOUT) as ser:
+            print(f"Listening on {args.port} at {args.baud} baud, publishing to {topic}")
+            stats_time = time.monotonic()
+            stats_lines = 0
+            while True:
+                data = ser.read(ser.in_waiting or 1)
+                if data:
+                    cycles = ingest.feed(data)
+                else:
+                    cycle = ingest.flush()  # Quiet line: the cycle is complete
+                    cycles = [cycle] if cycle else []
+
+                now = time.monotonic()
+                for cycle in cycles:
+                    if position_logger is not None:
+                        position_logger.log(time.time(), ingest.cycles, cycle)
+                    if position_filter is not None:
+                        cycle = smooth_cycle(cycle, position_filter)
+                    due = governor.offer(cycle, now)
+                    if due:
+                        publish(due)
+                if not cycles:
+                    due = governor.due(now)  # Held-back changes and heartbeats
+                    if due:
+                        publish(due)
+
+                if now - stats_time >= STATS_INTERVAL:
+                    print(
+                        f"{(ingest.lines - stats_lines) / (now - stats_time):.1f} lines/s, "
+                        f"{ingest.cycles} cycles, {ingest.positions} positions, "
+                        f"{ingest.parse_errors} parse errors, {ingest.dropped_bytes} bytes dropped"
+                    )
+                    print(f"Published: {governor.stats()}")
+                    stats_time = now
+                    stats_lines = ingest.lines
+    except serial.SerialException as e:
+        print(f"Serial error: {e}")
+    except KeyboardInterrupt:
+        print("Stopped by user.")
+    finally:
+        print(f"Published: {governor.stats()}")
+        if position_logger is not None:
+            position_logger.stop()
+            print(f"Logged {position_logger.rows} positions to {args.log_dir}")
+        client.loop_stop()
+        client.disconnect()
+
 
-csv_filename = "beacon_output5.csv"
-file_exists = os.path.isfile(csv_filename)
-
-try:
-    ser = serial.Serial(PORT, BAUD, timeout=1)
-    print(f"Listening on {PORT} at {BAUD} baud...\n")
-
-    # if not file_exists or os.stat(csv_filename).st_size == 0:
-    #     with open(csv_filename, mode="w", newline='') as file:
-    #         writer = csv.writer(file)
-    #         writer.writerow(["beacon", "millis", "x", "y"])  # CSV header
-
-    while True:
-        millis = int(round(time.time() * 1000))
-        try:
-            line = ser.readline().decode('utf-8').strip()
-            print(f"Raw line: {line}")
-            if line and re.match(r"Beacon .:.+\)", line):
-                print(f"Received: {line}")
-                res = line.lower()
-                beaconid = ord(res[7]) - ord('a') + 1
-                res = res.split('(')[1][:-1].split(',')
-                x = float(res[0].strip())
-                y = float(res[1].strip())
-                message = {
-                    f"beacon-{beaconid}": {
-                        "x": x,
-                        "y": y
-                    }
-                }
-
-                # with open(csv_filename, mode="a", newline='') as file:
-                #     writer = csv.writer(file)
-                #     writer.writerow([f"beacon-{beaconid}", millis, x, y])
-
-                
-                print(f"Processed message: {message}")
-                client.publish(topic, json.dumps(message))
-        except:
-            continue
-
-except serial.SerialException as e:
-    print(f"Serial error: {e}")
-except KeyboardInterrupt:
-    print("Stopped by user.")
-client.disconnect()
+if __name__ == "__main__":
+    main()
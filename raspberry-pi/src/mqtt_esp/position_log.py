@@ -0,0 +1,301 @@
+"""
+Background logger for the beacon positions forwarded by main.py.
+
+A log is a directory:
+
+    index.json                  segments with row counts and time ranges
+    segment-00000.npy           structured arrays of RECORD rows,
+    segment-00001.npy           rotated every SEGMENT_ROWS
+
+log() writes rows straight into a preallocated NumPy block under an
+uncontended lock; full blocks are handed to a writer thread, which
+appends them to the current segment (partial blocks are taken every
+FLUSH_INTERVAL). The writer never converts Python objects, so it holds
+the GIL only briefly and the serial thread is not held up.
+
+Segments are ordinary .npy files whose fixed-size header is rewritten
+with the new row count after each append, so np.load() reads them at any
+time, even while logging; after a crash only rows appended since the
+last header update are lost.
+
+    python position_log.py csv position_logs positions.csv
+    python position_log.py benchmark
+"""
+
+import argparse
+import csv
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# "sequence" holds the serial cycle number (see main.py)
+RECORD = np.dtype(
+    [("t", "<f8"), ("sequence", "<u4"), ("beacon", "<u2"), ("x", "<f4"), ("y", "<f4")]
+)
+SEGMENT_ROWS = 1_000_000  # 22 MB per segment
+BLOCK_ROWS = 16384  # rows per in-memory block (360 KB)
+FLUSH_INTERVAL = 5.0  # seconds, upper bound on rows sitting in memory
+MAX_BACKLOG_BLOCKS = 256  # full blocks waiting for the disk before rows are dropped
+HEADER_BYTES = 256  # .npy v1.0 header, padded so it can be rewritten in place
+
+INDEX_FILE = "index.json"
+
+
+def segment_filename(segment_no):
+    return f"segment-{segment_no:05d}.npy"
+
+
+def _as_record(rows, source):
+    """rows as RECORD; same-layout records with other field names are viewed."""
+    if rows.dtype == RECORD:
+        return rows
+    fields = [rows.dtype.fields[name][:2] for name in rows.dtype.names or ()]
+    if fields != [RECORD.fields[name][:2] for name in RECORD.names]:
+        raise ValueError(f"{source}: unsupported record layout {rows.dtype}")
+    return rows.view(RECORD)  # e.g. "cycle" instead of "sequence"
+
+
+def _npy_header(rows):
+    header = repr(
+        {"descr": np.lib.format.dtype_to_descr(RECORD), "fortran_order": False, "shape": (rows,)}
+    ).encode("latin1")
+    preamble = b"\x93NUMPY\x01\x00" + (HEADER_BYTES - 10).to_bytes(2, "little")
+    return preamble + header.ljust(HEADER_BYTES - 11) + b"\n"
+
+
+class PositionLogger:
+    """Logs position cycles from the serial thread without blocking it.
+
+    Call start() before logging and stop() to write out the remaining
+    rows and close the segment.
+    """
+
+    def __init__(self, directory, segment_rows=SEGMENT_ROWS):
+        self.directory = directory
+        self.segment_rows = segment_rows
+        self.rows = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._block = np.empty(BLOCK_ROWS, dtype=RECORD)
+        self._fill = 0
+        self._full = deque()  # (block, rows) waiting for the writer
+        self._spare = []  # written blocks for reuse
+        self._wakeup = threading.Event()
+        self._running = False
+        self._thread = None
+        self._segments = []  # index entries
+        self._segment = None
+        self._segment_no = -1
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        index_path = os.path.join(self.directory, INDEX_FILE)
+        if os.path.exists(index_path):
+            # Continue an existing log in a new segment
+            with open(index_path) as f:
+                index = json.load(f)
+            # Refuse to append rows the existing segments cannot be read with
+            descr = [tuple(field) for field in index["dtype"]]
+            _as_record(np.zeros(0, dtype=np.lib.format.descr_to_dtype(descr)), index_path)
+            self._segments = index["segments"]
+            self._segment_no = max((s["segment"] for s in self._segments), default=-1)
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._writer_loop, name="PositionLogger", daemon=True
+        )
+        self._thread.start()
+
+    def log(self, t, cycle_number, positions):
+        """Record one cycle ({beacon number: (x, y)}); safe to call from any thread."""
+        if not self._running:
+            return
+        with self._lock:
+            for number, (x, y) in positions.items():
+                if self._fill == BLOCK_ROWS:
+                    self._hand_over()
+                self._block[self._fill] = (t, cycle_number, number, x, y)
+                self._fill += 1
+
+    def _hand_over(self):
+        """Queue the current block for writing (lock held)."""
+        if len(self._full) >= MAX_BACKLOG_BLOCKS:
+            self.dropped += self._fill  # Disk too slow: overwrite this block
+        else:
+            self._full.append((self._block, self._fill))
+            self._block = self._spare.pop() if self._spare else np.empty(BLOCK_ROWS, dtype=RECORD)
+            self._wakeup.set()
+        self._fill = 0
+
+    def stop(self):
+        if not self._running:
+            return
+        self._running = False
+        self._wakeup.set()
+        self._thread.join()
+        self._thread = None
+
+    # --- Writer thread ---
+    def _writer_loop(self):
+        try:
+            while self._running:
+                self._wakeup.wait(FLUSH_INTERVAL)
+                self._wakeup.clear()
+                self._drain()
+            self._drain()
+        finally:
+            if self._segment is not None:
+                self._segment.close()
+
+    def _drain(self):
+        with self._lock:
+            if self._fill:
+                self._hand_over()  # Partial block, so nothing waits longer than FLUSH_INTERVAL
+        wrote = False
+        while self._full:
+            block, rows = self._full.popleft()
+            start = 0
+            while start < rows:
+                if self._segment is None or self._segments[-1]["rows"] >= self.segment_rows:
+                    self._open_segment()
+                entry = self._segments[-1]
+                take = min(rows - start, self.segment_rows - entry["rows"])
+                self._append(entry, block[start : start + take])
+                start += take
+            self._spare.append(block)
+            wrote = True
+        if wrote:
+            self._write_index()
+
+    def _append(self, entry, rows):
+        self._segment.seek(0, os.SEEK_END)
+        self._segment.write(rows.data)
+        entry["rows"] += len(rows)
+        if entry["t_first"] is None:
+            entry["t_first"] = float(rows["t"][0])
+        entry["t_last"] = float(rows["t"][-1])
+        self._segment.seek(0)
+        self._segment.write(_npy_header(entry["rows"]))
+        self._segment.flush()
+        self.rows += len(rows)
+
+    def _open_segment(self):
+        if self._segment is not None:
+            self._segment.close()
+        self._segment_no += 1
+        filename = segment_filename(self._segment_no)
+        self._segment = open(os.path.join(self.directory, filename), "w+b")
+        self._segment.write(_npy_header(0))
+        entry = {"segment": self._segment_no, "file": filename, "rows": 0}
+        entry.update(t_first=None, t_last=None)
+        self._segments.append(entry)
+        self._write_index()
+
+    def _write_index(self):
+        path = os.path.join(self.directory, INDEX_FILE)
+        with open(path + ".tmp", "w") as f:
+            descr = np.lib.format.dtype_to_descr(RECORD)
+            json.dump({"dtype": descr, "segments": self._segments}, f)
+        os.replace(path + ".tmp", path)
+
+
+# --- Reading ---
+def read_positions(directory, t0=None, t1=None):
+    """All logged rows with t0 <= t <= t1, in time order, as one structured array."""
+    with open(os.path.join(directory, INDEX_FILE)) as f:
+        segments = json.load(f)["segments"]
+    parts = []
+    for entry in segments:
+        if not entry["rows"]:
+            continue
+        if t0 is not None and entry["t_last"] < t0 or t1 is not None and entry["t_first"] > t1:
+            continue  # Skipped using the index alone
+        path = os.path.join(directory, entry["file"])
+        rows = _as_record(np.load(path, mmap_mode="r"), path)
+        if t0 is not None or t1 is not None:
+            t = rows["t"]
+            inside = np.ones(len(rows), dtype=bool)
+            if t0 is not None:
+                inside &= t >= t0
+            if t1 is not None:
+                inside &= t <= t1
+            rows = rows[inside]
+        parts.append(np.asarray(rows))
+    return np.concatenate(parts) if parts else np.zeros(0, dtype=RECORD)
+
+
+def to_csv(directory, path, t0=None, t1=None):
+    """Write the log as CSV (millis, sequence, beacon, x, y); returns the row count."""
+    rows = read_positions(directory, t0, t1)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["millis", "sequence", "beacon", "x", "y"])
+        writer.writerows(
+            zip(
+                np.round(rows["t"] * 1000).astype(np.int64).tolist(),
+                rows["sequence"].tolist(),
+                [f"beacon-{number}" for number in rows["beacon"].tolist()],
+                rows["x"].tolist(),
+                rows["y"].tolist(),
+            )
+        )
+    return len(rows)
+
+
+# --- Benchmark ---
+def benchmark(args):
+    import tempfile
+
+    cycle = {1: (250.0, 120.0), 2: (-350.0, 120.0), 3: (-50.0, 420.0)}
+    with tempfile.TemporaryDirectory() as directory:
+        logger = PositionLogger(directory, segment_rows=args.cycles)  # Rotates twice
+        logger.start()
+        timings = np.empty(args.cycles)
+        for number in range(args.cycles):
+            started = time.perf_counter()
+            logger.log(time.time(), number, cycle)
+            timings[number] = time.perf_counter() - started
+        started = time.perf_counter()
+        logger.stop()
+        stop_s = time.perf_counter() - started
+        timings *= 1e6
+        print(
+            f"log(): mean {timings.mean():.2f} us, p50 {np.percentile(timings, 50):.2f} us, "
+            f"p99.9 {np.percentile(timings, 99.9):.2f} us, max {timings.max():.1f} us, "
+            f"{(timings > 100.0).sum()} calls over 100 us"
+        )
+        print(f"{logger.rows} rows, {logger.dropped} dropped, final flush {stop_s * 1000:.1f} ms")
+
+        started = time.perf_counter()
+        rows = read_positions(directory)
+        read_s = time.perf_counter() - started
+        started = time.perf_counter()
+        to_csv(directory, os.path.join(directory, "positions.csv"))
+        csv_s = time.perf_counter() - started
+        print(f"read {len(rows)} rows in {read_s * 1000:.1f} ms, CSV in {csv_s * 1000:.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Beacon position log tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    to_csv_parser = commands.add_parser("csv", help="Convert a log directory to CSV")
+    to_csv_parser.add_argument("directory")
+    to_csv_parser.add_argument("output")
+    to_csv_parser.add_argument("--from", dest="t0", type=float, help="Unix time")
+    to_csv_parser.add_argument("--to", dest="t1", type=float, help="Unix time")
+    benchmark_parser = commands.add_parser("benchmark", help="Measure the log() cost")
+    benchmark_parser.add_argument("--cycles", type=int, default=200000, help="Three beacons each")
+    args = parser.parse_args()
+
+    if args.command == "csv":
+        rows = to_csv(args.directory, args.output, args.t0, args.t1)
+        print(f"Wrote {rows} rows to {args.output}")
+    else:
+        benchmark(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Decides which beacon positions main.py actually publishes.
+
+Every scan cycle reports every beacon, moving or not. PublishGovernor
+keeps the last published and the latest offered position per beacon and
+sends a beacon only when
+
+    it moved more than `deadband` from its last published position and
+    at least `min_interval` has passed since it was last published, or
+    `max_interval` has passed (heartbeat, so receivers can tell a still
+    beacon from a lost one).
+
+Due beacons are sent together in one message; with `window` > 0 the
+first change opens an aggregation window and everything due by its end
+goes out in one message. A change held back by min_interval or the
+window is not lost: the latest position is sent as soon as it is due.
+"""
+
+import math
+
+DEADBAND = 5.0  # cm
+MIN_INTERVAL = 0.1  # s between messages for one beacon
+MAX_INTERVAL = 5.0  # s heartbeat, even for a still beacon
+WINDOW = 0.0  # s aggregation window (0: publish as soon as due)
+
+
+class PublishGovernor:
+    def __init__(
+        self,
+        deadband=DEADBAND,
+        min_interval=MIN_INTERVAL,
+        max_interval=MAX_INTERVAL,
+        window=WINDOW,
+    ):
+        self.deadband = deadband
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.window = window
+        self.published = {}  # beacon -> (x, y, time)
+        self.latest = {}  # beacon -> (x, y, time offered), not yet published
+        self._window_end = None
+        # Stats
+        self.offered = 0
+        self.sent = 0  # positions
+        self.messages = 0
+        self.heartbeats = 0
+        self.age_total = 0.0  # offered -> sent, summed over sent positions
+        self.age_max = 0.0
+
+    def offer(self, positions, now):
+        """Take one cycle's {beacon: (x, y)}; returns the positions due now."""
+        self.offered += len(positions)
+        for beacon, (x, y) in positions.items():
+            self.latest[beacon] = (x, y, now)
+        return self.due(now)
+
+    def due(self, now):
+        """{beacon: (x, y)} to publish now (empty if nothing is due).
+
+        Call on idle ticks too, so held-back changes and heartbeats go out
+        without waiting for the next cycle.
+        """
+        ready = []
+        for beacon, (x, y, _) in self.latest.items():
+            last = self.published.get(beacon)
+            if last is None:
+                ready.append(beacon)
+                continue
+            elapsed = now - last[2]
+            if elapsed >= self.max_interval or (
+                elapsed >= self.min_interval
+                and math.hypot(x - last[0], y - last[1]) > self.deadband
+            ):
+                ready.append(beacon)
+        if not ready:
+            return {}
+        if self.window > 0:
+            if self._window_end is None:
+                self._window_end = now + self.window
+            if now < self._window_end:
+                return {}
+            self._window_end = None
+
+        message = {}
+        for beacon in ready:
+            x, y, offered_at = self.latest.pop(beacon)
+            last = self.published.get(beacon)
+            if last is not None and math.hypot(x - last[0], y - last[1]) <= self.deadband:
+                self.heartbeats += 1
+            self.published[beacon] = (x, y, now)
+            message[beacon] = (x, y)
+            age = now - offered_at
+            self.age_total += age
+            self.age_max = max(self.age_max, age)
+        self.sent += len(message)
+        self.messages += 1
+        return message
+
+    @property
+    def suppressed(self):
+        """Offered positions that were superseded or inside the deadband."""
+        return self.offered - self.sent - len(self.latest)
+
+    def stats(self):
+        mean_age = self.age_total / self.sent if self.sent else 0.0
+        return (
+            f"{self.messages} messages ({self.sent} positions, {self.heartbeats} heartbeats), "
+            f"{self.suppressed} of {self.offered} suppressed, "
+            f"age when sent mean {mean_age * 1000:.0f} ms max {self.age_max * 1000:.0f} ms"
+        )
@@ -0,0 +1,352 @@
+"""
+Host-side trilateration of the ESP32 range reports.
+
+The ESP32 locates its Wi-Fi anchors on the microcontroller
+(centroid_utils.cc): pairwise circle intersections and a weighted
+centroid, for exactly three anchors, returning {0, 0} when the circles
+miss each other. Its console (the same UART the positions come over)
+also logs every anchor it hears:
+
+    I (81234) MAIN: Beacon A: RSSI=-61.0 Result=243.1187
+
+This module solves from those raw reports on the Pi instead. Ranges come
+from the firmware model ("Result") or from the RSSI through a log-distance
+path-loss model, and Trilaterator fits the receiver position to any
+number of anchors by nonlinear least squares, for a whole batch of
+reports at once:
+
+    1. Linear start: subtracting the (weighted) mean range equation
+       removes |p|^2, leaving a 2x2 system built from the anchor outer
+       products precomputed in the constructor.
+    2. Gauss-Newton on the range residuals, every report of the batch in
+       the same few array operations; 2x2 normal equations are solved in
+       closed form.
+
+Anchors that were not heard are NaN and simply weighted out. Reports
+with fewer than three anchors, collinear anchors or a poor fit come back
+as NaN instead of a misleading origin.
+
+Like the firmware, the published message gives each anchor relative to
+the receiver (beacon-1 = A, ...) on sar-robot/<robot_id>/position:
+
+    python trilateration.py --port /dev/ttyUSB0 --broker vlg2.local
+    python trilateration.py --benchmark
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))
+from common.sar_codec import encode_positions
+from common.sar_topics import POSITION, robot_id_from_env, robot_topic
+
+# Anchor positions in cm, as pos_network_a/b/c in esp32/main/main_functions.cc
+ANCHORS = {"A": (300.0, 0.0), "B": (-300.0, 0.0), "C": (0.0, 300.0)}
+
+TX_POWER = -40.0  # RSSI at 1 m, dBm
+PATH_LOSS_EXPONENT = 2.5
+ITERATIONS = 6  # Gauss-Newton iteration limit (three are usually enough)
+TOLERANCE = 0.1  # cm; a row stops iterating once its step is smaller
+MAX_RESIDUAL = 200.0  # cm RMS range residual above which a fix is rejected
+MIN_ANCHORS = 3
+
+REPORT_PATTERN = re.compile(
+    r"Beacon ([A-Za-z0-9]+): RSSI=(-?\d+(?:\.\d*)?) Result=(-?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?)"
+)
+CYCLE_END = "Calculating weighted centroid"  # Logged once per scan, after the reports
+
+
+def rssi_to_distance(rssi, tx_power=TX_POWER, exponent=PATH_LOSS_EXPONENT):
+    """Log-distance path-loss model: RSSI in dBm -> distance in cm."""
+    return 100.0 * 10.0 ** ((tx_power - np.asarray(rssi, dtype=np.float64)) / (10.0 * exponent))
+
+
+class Trilaterator:
+    def __init__(
+        self,
+        anchors,
+        iterations=ITERATIONS,
+        tolerance=TOLERANCE,
+        max_residual=MAX_RESIDUAL,
+        min_anchors=MIN_ANCHORS,
+    ):
+        self.anchors = np.asarray(anchors, dtype=np.float64).reshape(-1, 2)
+        self.iterations = iterations
+        self.tolerance = tolerance
+        self.max_residual = max_residual
+        self.min_anchors = min_anchors
+        # Geometry shared by every solve: |a|^2 and a a' as (xx, xy, yy)
+        self._ax, self._ay = ax, ay = self.anchors.T.copy()
+        self._norms = ax * ax + ay * ay
+        self._outer = np.column_stack((ax * ax, ax * ay, ay * ay))
+        self._ones = np.ones(len(self.anchors))  # Row sums as "@ ones": faster for few columns
+        scale = float(np.abs(self.anchors).max()) if len(self.anchors) else 1.0
+        self._min_spread = (1e-6 * max(scale, 1.0)) ** 4  # det below this: collinear
+
+    def __len__(self):
+        return len(self.anchors)
+
+    def solve(self, distances):
+        """Positions for distances (n, anchors), NaN where an anchor was not heard.
+
+        Returns (positions (n, 2), rms range residuals (n,)); rejected rows
+        are NaN in both.
+        """
+        d = np.asarray(distances, dtype=np.float64).reshape(-1, len(self.anchors))
+        heard = np.isfinite(d) & (d >= 0.0)
+        w = heard.astype(np.float64)
+        d = np.where(heard, d, 0.0)
+        count = w @ self._ones
+
+        # Linear start: with the weighted mean equation subtracted,
+        #   2 (a_j - a_mean) . p = |a_j|^2 - mean|a|^2 - (d_j^2 - mean d^2)
+        # and the normal matrix is the weighted covariance of the anchors.
+        safe_count = np.maximum(count, 1.0)
+        mean = (w @ self.anchors) / safe_count[:, None]
+        sxx, sxy, syy = ((w @ self._outer) / safe_count[:, None]).T
+        sxx = sxx - mean[:, 0] ** 2
+        sxy = sxy - mean[:, 0] * mean[:, 1]
+        syy = syy - mean[:, 1] ** 2
+        det = sxx * syy - sxy * sxy
+        ok = (count >= self.min_anchors) & (det > self._min_spread)
+
+        rhs = w * (self._norms - d * d)
+        rhs -= w * (rhs @ self._ones / safe_count)[:, None]
+        bx, by = (0.5 * (rhs @ self.anchors) / safe_count[:, None]).T
+        det_safe = np.where(ok, det, 1.0)
+        # x and y are kept as separate (n,) arrays: broadcasting over a
+        # trailing axis of 2 is several times slower in NumPy
+        px = (syy * bx - sxy * by) / det_safe
+        py = (sxx * by - sxy * bx) / det_safe
+
+        # Gauss-Newton on r_j = |p - a_j| - d_j; rows leave once converged
+        ax, ay = self._ax, self._ay
+        active = np.flatnonzero(ok)
+        for _ in range(self.iterations):
+            if not len(active):
+                break
+            x = px[active]
+            y = py[active]
+            dx = x[:, None] - ax
+            dy = y[:, None] - ay
+            ranges = np.maximum(np.sqrt(dx * dx + dy * dy), 1e-9)
+            ux = dx / ranges
+            uy = dy / ranges
+            wux = w[active] * ux
+            wuy = w[active] * uy
+            r = ranges - d[active]
+            jxx = (wux * ux) @ self._ones
+            jxy = (wux * uy) @ self._ones
+            jyy = (wuy * uy) @ self._ones
+            gx = (wux * r) @ self._ones
+            gy = (wuy * r) @ self._ones
+            jdet = jxx * jyy - jxy * jxy
+            jdet = np.where(np.abs(jdet) > 1e-12, jdet, np.inf)  # Degenerate: no step
+            step_x = (jyy * gx - jxy * gy) / jdet
+            step_y = (jxx * gy - jxy * gx) / jdet
+            px[active] = x - step_x
+            py[active] = y - step_y
+            active = active[np.maximum(np.abs(step_x), np.abs(step_y)) >= self.tolerance]
+
+        dx = px[:, None] - ax
+        dy = py[:, None] - ay
+        residual = w * (np.sqrt(dx * dx + dy * dy) - d)
+        rms = np.sqrt((residual * residual) @ self._ones / safe_count)
+        ok &= np.isfinite(rms) & (rms <= self.max_residual)
+        position = np.column_stack((px, py))
+        position[~ok] = np.nan
+        rms[~ok] = np.nan
+        return position, rms
+
+
+def relative_beacons(anchors, position):
+    """Message with each anchor relative to the receiver, as the firmware sends."""
+    return {
+        f"beacon-{number}": {"x": float(ax - position[0]), "y": float(ay - position[1])}
+        for number, (ax, ay) in enumerate(np.asarray(anchors).tolist(), start=1)
+    }
+
+
+class CycleCollector:
+    """Groups report lines into one row of ranges per scan cycle."""
+
+    def __init__(self, names, use_rssi=False, tx_power=TX_POWER, exponent=PATH_LOSS_EXPONENT):
+        self.columns = {name.upper(): column for column, name in enumerate(names)}
+        self.use_rssi = use_rssi
+        self.tx_power = tx_power
+        self.exponent = exponent
+        self.lines = 0
+        self.reports = 0
+        self._row = self._empty()
+
+    def _empty(self):
+        return np.full(len(self.columns), np.nan)
+
+    def add(self, line):
+        """Feed one console line; returns a completed (anchors,) row or None."""
+        self.lines += 1
+        match = REPORT_PATTERN.search(line)
+        if match is None:
+            if CYCLE_END in line:
+                return self.flush()
+            return None
+        column = self.columns.get(match.group(1).upper())
+        if column is None:
+            return None
+        self.reports += 1
+        if self.use_rssi:
+            distance = float(rssi_to_distance(float(match.group(2)), self.tx_power, self.exponent))
+        else:
+            distance = float(match.group(3))
+        completed = None
+        if np.isfinite(self._row[column]):
+            completed = self.flush()  # Same anchor again: a cycle end was lost
+        self._row[column] = distance
+        return completed
+
+    def flush(self):
+        row = self._row
+        self._row = self._empty()
+        return row if np.isfinite(row).any() else None
+
+
+# --- Serial -> MQTT ---
+def serve(args):
+    # Only needed on the robot, so the benchmark runs without them
+    import paho.mqtt.client as mqtt
+    import serial
+
+    names = list(ANCHORS)
+    anchors = np.array([ANCHORS[name] for name in names])
+    trilaterator = Trilaterator(anchors, max_residual=args.max_residual)
+    collector = CycleCollector(names, args.source == "rssi", args.tx_power, args.exponent)
+    topic = robot_topic(robot_id_from_env(), POSITION)
+
+    client = mqtt.Client()
+    client.connect(args.broker, args.mqtt_port)
+    client.loop_start()
+    sequence = 0
+    fixes = 0
+    rejected = 0
+    try:
+        with serial.Serial(args.port, args.baud, timeout=1) as ser:
+            print(f"Listening on {args.port} at {args.baud} baud, publishing to {topic}")
+            while True:
+                line = ser.readline().decode("utf-8", errors="replace")
+                if not line:
+                    continue
+                row = collector.add(line)
+                if row is None:
+                    continue
+                position, rms = trilaterator.solve(row[None, :])
+                if not np.isfinite(position[0, 0]):
+                    rejected += 1
+                    print(f"No fix from ranges {np.round(row, 1).tolist()}")
+                    continue
+                fixes += 1
+                message = relative_beacons(anchors, position[0])
+                if args.format == "binary":
+                    client.publish(topic, encode_positions(message, sequence))
+                else:
+                    client.publish(topic, json.dumps(message))
+                sequence += 1
+                if args.verbose:
+                    print(f"Fix {position[0].round(1).tolist()} rms {rms[0]:.1f} cm")
+    except KeyboardInterrupt:
+        print("Stopped by user.")
+    finally:
+        print(f"{collector.reports} reports, {fixes} fixes, {rejected} rejected")
+        client.loop_stop()
+        client.disconnect()
+
+
+# --- Benchmark ---
+def _synthetic(rng, anchors, n, range_std, area):
+    truth = rng.uniform(-area, area, (n, 2))
+    ranges = np.hypot(*(truth[:, None, :] - anchors).transpose(2, 0, 1))
+    return truth, np.maximum(ranges + rng.normal(0.0, range_std, ranges.shape), 0.0)
+
+
+def benchmark(args):
+    rng = np.random.default_rng(1)
+    layouts = {
+        "3 anchors": np.array(list(ANCHORS.values())),
+        "5 anchors": np.array(
+            list(ANCHORS.values()) + [(0.0, -300.0), (300.0, 300.0)], dtype=np.float64
+        ),
+    }
+    print(f"{'layout':<10}{'noise cm':>9}{'median':>9}{'p90':>9}{'linear p90':>12}{'fixes':>8}")
+    for name, anchors in layouts.items():
+        for range_std in (10.0, 50.0, 100.0):
+            truth, ranges = _synthetic(rng, anchors, args.points, range_std, args.area)
+            solved, _ = Trilaterator(anchors, max_residual=np.inf).solve(ranges)
+            linear, _ = Trilaterator(anchors, iterations=0, max_residual=np.inf).solve(ranges)
+            error = np.hypot(*(solved - truth).T)
+            linear_error = np.hypot(*(linear - truth).T)
+            print(
+                f"{name:<10}{range_std:>9.0f}{np.nanmedian(error):>9.1f}"
+                f"{np.nanpercentile(error, 90):>9.1f}{np.nanpercentile(linear_error, 90):>12.1f}"
+                f"{np.isfinite(error).mean():>8.1%}"
+            )
+
+    # Missing anchors: drop each range with 20% probability
+    anchors = layouts["5 anchors"]
+    truth, ranges = _synthetic(rng, anchors, args.points, 50.0, args.area)
+    ranges[rng.random(ranges.shape) < 0.2] = np.nan
+    solved, _ = Trilaterator(anchors, max_residual=np.inf).solve(ranges)
+    error = np.hypot(*(solved - truth).T)
+    enough = (np.isfinite(ranges).sum(axis=1) >= MIN_ANCHORS).mean()
+    print(
+        f"5 anchors, 20% missing: median {np.nanmedian(error):.1f} cm, "
+        f"fixes {np.isfinite(error).mean():.1%} (rows with >= {MIN_ANCHORS} anchors {enough:.1%})"
+    )
+
+    print(f"\n{'batch':>8}{'us/batch':>11}{'ns/fix':>9}")
+    trilaterator = Trilaterator(layouts["3 anchors"])
+    for batch in (1, 10, 100, 1000, 10000):
+        _, ranges = _synthetic(rng, trilaterator.anchors, batch, 50.0, args.area)
+        repeat = max(args.repeat * 10 // batch, 5)
+        started = time.perf_counter()
+        for _ in range(repeat):
+            trilaterator.solve(ranges)
+        us = (time.perf_counter() - started) / repeat * 1e6
+        print(f"{batch:>8}{us:>11.1f}{us * 1000 / batch:>9.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trilaterate ESP32 range reports and publish")
+    parser.add_argument("--benchmark", action="store_true", help="Run the synthetic benchmark")
+    parser.add_argument("--port", default="/dev/ttyUSB0", help="ESP32 serial port")
+    parser.add_argument("--baud", type=int, default=115200)
+    parser.add_argument("--broker", default="vlg2.local", help="MQTT broker address")
+    parser.add_argument("--mqtt-port", type=int, default=1883)
+    parser.add_argument("--format", choices=("json", "binary"), default="json")
+    parser.add_argument(
+        "--source",
+        choices=("distance", "rssi"),
+        default="distance",
+        help="Range from the firmware model (Result) or from RSSI by path loss",
+    )
+    parser.add_argument("--tx-power", type=float, default=TX_POWER, help="RSSI at 1 m, dBm")
+    parser.add_argument("--exponent", type=float, default=PATH_LOSS_EXPONENT)
+    parser.add_argument("--max-residual", type=float, default=MAX_RESIDUAL, help="cm RMS")
+    parser.add_argument("--verbose", action="store_true", help="Print every fix")
+    parser.add_argument("--points", type=int, default=100000, help="Benchmark accuracy points")
+    parser.add_argument("--area", type=float, default=400.0, help="Benchmark half-width, cm")
+    parser.add_argument("--repeat", type=int, default=1000, help="Benchmark solves at batch 10")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args)
+    else:
+        serve(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import asyncio
+import sys
 import sounddevice as sd
 import numpy as np
 import threading
@@ -14,6 +15,10 @@ import warnings
 import websockets
 import paho.mqtt.client as mqtt
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.sar_codec import encode_sound
+from common.sar_topics import PAN_ANGLE, SOUND, robot_id_from_env, robot_topic
+
 warnings.filterwarnings("ignore", category=UserWarning)
 os.environ["TF_CPP_MIN_LOG_LEVEL"] = "3"
 
@@ -32,7 +37,11 @@ broadcast_queue = queue.Queue()
 # MQTT Setup
 MQTT_HOST = "vlg2.local"
 MQTT_PORT = 1883
-MQTT_TOPIC = "sar-robot/sound"
+ROBOT_ID = robot_id_from_env()  # $SAR_ROBOT_ID
+MQTT_TOPIC = robot_topic(ROBOT_ID, SOUND)
+MQTT_TOPIC_PAN = robot_topic(ROBOT_ID, PAN_ANGLE)
+PAYLOAD_FORMAT = "json"  # or "binary" (common/sar_codec.py), the dashboard reads both
+sound_sequence = 0
 mqtt_client = mqtt.Client()
 mqtt_client.connect(MQTT_HOST, MQTT_PORT, 60)
 mqtt_client.loop_start()
@@ -43,7 +52,7 @@ def convert_position(position: int) -> float:
 def on_message(client, userdata, msg):
     global current_position
     try:
-        if msg.topic == "sar-robot/pan_angle":
+        if msg.topic == MQTT_TOPIC_PAN:
             payload = msg.payload.decode('utf-8')
             new_position = int(float(payload))
             # Ensure position is within valid range (0-1023)
@@ -54,8 +63,8 @@ def on_message(client, userdata, msg):
         print(f"[❌] Error processing pan angle update: {e}")
 
 mqtt_client.on_message = on_message
-mqtt_client.subscribe("sar-robot/pan_angle")
-print("[📡] MQTT client started and subscribed to 'sar-robot/pan_angle'")
+mqtt_client.subscribe(MQTT_TOPIC_PAN)
+print(f"[📡] MQTT client started and subscribed to '{MQTT_TOPIC_PAN}'")
 
 # Inference
 def run_inference(audio_data: np.ndarray, model_path: str):
@@ -86,7 +95,13 @@ def run_inference(audio_data: np.ndarray, model_path: str):
         "position": round(curr_position_angle, 4),
         "human_confidence": round(score, 4)
     }
-    mqtt_client.publish(MQTT_TOPIC, json.dumps(message))
+    global sound_sequence
+    if PAYLOAD_FORMAT == "binary":
+        payload = encode_sound([(curr_position_angle, score)], sound_sequence)
+    else:
+        payload = json.dumps(message)
+    sound_sequence += 1
+    mqtt_client.publish(MQTT_TOPIC, payload)
     print(f"[📤] Published: {message} | Inference time: {inference_time:.3f}s")
 
 # Audio callback